@@ -0,0 +1,134 @@
+import argparse
+import random
+import timeit
+from eligibility import INCOME_ABSOLUTE_THRESHOLD, IncomeRuleTable, PolicyBitsetIndex, PolicyMatrix
+
+# 261018 정책 수에 따른 자격 판정 벤치마크 (가상의 정책 카탈로그)
+# 실행: python bench_policy_index.py --sizes 100,10000,100000
+# - loop: 예전 get_recommended_policies처럼 정책 행마다 if ... continue
+# - matrix: PolicyMatrix.eligible_mask (조건 배열 전체에 벡터 연산)
+# - index: PolicyBitsetIndex (불리언 비트셋 AND + 범위 조건은 이진 탐색)
+# 세 방식의 결과(정책 id 목록)가 같은지도 함께 확인함
+
+
+def make_policies(count, seed=0):
+    """policies 테이블 행을 흉내 낸 dict 목록 (정책 1개에 조건 1~3줄)"""
+    rng = random.Random(seed)
+    rows = []
+    policy_id = 0
+    while len(rows) < count:
+        policy_id += 1
+        for _ in range(min(rng.randint(1, 3), count - len(rows))):
+            rows.append({
+                "policy_id": policy_id,
+                "min_age": rng.choice([0, 18, 19, 19, 20]),
+                "max_age": rng.choice([0, 34, 39, 39, 64, 99]),
+                "asset_limit": rng.choice([0, rng.randrange(10000, 100000)]),
+                "req_newlywed": rng.random() < 0.15,
+                "req_newborn": rng.random() < 0.1,
+                "house_owner_allowed": rng.random() < 0.1,
+                "min_children": rng.choice([0, 0, 0, 1, 2, 3]),
+                "income": rng.choice([0, rng.randrange(50, 200), rng.randrange(3000, 20000)]),
+            })
+    return rows
+
+
+def make_income_rules(policy_count, seed=0):
+    """정책 20개 중 1개 꼴로 대상 유형별 소득 규칙"""
+    rng = random.Random(seed)
+    rules = []
+
+    def rule(policy_id, target_type, income_limit, priority=0, **conditions):
+        return {
+            "policy_id": policy_id, "target_type": target_type, "income_limit": income_limit, "priority": priority,
+            "req_newlywed": False, "req_dual_income": False, "req_no_house": False, "min_children": 0, **conditions,
+        }
+
+    for policy_id in range(1, policy_count + 1, 20):
+        rules.append(rule(policy_id, "기본", rng.randrange(5000, 8000)))
+        rules.append(rule(policy_id, "생애최초/2자녀", rng.randrange(7000, 9000), 1, req_no_house=True, min_children=2))
+        rules.append(rule(policy_id, "신혼부부(맞벌이)", rng.randrange(80, 150), 2, req_newlywed=True, req_dual_income=True))
+    return rules
+
+
+def make_profiles(count, seed=1):
+    """(user_info, 만 나이, 가구 수 기준 중위소득) 목록"""
+    rng = random.Random(seed)
+    return [
+        (
+            {
+                "asset": rng.randrange(0, 80000),
+                "child_count": rng.choice([0, 0, 1, 2, 3]),
+                "income": rng.randrange(0, 15000),
+                "is_newlywed": rng.random() < 0.3,
+                "has_newborn": rng.random() < 0.2,
+                "is_house_owner": rng.random() < 0.3,
+                "dual_income": rng.random() < 0.4,
+            },
+            rng.randrange(19, 70),
+            rng.choice([239, 393, 502, 609, 711]),
+        )
+        for _ in range(count)
+    ]
+
+
+def loop_policy_ids(rows, income_rules: IncomeRuleTable, user_info, age, income_standard):
+    """예전처럼 정책 행을 하나씩 보는 판정 (규칙이 있는 정책의 상한은 사용자마다 한 번 계산)"""
+    rule_limits = dict(zip(income_rules.policy_ids.tolist(), income_rules.resolve_limits(user_info, income_standard)))
+    eligible = set()
+    for row in rows:
+        if row['min_age'] and age < row['min_age']: continue
+        if row['max_age'] and age > row['max_age']: continue
+        if row['asset_limit'] and user_info['asset'] > row['asset_limit']: continue
+        if row['req_newlywed'] and not user_info['is_newlywed']: continue
+        if row['req_newborn'] and not user_info['has_newborn']: continue
+        if not row['house_owner_allowed'] and user_info['is_house_owner']: continue
+        if row['min_children'] and user_info['child_count'] < row['min_children']: continue
+
+        if row['policy_id'] in rule_limits:
+            income_limit = rule_limits[row['policy_id']]
+        elif row['income'] > INCOME_ABSOLUTE_THRESHOLD:
+            income_limit = row['income']
+        else:
+            income_limit = row['income'] * 12 * income_standard / 100
+        if user_info['income'] > income_limit: continue
+
+        eligible.add(row['policy_id'])
+    return sorted(eligible)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자격 판정: 행 루프 vs PolicyMatrix vs PolicyBitsetIndex")
+    parser.add_argument("--sizes", default="100,10000,100000", help="정책 조건 줄 수 (콤마로 구분)")
+    parser.add_argument("--profiles", type=int, default=50, help="판정할 가상 사용자 수")
+    args = parser.parse_args()
+
+    profiles = make_profiles(args.profiles)
+
+    for size in [int(size) for size in args.sizes.split(",")]:
+        rows = make_policies(size)
+        income_rules = IncomeRuleTable(make_income_rules(rows[-1]['policy_id']))
+        matrix = PolicyMatrix(rows, income_rules)
+        build_sec = timeit.timeit(lambda: PolicyBitsetIndex(matrix), number=1)
+        index = PolicyBitsetIndex(matrix)
+
+        for user_info, age, income_standard in profiles:
+            expected = loop_policy_ids(rows, income_rules, user_info, age, income_standard)
+            assert matrix.eligible_policy_ids(user_info, age, income_standard) == expected
+            assert index.eligible_policy_ids(user_info, age, income_standard) == expected
+
+        def per_profile(evaluate):
+            return timeit.timeit(lambda: [evaluate(*profile) for profile in profiles], number=1) / len(profiles) * 1000
+
+        loop_ms = per_profile(lambda *profile: loop_policy_ids(rows, income_rules, *profile))
+        matrix_ms = per_profile(matrix.eligible_mask)
+        index_ms = per_profile(index.eligible_bits)
+
+        print(f"정책 조건 {size}줄 (결과 일치 확인 완료, 색인 생성 {build_sec * 1000:.1f} ms)")
+        print(f"- loop:   사용자당 {loop_ms:.3f} ms")
+        print(f"- matrix: 사용자당 {matrix_ms:.3f} ms ({loop_ms / matrix_ms:.1f}배)")
+        print(f"- index:  사용자당 {index_ms:.3f} ms ({loop_ms / index_ms:.1f}배)")
+
+
+if __name__ == "__main__":
+    main()
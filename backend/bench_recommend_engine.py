@@ -0,0 +1,72 @@
+import argparse
+import time
+import database as db
+from eligibility import IncomeRuleTable, PolicyMatrix
+from main import calculate_age
+
+# 261018 추천 자격 판정 엔진 비교 (RECOMMEND_ENGINE=python / sql)
+# 실행: python bench_recommend_engine.py --users 200
+# - python: policies 전체를 한 번 읽어 PolicyMatrix로 두고, 사용자마다 마스크 판정 + 출력 정보는 메모리에서 꺼냄
+# - sql: 사용자마다 database.ELIGIBLE_POLICIES_SQL 한 번 (자격이 되는 정책의 policies_output 행만 받음)
+# user_info에 있는 사용자들로 두 엔진의 결과(정책 id 목록)가 같은지도 함께 확인함
+
+
+def load_profiles(limit):
+    """판정에 필요한 (user_info, 만 나이, 가구 수 기준 중위소득) 목록"""
+    with db.connection() as conn:
+        cursor = conn.cursor(cursor_factory=db.RealDictCursor)
+        cursor.execute("""
+            SELECT ui.*, h.monthly_income FROM user_info ui
+            JOIN household_income_standard100 h ON h.household_size = ui.household_size
+            ORDER BY ui.user_id
+            LIMIT %s
+        """, (limit,))
+        rows = cursor.fetchall()
+    return [(row, calculate_age(row['birth_date']), row['monthly_income']) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 자격 판정: PolicyMatrix(python) vs SQL 쿼리")
+    parser.add_argument("--users", type=int, default=200, help="비교할 사용자 수 (user_info 앞에서부터)")
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.users)
+    if not profiles:
+        print("user_info에 사용자가 없습니다.")
+        return
+
+    started = time.perf_counter()
+    policies = db.get_all_policies()
+    outputs_by_id = {row['policy_id']: row for row in db.get_all_policies_output()}
+    matrix = PolicyMatrix(policies, IncomeRuleTable(db.get_all_income_rules()))
+    load_sec = time.perf_counter() - started
+
+    python_results, sql_results = [], []
+
+    started = time.perf_counter()
+    for user_info, age, income_standard in profiles:
+        outputs = [outputs_by_id[policy_id] for policy_id in matrix.eligible_policy_ids(user_info, age, income_standard) if policy_id in outputs_by_id]
+        python_results.append([row['policy_id'] for row in outputs])
+    python_sec = (time.perf_counter() - started) / len(profiles)
+
+    started = time.perf_counter()
+    for user_info, age, income_standard in profiles:
+        sql_results.append([row['policy_id'] for row in db.get_eligible_policy_outputs(user_info, age, income_standard)])
+    sql_sec = (time.perf_counter() - started) / len(profiles)
+
+    mismatches = [
+        (str(profile[0]['user_id']), expected, actual)
+        for profile, expected, actual in zip(profiles, python_results, sql_results)
+        if expected != actual
+    ]
+    for user_id, expected, actual in mismatches[:5]:
+        print(f"❌ {user_id}: python {expected} / sql {actual}")
+
+    matched = sum(len(ids) for ids in sql_results) / len(profiles)
+    print(f"사용자 {len(profiles)}명 / 정책 조건 {len(policies)}줄, 정책 {len(outputs_by_id)}개 (불일치 {len(mismatches)}명)")
+    print(f"- python: 카탈로그 로드 한 번 {load_sec * 1000:.2f} ms (정책 {len(outputs_by_id)}행 전송), 요청당 {python_sec * 1000:.3f} ms")
+    print(f"- sql:    요청당 {sql_sec * 1000:.3f} ms (평균 {matched:.1f}행 전송)")
+
+
+if __name__ == "__main__":
+    main()
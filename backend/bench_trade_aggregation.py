@@ -0,0 +1,80 @@
+import argparse
+import random
+import timeit
+from collections import defaultdict
+import numpy as np
+from trade_batch import TradeBatch
+
+# 261018 상세 추천(/policies/recommended/detail) 거래가 집계 벤치마크
+# 실행: python bench_trade_aggregation.py --trades 10000 --apartments 300
+# - legacy: 예전 엔드포인트처럼 item dict를 돌면서 이름/해제 여부 비교, 콤마 제거, 동별 리스트, 동마다 np.mean
+# - batch: 캐시에 들어 있는 TradeBatch에서 마스크 + 동별 group-by 한 번 (TradeBatch.summarize_by_dong)
+# 두 방식의 기준값(동별 평균 중 최솟값)이 같은지도 함께 확인함
+
+
+def make_district(trade_count, apartment_count, seed=0):
+    """한 시/군/구 3개월치 거래를 흉내 낸 국토부 item dict 목록"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(trade_count):
+        apt = rng.randrange(apartment_count)
+        items.append({
+            "aptNm": f"벤치아파트{apt}",
+            "aptDong": str(100 + rng.randrange(1 + apt % 12)) if rng.random() > 0.1 else " ",
+            "dealAmount": f"{rng.randrange(20000, 300000):,}",
+            "excluUseAr": f"{rng.uniform(39, 135):.2f}",
+            "floor": str(rng.randrange(1, 30)),
+            "dealYear": "2026",
+            "dealMonth": str(8 + i % 3),
+            "dealDay": str(rng.randrange(1, 29)),
+            "cdealType": "O" if rng.random() < 0.03 else " ",
+            "umdNm": "벤치동",
+            "buildYear": str(rng.randrange(1985, 2025)),
+        })
+    return items
+
+
+def legacy_min_mean(items, apt_name):
+    """예전 get_recommended_policies_with_detail의 집계 루프"""
+    apart_list4 = defaultdict(list)
+    for apart in items:
+        if apart.get('aptNm') == apt_name and apart.get('cdealType') != "O":
+            apart_list4[apart.get('aptDong')].append(int(apart.get('dealAmount').replace(',', '').strip()))
+
+    if not apart_list4:
+        return None
+    return min(np.mean(amounts) for amounts in apart_list4.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="거래가 집계: dict 루프 vs TradeBatch group-by")
+    parser.add_argument("--trades", type=int, default=10000)
+    parser.add_argument("--apartments", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=200, help="방식마다 집계를 몇 번 돌릴지")
+    args = parser.parse_args()
+
+    items = make_district(args.trades, args.apartments)
+    names = [f"벤치아파트{i}" for i in range(args.apartments)]
+
+    parse_sec = timeit.timeit(lambda: TradeBatch.from_items(items), number=5) / 5
+    batch = TradeBatch.from_items(items)
+
+    # 결과 일치 확인 (동 이름이 공백이면 예전 코드는 " ", 새 코드는 ""로 묶지만 같은 그룹)
+    for name in names:
+        expected = legacy_min_mean(items, name)
+        summary = batch.summarize_by_dong(name)
+        actual = summary["reference_price"] if summary else None
+        assert (expected is None and actual is None) or abs(expected - actual) < 0.1, (name, expected, actual)
+
+    picks = [names[i % len(names)] for i in range(args.repeat)]
+    legacy_sec = timeit.timeit(lambda: [legacy_min_mean(items, name) for name in picks], number=1) / args.repeat
+    batch_sec = timeit.timeit(lambda: [batch.summarize_by_dong(name) for name in picks], number=1) / args.repeat
+
+    print(f"거래 {args.trades}건 / 아파트 {args.apartments}곳 (결과 일치 확인 완료)")
+    print(f"- TradeBatch 변환 (달마다 캐시에 넣을 때 한 번): {parse_sec * 1000:.2f} ms")
+    print(f"- legacy dict 루프:        요청당 {legacy_sec * 1000:.3f} ms")
+    print(f"- TradeBatch group-by:     요청당 {batch_sec * 1000:.3f} ms ({legacy_sec / batch_sec:.1f}배)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# 261018 캐시 공용 모듈
+# - LRUCache: 프로세스 내 메모리 캐시 (항목별 TTL, 적중/실패 횟수 집계)
+# - SqliteStore: 서버를 재시작해도 남는 디스크 캐시 (선택 사항)
+
+class LRUCache:
+    """스레드 안전한 LRU 캐시. 꽉 차면 가장 오래 안 쓴 항목부터 버림."""
+
+    def __init__(self, maxsize=256, name="cache"):
+        self.name = name
+        self.maxsize = maxsize
+        self._data = OrderedDict() # key -> (만료 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def get(self, key, default=None, allow_stale=False):
+        """allow_stale=True면 만료된 항목도 (아직 안 밀려났으면) 돌려줌. 업스트림 장애 시 대체 응답용."""
+        with self._lock:
+            entry = self._data.get(key)
+            if allow_stale:
+                if entry is None:
+                    return default
+                self.stale_hits += 1
+                return entry[1]
+
+            if entry is None or (entry[0] is not None and entry[0] < time.time()):
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key) # 최근 사용으로 표시
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def values(self):
+        """현재 들어 있는 값 목록 (만료된 항목 포함, 통계용)"""
+        with self._lock:
+            return [entry[1] for entry in self._data.values()]
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[1] if entry else None
+
+    def discard_where(self, predicate):
+        """predicate(key)가 참인 항목을 모두 지움. 지운 개수를 반환."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class SqliteStore:
+    """
+    SQLite 파일에 TTL과 함께 저장하는 디스크 캐시
+    기본은 JSON으로 저장하고, dumps/loads를 주면 그걸로 직렬화함 (예: TradeBatch.to_bytes/from_bytes)
+    """
+
+    def __init__(self, path, name="store", dumps=None, loads=None):
+        self.name = name
+        self.path = path
+        self._dumps = dumps or (lambda value: json.dumps(value, ensure_ascii=False))
+        self._loads = loads or json.loads
+        self._lock = threading.Lock()
+        # 여러 스레드에서 쓰므로 check_same_thread=False + 직접 락
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                expires_at REAL,
+                value TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def get(self, key, default=None, allow_stale=False):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if allow_stale:
+                if row is None:
+                    return default
+                self.stale_hits += 1
+            elif row is None or (row[0] is not None and row[0] < time.time()):
+                self.misses += 1
+                return default
+            else:
+                self.hits += 1
+        return self._loads(row[1])
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        payload = self._dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, payload),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,264 @@
+import hashlib
+import os
+import threading
+import time
+from types import MappingProxyType
+import anyio
+import database as db
+import database_async as adb
+from eligibility import IncomeRuleTable, PolicyBitsetIndex, PolicyMatrix
+from ranking import PolicyRanker
+
+# 261018 정책 카탈로그 스냅샷
+# - policies / policies_output은 한 달에 한 번 바뀔까 말까 한데, 추천 요청마다 테이블 전체를 다시 읽고 있었음
+# - 서버 시작 시 한 번 읽어서 메모리에 두고(policy_id 인덱스 + PolicyMatrix), 바뀌면 새 스냅샷을 만들어 통째로 교체
+# - 바뀌었는지는 CATALOG_CHECK_INTERVAL(초)마다 체크섬 쿼리로 확인 (또는 /api/admin/catalog/reload)
+# - visit_count는 계속 바뀌므로 스냅샷 밖에서 따로 관리 (조회 시 덮어씀)
+# - 추천 순위에 쓰는 정책별 즐겨찾기 수도 visit_count와 같이 체크 주기마다 새로 읽음
+
+CHECK_INTERVAL = float(os.getenv("CATALOG_CHECK_INTERVAL", "30"))
+
+# 261018 목록 응답용 요약 필드 (?fields=로 바꿀 수 있음, fields=all이면 전체)
+# desc, benefit_detail, limit_detail, priority_detail, caution 같은 긴 글은 목록에서 안 쓰므로
+# 상세(/policies/{policy_id})에서만 내려줌
+SUMMARY_FIELDS = (
+    "policy_id", "visit_count", "policy_name", "category", "policy_type", "region", "max_house_price",
+    "max_benefit_amount", "min_rate", "max_rate", "house_size", "max_duration_year", "policy_url", "summary",
+)
+PROJECTION_CACHE_SIZE = 16 # 스냅샷마다 미리 잘라둘 필드 조합 수 (그 이상은 요청마다 자름)
+
+
+class CatalogSnapshot:
+    """한 시점의 정책 카탈로그. 만든 뒤에는 고치지 않음 (바뀌면 새 스냅샷으로 교체)"""
+
+    def __init__(self, version, policies, outputs, income_rules=()):
+        self.version = version
+        self.loaded_at = time.time()
+        self.policies = tuple(MappingProxyType(dict(row)) for row in policies) # 정책 조건 (policies 행)
+        self.outputs = tuple(MappingProxyType(dict(row)) for row in outputs)   # 화면 출력용 정보 (policies_output 행)
+        self.outputs_by_id = MappingProxyType({row['policy_id']: row for row in self.outputs})
+        self.income_rules = IncomeRuleTable(income_rules)                          # 대상 유형별 소득 제한 (income_rules 행)
+        self.matrix = PolicyMatrix(self.policies, self.income_rules)
+        self.index = PolicyBitsetIndex(self.matrix)                                # RECOMMEND_ENGINE=index용 비트셋 색인
+        self.ranker = PolicyRanker(self.outputs)                                   # 추천 결과 순위 (혜택 금액, 금리 폭 + 조회수/즐겨찾기 수)
+        self.fields = tuple(self.outputs[0]) if self.outputs else ()               # policies_output 컬럼 이름
+        self._projections = {}
+
+    def projection(self, fields):
+        """fields 컬럼만 남긴 policy_id -> 행. 필드 조합마다 처음 한 번 만들어서 스냅샷에 같이 둠"""
+        rows = self._projections.get(fields)
+        if rows is None:
+            rows = MappingProxyType({
+                policy_id: MappingProxyType({field: row[field] for field in fields if field in row})
+                for policy_id, row in self.outputs_by_id.items()
+            })
+            if len(self._projections) < PROJECTION_CACHE_SIZE:
+                self._projections[fields] = rows
+        return rows
+
+
+_snapshot = None
+_visit_counts = {}
+_favorite_counts = {}
+_visit_generation = 0             # 조회수가 바뀔 때마다 +1
+_visit_counts_version = (-1, None) # (계산했을 때의 _visit_generation, 조회수 내용의 해시) ETag용
+_swap_lock = threading.Lock()  # 스냅샷 교체 (다시 읽는 중에 다른 요청은 기존 스냅샷으로 응답)
+_last_check = 0.0
+_reload_count = 0
+
+
+def load():
+    """DB에서 카탈로그를 새로 읽어서 스냅샷을 교체. 교체된 스냅샷을 반환."""
+    global _snapshot, _visit_counts, _favorite_counts, _visit_generation, _last_check, _reload_count
+
+    version = db.get_policy_catalog_version()
+    snapshot = CatalogSnapshot(version, db.get_all_policies(), db.get_all_policies_output(), db.get_all_income_rules())
+    visit_counts = {row['policy_id']: row.get('visit_count') or 0 for row in snapshot.outputs}
+    favorite_counts = db.get_policy_favorite_counts()
+
+    _snapshot = snapshot
+    _visit_counts = visit_counts
+    _visit_generation += 1
+    _favorite_counts = favorite_counts
+    _last_check = time.monotonic()
+    _reload_count += 1
+    print(f"📚 정책 카탈로그 로드: 조건 {len(snapshot.policies)}줄, 정책 {len(snapshot.outputs)}개, 소득 규칙 {len(snapshot.income_rules)}개 (version {version[:8]})")
+    return snapshot
+
+
+def _refresh_if_changed():
+    """체크 주기가 지났으면 체크섬을 비교해서, 바뀌었을 때만 다시 읽음 (한 번에 한 스레드만)"""
+    global _visit_counts, _favorite_counts, _visit_generation, _last_check
+
+    if not _swap_lock.acquire(blocking=False):
+        return # 다른 요청이 이미 확인 중 → 기존 스냅샷으로 응답
+    try:
+        if time.monotonic() - _last_check < CHECK_INTERVAL:
+            return
+
+        if db.get_policy_catalog_version() != _snapshot.version:
+            load()
+        else:
+            # 내용은 그대로면 다른 워커에서 올린 조회수, 즐겨찾기 수만 맞춰둠
+            _visit_counts = db.get_policy_visit_counts()
+            _visit_generation += 1
+            _favorite_counts = db.get_policy_favorite_counts()
+            _last_check = time.monotonic()
+    except Exception as e:
+        # DB가 잠깐 안 돼도 기존 스냅샷으로 계속 응답
+        print(f"⚠️ 정책 카탈로그 확인 실패: {e}")
+        _last_check = time.monotonic()
+    finally:
+        _swap_lock.release()
+
+
+def get():
+    """현재 스냅샷 (처음이면 로드, 체크 주기가 지났으면 변경 여부 확인)"""
+    if _snapshot is None:
+        with _swap_lock:
+            if _snapshot is None:
+                load()
+    elif time.monotonic() - _last_check >= CHECK_INTERVAL:
+        _refresh_if_changed()
+    return _snapshot
+
+
+async def get_async():
+    """async 라우트용 get(). 처음 로드/변경 확인처럼 DB를 읽어야 할 때만 스레드에서 돌림 (이벤트 루프를 막지 않음)"""
+    if _snapshot is None or time.monotonic() - _last_check >= CHECK_INTERVAL:
+        return await anyio.to_thread.run_sync(get)
+    return _snapshot
+
+
+def reload():
+    """관리자 요청으로 강제 다시 읽기"""
+    with _swap_lock:
+        return load()
+
+
+def popularity():
+    """(policy_id -> 조회수, policy_id -> 즐겨찾기 수). 최대 CHECK_INTERVAL초 전 값"""
+    return _visit_counts, _favorite_counts
+
+
+def parse_fields(fields: str, snapshot: CatalogSnapshot):
+    """
+    ?fields= 값 → 컬럼 이름 튜플 (policy_id는 항상 포함). 비어 있으면 SUMMARY_FIELDS, 'all'이면 None(전체)
+    policies_output에 없는 이름이 있으면 ValueError
+    """
+    if not fields:
+        return tuple(field for field in SUMMARY_FIELDS if not snapshot.fields or field in snapshot.fields)
+    if fields.strip() == "all":
+        return None
+
+    names = tuple(dict.fromkeys(["policy_id", *(name.strip() for name in fields.split(",") if name.strip())]))
+    unknown = [name for name in names if snapshot.fields and name not in snapshot.fields]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(unknown)}")
+    return names
+
+
+def project(row, fields):
+    """행에서 fields 컬럼만 (fields가 None이면 그대로)"""
+    if fields is None:
+        return row
+    return {field: row[field] for field in fields if field in row}
+
+
+def _with_visit_count(row):
+    output = dict(row)
+    if 'visit_count' in output:
+        output['visit_count'] = _visit_counts.get(row['policy_id'], output['visit_count'])
+    return output
+
+
+def _rows_by_id(snapshot, fields):
+    return snapshot.outputs_by_id if fields is None else snapshot.projection(fields)
+
+
+def _missing_ids(snapshot, policy_ids):
+    return [policy_id for policy_id in policy_ids if policy_id not in snapshot.outputs_by_id]
+
+
+def _ordered_outputs(rows_by_id, policy_ids, fetched):
+    fetched = {row['policy_id']: row for row in fetched}
+    outputs = []
+    for policy_id in policy_ids:
+        row = rows_by_id.get(policy_id) or fetched.get(policy_id)
+        if row is not None:
+            outputs.append(_with_visit_count(row))
+    return outputs
+
+
+def get_policy_outputs(policy_ids=None, fields=None):
+    """
+    정책 출력 정보 목록 (policy_ids를 주면 그 순서대로, fields를 주면 그 컬럼만)
+    스냅샷을 만든 뒤에 추가된 정책이라 스냅샷에 없는 id는 DB에서 한 번에 가져옴 (id마다 조회하지 않음)
+    """
+    snapshot = get()
+    rows_by_id = _rows_by_id(snapshot, fields)
+    if policy_ids is None:
+        return [_with_visit_count(row) for row in rows_by_id.values()]
+
+    missing = _missing_ids(snapshot, policy_ids)
+    fetched = db.get_policy_outputs_by_ids(missing, fields) if missing else []
+    return _ordered_outputs(rows_by_id, policy_ids, fetched)
+
+
+def get_policy_output(policy_id: int, fields=None):
+    outputs = get_policy_outputs([policy_id], fields)
+    return outputs[0] if outputs else None
+
+
+async def get_policy_outputs_async(policy_ids=None, fields=None):
+    """get_policy_outputs의 async 버전 (스냅샷에 없는 id는 database_async로 한 번에 가져옴)"""
+    snapshot = await get_async()
+    rows_by_id = _rows_by_id(snapshot, fields)
+    if policy_ids is None:
+        return [_with_visit_count(row) for row in rows_by_id.values()]
+
+    missing = _missing_ids(snapshot, policy_ids)
+    fetched = await adb.get_policy_outputs_by_ids(missing, fields) if missing else []
+    return _ordered_outputs(rows_by_id, policy_ids, fetched)
+
+
+async def get_policy_output_async(policy_id: int, fields=None):
+    outputs = await get_policy_outputs_async([policy_id], fields)
+    return outputs[0] if outputs else None
+
+
+def record_visit(policy_id: int):
+    """조회수 증가를 DB에 쓴 뒤 이 워커의 조회수에도 바로 반영"""
+    global _visit_generation
+    if policy_id in _visit_counts:
+        _visit_counts[policy_id] += 1
+        _visit_generation += 1
+
+
+def visit_counts_version():
+    """지금 조회수 내용의 해시. 목록 응답에 visit_count가 들어가므로 ETag에 카탈로그 버전과 같이 씀"""
+    global _visit_counts_version
+    generation, version = _visit_counts_version
+    if generation != _visit_generation:
+        generation = _visit_generation
+        payload = ",".join(f"{policy_id}:{count}" for policy_id, count in sorted(_visit_counts.items()))
+        version = hashlib.sha1(payload.encode()).hexdigest()
+        _visit_counts_version = (generation, version)
+    return version
+
+
+def visit_count(policy_id: int):
+    return _visit_counts.get(policy_id)
+
+
+def stats():
+    snapshot = _snapshot
+    return {
+        "version": snapshot.version if snapshot else None,
+        "policies": len(snapshot.policies) if snapshot else 0,
+        "outputs": len(snapshot.outputs) if snapshot else 0,
+        "income_rules": len(snapshot.income_rules) if snapshot else 0,
+        "loaded_at": snapshot.loaded_at if snapshot else None,
+        "reload_count": _reload_count,
+        "check_interval": CHECK_INTERVAL,
+    }
@@ -1,6 +1,14 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor # 결과를 딕셔너리로 받기 위함
+from psycopg2.extras import RealDictCursor, execute_values # 결과를 딕셔너리로 받기 위함
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from psycopg2.pool import PoolError
+import contextvars
 import os
+import re
+from collections import deque
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import bcrypt
 import pandas as pd
@@ -174,53 +182,394 @@ def init_db():
 
 
 # db 연결 251230
+# 261018 커넥션 풀
+# - 예전에는 함수마다 psycopg2.connect(TCP + 인증 + 백엔드 프로세스 생성)를 하고 닫았음 → 추천 요청 1번에 접속 3 + N번
+# - 이제 get_db_connection()은 프로세스 공용 풀(DB_POOL_MIN개는 미리 연결, 최대 DB_POOL_MAX개)에서 커넥션을 빌려오고, conn.close()는 풀에 돌려줌 (기존 함수들은 그대로 동작)
+# - 새 코드는 `with db.connection() as conn:` 을 쓰면 예외가 나도 반드시 반납됨
+# - 풀이 꽉 차면 DB_POOL_TIMEOUT초까지 기다렸다가 PoolTimeout
+# - DB_POOL_HEALTHCHECK_IDLE초 넘게 놀던 커넥션은 빌려주기 전에 SELECT 1로 확인 (DB 재시작 등으로 끊긴 커넥션 걸러냄)
+# - DB_POOL_MAX는 워커 하나의 전체 커넥션 수. asyncpg 풀(database_async)이 DB_ASYNC_POOL_MAX개(기본 절반)를 쓰고 나머지가 이 풀
+#   (워커 수 × DB_POOL_MAX가 DB max_connections 안에 들어가게 잡으면 됨)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_ASYNC_POOL_MIN = int(os.getenv("DB_ASYNC_POOL_MIN", "1"))
+DB_ASYNC_POOL_MAX = int(os.getenv("DB_ASYNC_POOL_MAX", str(max(DB_POOL_MAX // 2, 1))))
+DB_SYNC_POOL_MAX = max(DB_POOL_MAX - DB_ASYNC_POOL_MAX, 1)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_HEALTHCHECK_IDLE = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", "30"))
+
+
+class PoolTimeout(PoolError):
+    """DB_POOL_TIMEOUT 안에 빌려줄 커넥션이 나지 않음"""
+
+
+class PooledConnection:
+    """psycopg2 커넥션을 그대로 감싸되, close()를 부르면 닫지 않고 풀에 반납"""
+
+    __slots__ = ("_conn", "_pool", "_released")
+
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._pool = pool
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.putconn(self._conn)
+
+    def __del__(self):
+        # close()를 빼먹은 코드가 있어도 풀에서 커넥션이 새지 않도록
+        self.close()
+
+
+class ConnectionPool:
+    """
+    스레드 안전한 커넥션 풀: 최대 maxconn개까지 빌려주고, 반납된 커넥션은 닫지 않고 다시 씀
+    (psycopg2 기본 풀은 minconn개 넘게 반납되면 닫아버려서 부하가 몰릴 때 다시 접속하게 됨)
+    """
+
+    def __init__(self, minconn, maxconn, timeout, healthcheck_idle, **connect_kwargs):
+        self._connect_kwargs = connect_kwargs
+        self._idle = deque() # (커넥션, 반납된 시각)
+        self._idle_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._stats_lock = threading.Lock()
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+        self.opened = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+        self.discarded = 0
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._stats_lock:
+            self.opened += 1
+        return conn
+
+    def getconn(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._stats_lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"{self.timeout}초 안에 DB 커넥션을 빌리지 못했습니다 (최대 {self.maxconn}개 사용 중)")
+        waited = time.monotonic() - started
+
+        try:
+            conn = self._healthy_conn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._stats_lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+            if waited >= 0.001:
+                self.waits += 1
+        return conn
+
+    def _healthy_conn(self):
+        while True:
+            with self._idle_lock:
+                if not self._idle:
+                    break
+                conn, idle_since = self._idle.pop() # 가장 최근에 반납된 것부터 (오래 논 커넥션은 덜 쓰게)
+
+            if conn.closed:
+                self._discard(conn)
+                continue
+            if time.monotonic() - idle_since < self.healthcheck_idle:
+                return conn
+
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+                return conn
+            except psycopg2.Error:
+                self._discard(conn)
+
+        return self._connect()
+
+    def _discard(self, conn):
+        with self._stats_lock:
+            self.discarded += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def putconn(self, conn):
+        try:
+            if conn.closed or conn.info.transaction_status == TRANSACTION_STATUS_UNKNOWN:
+                self._discard(conn) # 서버와 연결이 끊긴 커넥션
+                return
+            if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback() # 조회만 하고 commit 안 한 트랜잭션, 에러 난 트랜잭션 정리
+            with self._idle_lock:
+                self._idle.append((conn, time.monotonic()))
+        except psycopg2.Error:
+            self._discard(conn)
+        finally:
+            with self._stats_lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def closeall(self):
+        with self._idle_lock:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                conn.close()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "min": self.minconn,
+                "max": self.maxconn,
+                "in_use": self.in_use,
+                "idle": len(self._idle),
+                "opened": self.opened,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time_total": round(self.wait_time_total, 4),
+                "wait_time_max": round(self.wait_time_max, 4),
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# 261018 DB 접속 횟수 집계 (이 파일의 함수는 모두 호출 1번에 커넥션 대여 1번 = 쿼리 왕복 1번 꼴)
+# track_queries()로 감싼 구간에서 몇 번 빌렸는지 셀 수 있음 (요청당 쿼리 수 확인용)
+_connection_count = 0
+_tracked_counts = contextvars.ContextVar("tracked_db_connections", default=None)
+
+
+@contextmanager
+def track_queries():
+    """with db.track_queries() as counter: ... → counter['count']에 구간 안의 DB 커넥션 대여 횟수"""
+    counter = {'count': 0}
+    token = _tracked_counts.set(counter)
+    try:
+        yield counter
+    finally:
+        _tracked_counts.reset(token)
+
+
+def get_pool():
+    """프로세스 공용 커넥션 풀 (처음 쓸 때 만듦. uvicorn 워커가 fork된 뒤에 만들어지도록)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                min(DB_POOL_MIN, DB_SYNC_POOL_MAX), DB_SYNC_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_HEALTHCHECK_IDLE,
+                host=os.getenv("DB_HOST"),
+                database=os.getenv("DB_NAME"),
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASS"),
+                port=os.getenv("DB_PORT")
+            )
+    return _pool
+
+
+def close_pool():
+    """서버 종료 시 풀의 커넥션을 모두 닫음"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+def get_query_stats():
+    return {
+        "connections": _connection_count,
+        "pool": _pool.stats() if _pool is not None else None,
+    }
+
+
 def get_db_connection():
-    """PostgreSQL DB 연결 객체 생성"""
-    conn = psycopg2.connect(
-        host=os.getenv("DB_HOST"),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASS"),
-        port=os.getenv("DB_PORT")
-    )
-    return conn
+    """풀에서 PostgreSQL 커넥션을 빌려옴 (다 쓰면 conn.close()로 반납)"""
+    global _connection_count
+    _connection_count += 1
+    counter = _tracked_counts.get()
+    if counter is not None:
+        counter['count'] += 1
+
+    pool = get_pool()
+    return PooledConnection(pool.getconn(), pool)
+
+
+@contextmanager
+def connection():
+    """with db.connection() as conn: ... 블록이 끝나면(예외가 나도) 커넥션을 풀에 반납"""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
 
 
 def get_all_policies():
     conn = get_db_connection()
     # RealDictCursor: 결과를 딕셔너리 형태(JSON)로 받아줌
     cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute("SELECT * FROM policies")
-    result = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    return result
+
+    try:
+        cursor.execute("SELECT * FROM policies")
+        result = cursor.fetchall()
+        return result
+    finally:
+        cursor.close()
+        conn.close()
 
 def get_all_policies_output():
     conn = get_db_connection()
     # RealDictCursor: 결과를 딕셔너리 형태(JSON)로 받아줌
     cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute("SELECT * FROM policies_output")
-    result = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    return result
+
+    try:
+        cursor.execute("SELECT * FROM policies_output")
+        result = cursor.fetchall()
+        return result
+    finally:
+        cursor.close()
+        conn.close()
+
+_COLUMN_NAME = re.compile(r"[a-z_][a-z0-9_]*")
+
+def output_columns_sql(fields=None):
+    """
+    policies_output SELECT 목록. fields가 None이면 *, 아니면 그 컬럼만 ("desc", "limit"처럼 예약어인 컬럼이 있어서 따옴표)
+    fields는 카탈로그에서 검증한 컬럼 이름이어야 함 (그래도 이름 형식은 한 번 더 확인)
+    """
+    if fields is None:
+        return "*"
+    for field in fields:
+        if not _COLUMN_NAME.fullmatch(field):
+            raise ValueError(f"잘못된 컬럼 이름: {field}")
+    return ", ".join(f'"{field}"' for field in fields)
+
+
+def get_policy_outputs_by_ids(policy_ids, fields=None):
+    """
+    여러 정책의 출력 정보를 쿼리 한 번으로 가져옴 (get_policy_output_by_id를 id마다 부르지 않도록)
+    결과는 policy_ids 순서 그대로, 없는 id는 빠짐. fields를 주면 그 컬럼만
+    """
+    policy_ids = list(policy_ids)
+    if not policy_ids:
+        return []
+
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        cursor.execute(f"""
+            SELECT {output_columns_sql(fields)} FROM policies_output
+            WHERE policy_id = ANY(%s)
+            ORDER BY array_position(%s, policy_id)
+        """, (policy_ids, policy_ids))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+# 261018 자격 판정을 SQL로 (RECOMMEND_ENGINE=sql)
+# - 기본(python) 엔진은 카탈로그 스냅샷의 PolicyMatrix로 판정하고, 이 쿼리는 같은 조건 7개를 DB에서 바로 걸러서
+#   자격이 되는 정책의 policies_output 행만 가져옴 (전송량이 카탈로그 크기가 아니라 결과 수에 비례)
+# - 규칙은 eligibility.PolicyMatrix와 같음 (0/NULL 제한은 검사 안 함, house_owner_allowed가 NULL이면 무주택자만,
+#   income > 1000이면 절대 금액(만) 아니면 기준 중위소득 대비 %)
+# - 나이/자녀 수/소득은 0 이상이라 'x = 0 OR 값 >= x'를 'x <= 값'으로 바꿔 써서 policies 인덱스를 탈 수 있게 함
+# - income_rules에 규칙이 있는 정책은 소득 조건을 규칙으로 판정 (eligibility.IncomeRuleTable과 같음:
+#   조건 컬럼(req_newlywed/req_dual_income/req_no_house/min_children)이 맞는 규칙 중 priority가 가장 큰 것의 상한, 같으면 높은 상한)
+_INCOME_RULE_LIMIT = """CASE WHEN COALESCE(r.income_limit, 0) > 1000 THEN r.income_limit
+                         ELSE COALESCE(r.income_limit, 0) * 12 * %(income_standard)s::numeric / 100 END"""
+
+ELIGIBLE_POLICIES_SQL = """
+    SELECT po.* FROM policies_output po
+    WHERE po.policy_id IN (
+        SELECT p.policy_id FROM policies p
+        WHERE (p.min_age IS NULL OR p.min_age <= %(age)s::int)
+          AND (p.max_age IS NULL OR p.max_age = 0 OR p.max_age >= %(age)s::int)
+          AND (p.asset_limit IS NULL OR p.asset_limit = 0 OR p.asset_limit >= %(asset)s::bigint)
+          AND (p.req_newlywed IS NOT TRUE OR %(is_newlywed)s::boolean)
+          AND (p.req_newborn IS NOT TRUE OR %(has_newborn)s::boolean)
+          AND (p.house_owner_allowed IS TRUE OR NOT %(is_house_owner)s::boolean)
+          AND (p.min_children IS NULL OR p.min_children <= %(child_count)s::int)
+          AND CASE WHEN EXISTS (SELECT 1 FROM income_rules r WHERE r.policy_id = p.policy_id) THEN COALESCE((
+              SELECT """ + _INCOME_RULE_LIMIT + """ >= %(income)s::bigint
+              FROM income_rules r
+              WHERE r.policy_id = p.policy_id
+                AND (r.req_newlywed IS NOT TRUE OR %(is_newlywed)s::boolean)
+                AND (r.req_dual_income IS NOT TRUE OR %(dual_income)s::boolean)
+                AND (r.req_no_house IS NOT TRUE OR NOT %(is_house_owner)s::boolean)
+                AND COALESCE(r.min_children, 0) <= %(child_count)s::int
+              ORDER BY COALESCE(r.priority, 0) DESC, """ + _INCOME_RULE_LIMIT + """ DESC
+              LIMIT 1
+          ), FALSE) ELSE (
+              (p.income > 1000 AND p.income >= %(income)s::bigint)
+              OR (COALESCE(p.income, 0) <= 1000
+                  AND COALESCE(p.income, 0) * 12 * %(income_standard)s::numeric / 100 >= %(income)s::bigint)
+          ) END
+    )
+    ORDER BY po.policy_id
+"""
+
+def eligibility_params(user_info: dict, age: int, income_standard):
+    """ELIGIBLE_POLICIES_SQL에 넣을 사용자 값 (NULL은 PolicyMatrix와 같게 0/False로)"""
+    return {
+        "age": age,
+        "asset": user_info['asset'] or 0,
+        "is_newlywed": bool(user_info['is_newlywed']),
+        "has_newborn": bool(user_info['has_newborn']),
+        "is_house_owner": bool(user_info['is_house_owner']),
+        "child_count": user_info['child_count'] or 0,
+        "income": user_info['income'] or 0,
+        "income_standard": income_standard,
+        "dual_income": bool(user_info.get('dual_income')),
+    }
+
+def get_eligible_policy_outputs(user_info: dict, age: int, income_standard):
+    """자격이 되는 정책의 출력 정보 목록 (policy_id 오름차순, 쿼리 한 번)"""
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        cursor.execute(ELIGIBLE_POLICIES_SQL, eligibility_params(user_info, age, income_standard))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
 
 def get_policy_output_by_id(policy_id: int):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    # [주의] SQLite는 ?, PostgreSQL은 %s를 사용합니다!
-    cursor.execute("SELECT * FROM policies_output WHERE policy_id = %s", (policy_id,))
-    result = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    return result
+
+    try:
+        # [주의] SQLite는 ?, PostgreSQL은 %s를 사용합니다!
+        cursor.execute("SELECT * FROM policies_output WHERE policy_id = %s", (policy_id,))
+        result = cursor.fetchone()
+        return result
+    finally:
+        cursor.close()
+        conn.close()
 
 
 # 251231
@@ -332,13 +681,14 @@ def save_user_info(user_id, info_data: dict):
 def get_user_by_username(username: str):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-    result = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    return result
+
+    try:
+        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+        result = cursor.fetchone()
+        return result
+    finally:
+        cursor.close()
+        conn.close()
 
 # 251231, login
 def authenticate_user(username, input_password):
@@ -413,6 +763,16 @@ def get_user_info(user_id):
         conn.close()
 
 #260101
+def get_all_income_rules():
+    """income_rules 전체 (카탈로그 스냅샷의 IncomeRuleTable용)"""
+    with connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute("""
+            SELECT policy_id, target_type, income_limit, req_newlywed, req_dual_income, req_no_house, min_children, priority
+            FROM income_rules ORDER BY rule_id
+        """)
+        return cursor.fetchall()
+
 def get_income_rule(policy_id):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -440,6 +800,52 @@ def get_household_income_standard(household_size):
         conn.close()
 
 
+def get_household_income_standards():
+    """가구 수 -> 기준 중위소득 100% 월 소득 (일괄 추천에서 한 번에 읽음)"""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT household_size, monthly_income FROM household_income_standard100")
+        return dict(cursor.fetchall())
+
+
+# 261018 정책 → 자격 있는 사용자 역조회용 (eligible_users.py)
+# 생년월일은 연/월/일 숫자로 나눠 받아서 만 나이를 배열로 계산함 (없으면 0 → calculate_age와 같게)
+# 가구 수 기준 소득이 없는 사용자는 추천도 못 받으므로 JOIN에서 빠짐
+USER_PROFILE_COLUMNS_SQL = """
+    SELECT
+        ui.user_id::text,
+        COALESCE(EXTRACT(YEAR FROM ui.birth_date)::int, 0),
+        COALESCE(EXTRACT(MONTH FROM ui.birth_date)::int, 0),
+        COALESCE(EXTRACT(DAY FROM ui.birth_date)::int, 0),
+        COALESCE(ui.asset, 0),
+        COALESCE(ui.child_count, 0),
+        COALESCE(ui.income, 0),
+        COALESCE(ui.is_newlywed, FALSE),
+        COALESCE(ui.has_newborn, FALSE),
+        COALESCE(ui.is_house_owner, FALSE),
+        COALESCE(ui.dual_income, FALSE),
+        hs.monthly_income
+    FROM user_info ui
+    JOIN household_income_standard100 hs ON hs.household_size = ui.household_size
+    WHERE ui.user_id IS NOT NULL
+"""
+
+def iter_user_profile_rows(chunk_size=50000):
+    """user_info 전체를 서버 측 커서로 chunk_size줄씩 (튜플 목록) 내보냄. 열 순서는 USER_PROFILE_COLUMNS_SQL 참고"""
+    with connection() as conn:
+        cursor = conn.cursor(name="user_profile_scan") # 이름 있는 커서 = 서버 측 커서 (전체를 메모리에 올리지 않음)
+        cursor.itersize = chunk_size
+        try:
+            cursor.execute(USER_PROFILE_COLUMNS_SQL)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+
 def get_region_code(sido, sigungu):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -614,4 +1020,302 @@ def increment_policy_visit_count(policy_id: int):
         return False
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+
+# 261018 아파트 실거래 적재 테이블(apt_trades) 관련
+
+def get_region_names():
+    """region_code의 (시/도, 시/군/구) 전체 (regions.py 스냅샷용, 시/도 자체 행은 sigungu가 NULL)"""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT sido, sigungu FROM region_code")
+        return cursor.fetchall()
+
+
+def get_all_region_codes():
+    """국토부 API에 넣을 수 있는 시/군/구 단위 코드 목록 (시/도 자체 코드는 제외)"""
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        cursor.execute("SELECT code FROM region_code WHERE sigungu IS NOT NULL ORDER BY code")
+        return [row['code'] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_ingested_months(lawd_cd):
+    """해당 지역에서 이미 적재한 계약월 -> 적재 후 지난 시간(초)"""
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        # fetched_at은 DB 세션 기준 시각이라 경과 시간도 DB에서 계산함 (서버 시간대 차이 방지)
+        cursor.execute("""
+            SELECT deal_ymd, EXTRACT(EPOCH FROM (LOCALTIMESTAMP - fetched_at)) AS age_sec
+            FROM apt_trade_months WHERE lawd_cd = %s
+        """, (lawd_cd,))
+        return {row['deal_ymd']: float(row['age_sec']) for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def is_region_ingested(lawd_cd):
+    """적재가 한 번이라도 된 지역인지 (안 된 지역은 국토부 API로 바로 조회)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT 1 FROM apt_trade_months WHERE lawd_cd = %s LIMIT 1", (lawd_cd,))
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def replace_apt_trades(lawd_cd, deal_ymd, rows):
+    """
+    한 달치 거래를 통째로 교체 (삭제 + 삽입 + 적재 이력 갱신을 한 트랜잭션으로)
+    rows는 리스트뿐 아니라 제너레이터도 가능 (페이지 단위로 받아가며 바로 INSERT)
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    trade_count = 0
+
+    def values():
+        nonlocal trade_count
+        for row in rows:
+            trade_count += 1
+            yield (
+                lawd_cd, deal_ymd, row['deal_day'], row['apt_name'], row['apt_dong'], row['umd_nm'],
+                row['deal_amount'], row['exclu_use_ar'], row['floor'], row['build_year'], row['cdeal_type']
+            )
+
+    try:
+        cursor.execute("DELETE FROM apt_trades WHERE lawd_cd = %s AND deal_ymd = %s", (lawd_cd, deal_ymd))
+
+        execute_values(cursor, """
+            INSERT INTO apt_trades (
+                lawd_cd, deal_ymd, deal_day, apt_name, apt_dong, umd_nm,
+                deal_amount, exclu_use_ar, floor, build_year, cdeal_type
+            ) VALUES %s
+        """, values(), page_size=500)
+
+        cursor.execute("""
+            INSERT INTO apt_trade_months (lawd_cd, deal_ymd, trade_count, fetched_at)
+            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (lawd_cd, deal_ymd)
+            DO UPDATE SET trade_count = EXCLUDED.trade_count, fetched_at = EXCLUDED.fetched_at
+        """, (lawd_cd, deal_ymd, trade_count))
+
+        conn.commit()
+        return True
+
+    except Exception as e:
+        # 스트리밍 도중 국토부 API가 실패해도 여기로 와서 그 달은 통째로 롤백됨
+        print(f"실거래 적재 실패 ({lawd_cd}, {deal_ymd}): {e}")
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_apt_names(lawd_cd, since_ymd):
+    """since_ymd(YYYYMM) 이후 거래가 있는 아파트 이름 목록"""
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        cursor.execute("""
+            SELECT DISTINCT apt_name FROM apt_trades
+            WHERE lawd_cd = %s AND deal_ymd >= %s
+            ORDER BY apt_name
+        """, (lawd_cd, since_ymd))
+        return [row['apt_name'] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_apt_trades(lawd_cd, apt_name, since_ymd):
+    """since_ymd(YYYYMM) 이후 해당 아파트의 거래 (해제된 거래 cdeal_type = 'O' 는 제외)"""
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        cursor.execute("""
+            SELECT apt_dong, deal_amount, deal_ymd, deal_day, exclu_use_ar, floor
+            FROM apt_trades
+            WHERE lawd_cd = %s AND apt_name = %s AND deal_ymd >= %s
+              AND COALESCE(cdeal_type, '') <> 'O'
+        """, (lawd_cd, apt_name, since_ymd))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def rebuild_apt_price_stats(lawd_cd, windows, as_of_ymd):
+    """
+    한 지역의 아파트별 거래가 통계를 다시 계산해서 통째로 교체 (한 트랜잭션)
+    windows: [(개월 수, 시작 계약월 YYYYMM), ...]
+    동별/전체 건수, 평균, 최솟값, 사분위수, 중앙값, 최댓값을 SQL 집계로 계산 (해제된 거래 제외)
+    거래가 없어서 통계 행이 0개인 지역도 apt_price_stats_regions에 as_of_ymd를 남겨서, 다음 적재 때 다시 계산하지 않음
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("DELETE FROM apt_price_stats WHERE lawd_cd = %s", (lawd_cd,))
+
+        for window_months, since_ymd in windows:
+            cursor.execute("""
+                WITH base AS (
+                    SELECT apt_name, COALESCE(apt_dong, '') AS apt_dong, deal_amount
+                    FROM apt_trades
+                    WHERE lawd_cd = %(lawd_cd)s AND deal_ymd >= %(since_ymd)s
+                      AND COALESCE(cdeal_type, '') <> 'O'
+                ),
+                by_dong AS (
+                    SELECT apt_name, apt_dong,
+                           COUNT(*) AS count,
+                           AVG(deal_amount)::float8 AS mean,
+                           MIN(deal_amount) AS min,
+                           percentile_cont(0.25) WITHIN GROUP (ORDER BY deal_amount) AS p25,
+                           percentile_cont(0.5) WITHIN GROUP (ORDER BY deal_amount) AS median,
+                           percentile_cont(0.75) WITHIN GROUP (ORDER BY deal_amount) AS p75,
+                           MAX(deal_amount) AS max
+                    FROM base GROUP BY apt_name, apt_dong
+                ),
+                dongs AS (
+                    SELECT apt_name,
+                           MIN(mean) AS reference_price,
+                           jsonb_agg(jsonb_build_object(
+                               'apt_dong', NULLIF(apt_dong, ''), 'count', count, 'mean', round(mean::numeric, 1),
+                               'min', min, 'p25', p25, 'median', median, 'p75', p75, 'max', max
+                           ) ORDER BY apt_dong) AS dongs
+                    FROM by_dong GROUP BY apt_name
+                ),
+                overall AS (
+                    SELECT apt_name,
+                           COUNT(*) AS trade_count,
+                           AVG(deal_amount)::float8 AS mean_amount,
+                           MIN(deal_amount) AS min_amount,
+                           percentile_cont(0.25) WITHIN GROUP (ORDER BY deal_amount) AS p25_amount,
+                           percentile_cont(0.5) WITHIN GROUP (ORDER BY deal_amount) AS median_amount,
+                           percentile_cont(0.75) WITHIN GROUP (ORDER BY deal_amount) AS p75_amount,
+                           MAX(deal_amount) AS max_amount
+                    FROM base GROUP BY apt_name
+                )
+                INSERT INTO apt_price_stats (
+                    lawd_cd, apt_name, window_months, as_of_ymd, trade_count, mean_amount, min_amount,
+                    p25_amount, median_amount, p75_amount, max_amount, reference_price, dongs
+                )
+                SELECT %(lawd_cd)s, o.apt_name, %(window_months)s, %(as_of_ymd)s, o.trade_count,
+                       round(o.mean_amount::numeric, 1), o.min_amount, o.p25_amount, o.median_amount, o.p75_amount,
+                       o.max_amount, round(d.reference_price::numeric, 1), d.dongs
+                FROM overall o JOIN dongs d ON d.apt_name = o.apt_name
+            """, {'lawd_cd': lawd_cd, 'since_ymd': since_ymd, 'window_months': window_months, 'as_of_ymd': as_of_ymd})
+
+        cursor.execute("""
+            INSERT INTO apt_price_stats_regions (lawd_cd, as_of_ymd, built_at)
+            VALUES (%s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (lawd_cd)
+            DO UPDATE SET as_of_ymd = EXCLUDED.as_of_ymd, built_at = EXCLUDED.built_at
+        """, (lawd_cd, as_of_ymd))
+
+        conn.commit()
+        return True
+
+    except Exception as e:
+        print(f"거래가 통계 계산 실패 ({lawd_cd}): {e}")
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_price_stats_as_of(lawd_cd):
+    """해당 지역 통계가 어느 달 기준으로 계산됐는지 (거래가 없어 통계 행이 없어도 계산했으면 그 달, 계산한 적 없으면 None)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT as_of_ymd FROM apt_price_stats_regions WHERE lawd_cd = %s", (lawd_cd,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_apt_price_stats(lawd_cd, apt_name, window_months):
+    """미리 계산해둔 아파트 거래가 통계 1건 (상세 추천 응답과 같은 모양 + as_of_ymd). 없으면 None."""
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        cursor.execute("""
+            SELECT as_of_ymd, reference_price, trade_count AS count, mean_amount AS mean, min_amount AS min,
+                   p25_amount AS p25, median_amount AS median, p75_amount AS p75, max_amount AS max, dongs
+            FROM apt_price_stats
+            WHERE lawd_cd = %s AND apt_name = %s AND window_months = %s
+        """, (lawd_cd, apt_name, window_months))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# 261018 정책 카탈로그 스냅샷(catalog.py) 관련
+
+def get_policy_catalog_version():
+    """
+    policies + policies_output + income_rules 내용의 체크섬 (바뀌었는지 확인용)
+    visit_count는 조회할 때마다 바뀌므로 체크섬에서 뺌
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            SELECT md5(
+                -- policies는 schema.sql(id 없음)과 init_db.py(id SERIAL) 둘 다 있어서 policy_id로 정렬 (같은 정책의 여러 줄은 내용 순)
+                COALESCE((SELECT string_agg(p::text, '|' ORDER BY p.policy_id, p::text) FROM policies p), '')
+                || '#' ||
+                COALESCE((SELECT string_agg((to_jsonb(o) - 'visit_count')::text, '|' ORDER BY o.policy_id)
+                          FROM policies_output o), '')
+                || '#' ||
+                COALESCE((SELECT string_agg(r::text, '|' ORDER BY r.rule_id) FROM income_rules r), '')
+            )
+        """)
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_policy_visit_counts():
+    """policy_id -> visit_count"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT policy_id, visit_count FROM policies_output")
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_policy_favorite_counts():
+    """policy_id -> 즐겨찾기한 사용자 수 (추천 순위용)"""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT policy_id, COUNT(*) FROM favorites GROUP BY policy_id")
+        return dict(cursor.fetchall())
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import re
+import time
+import asyncpg
+from dotenv import load_dotenv
+from database import ELIGIBLE_POLICIES_SQL, DB_ASYNC_POOL_MAX, DB_ASYNC_POOL_MIN, DB_POOL_TIMEOUT, eligibility_params, output_columns_sql
+
+load_dotenv()
+
+# 261018 async DB 접근 (asyncpg 풀)
+# - database.py의 sync 함수들은 Starlette 스레드풀(기본 40개)에서 돌아서, 부하가 몰리면 DB가 아니라 스레드를 기다리게 됨
+# - 자주 불리는 async 엔드포인트(/policies, /policies/recommended, /favorites/me, /regions/...)는 이 모듈을 씀
+# - 함수 이름/반환 모양은 database.py와 같게 맞춤 (행은 dict, 쿼리 자리표시자만 %s 대신 $1, $2 ...)
+# - 풀은 서버 시작 시(main.py startup) 앱 이벤트 루프에서 만듦
+#   크기는 DB_ASYNC_POOL_MIN / DB_ASYNC_POOL_MAX (DB_POOL_MAX 예산을 sync 풀과 나눠 씀, database.py)
+
+_pool = None
+_pool_lock = asyncio.Lock()
+_stats = {"acquires": 0, "wait_time_total": 0.0, "wait_time_max": 0.0}
+
+
+async def _init_connection(conn):
+    # jsonb 컬럼(apt_price_stats.dongs 등)을 psycopg2처럼 파이썬 객체로 받기
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+async def get_pool():
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await asyncpg.create_pool(
+                    host=os.getenv("DB_HOST"),
+                    database=os.getenv("DB_NAME"),
+                    user=os.getenv("DB_USER"),
+                    password=os.getenv("DB_PASS"),
+                    port=os.getenv("DB_PORT"),
+                    min_size=min(DB_ASYNC_POOL_MIN, DB_ASYNC_POOL_MAX),
+                    max_size=DB_ASYNC_POOL_MAX,
+                    init=_init_connection,
+                )
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+class _Acquire:
+    """풀에서 커넥션을 빌리는 데 걸린 시간을 재는 async with 래퍼"""
+
+    async def __aenter__(self):
+        pool = await get_pool()
+        started = time.monotonic()
+        self._conn = await pool.acquire(timeout=DB_POOL_TIMEOUT)
+        waited = time.monotonic() - started
+        _stats["acquires"] += 1
+        _stats["wait_time_total"] += waited
+        _stats["wait_time_max"] = max(_stats["wait_time_max"], waited)
+        self._pool = pool
+        return self._conn
+
+    async def __aexit__(self, *exc):
+        await self._pool.release(self._conn)
+
+
+def connection():
+    """async with database_async.connection() as conn: ..."""
+    return _Acquire()
+
+
+async def fetch(query, *args):
+    async with connection() as conn:
+        return [dict(row) for row in await conn.fetch(query, *args)]
+
+
+async def fetchrow(query, *args):
+    async with connection() as conn:
+        row = await conn.fetchrow(query, *args)
+        return dict(row) if row is not None else None
+
+
+def _positional(query, params: dict):
+    """psycopg2식 %(name)s 쿼리 → asyncpg식 $1, $2 ... 쿼리 + 인자 목록 (database.py의 쿼리를 그대로 쓰기 위함)"""
+    names = []
+
+    def replace(match):
+        if match.group(1) not in names:
+            names.append(match.group(1))
+        return f"${names.index(match.group(1)) + 1}"
+
+    return re.sub(r"%\((\w+)\)s", replace, query), [params[name] for name in names]
+
+
+def get_pool_stats():
+    if _pool is None:
+        return None
+    return {
+        "min": _pool.get_min_size(),
+        "max": _pool.get_max_size(),
+        "size": _pool.get_size(),
+        "idle": _pool.get_idle_size(),
+        "acquires": _stats["acquires"],
+        "wait_time_total": round(_stats["wait_time_total"], 4),
+        "wait_time_max": round(_stats["wait_time_max"], 4),
+    }
+
+
+# --- 정책 ---
+async def get_all_policies():
+    return await fetch("SELECT * FROM policies")
+
+
+async def get_all_policies_output():
+    return await fetch("SELECT * FROM policies_output")
+
+
+async def get_policy_output_by_id(policy_id: int):
+    return await fetchrow("SELECT * FROM policies_output WHERE policy_id = $1", policy_id)
+
+
+async def get_policy_outputs_by_ids(policy_ids, fields=None):
+    """여러 정책의 출력 정보를 쿼리 한 번으로 (policy_ids 순서 그대로, 없는 id는 빠짐, fields를 주면 그 컬럼만)"""
+    policy_ids = list(policy_ids)
+    if not policy_ids:
+        return []
+    return await fetch(f"""
+        SELECT {output_columns_sql(fields)} FROM policies_output
+        WHERE policy_id = ANY($1::int[])
+        ORDER BY array_position($1::int[], policy_id)
+    """, policy_ids)
+
+
+async def get_eligible_policy_outputs(user_info: dict, age: int, income_standard):
+    """database.get_eligible_policy_outputs의 async 버전 (같은 쿼리)"""
+    query, args = _positional(ELIGIBLE_POLICIES_SQL, eligibility_params(user_info, age, income_standard))
+    return await fetch(query, *args)
+
+
+# --- 사용자 ---
+async def get_user_info(user_id):
+    return await fetchrow("SELECT * FROM user_info WHERE user_id = $1", user_id)
+
+
+async def get_household_income_standard(household_size):
+    return await fetchrow("SELECT * FROM household_income_standard100 WHERE household_size = $1", household_size)
+
+
+# --- 즐겨찾기 ---
+async def get_my_favorite_ids(user_id):
+    try:
+        rows = await fetch("SELECT policy_id FROM favorites WHERE user_id = $1", user_id)
+        return [row['policy_id'] for row in rows]
+    except Exception as e:
+        print(f"내 즐겨찾기 목록 조회 에러: {e}")
+        return []
+
+
+async def toggle_favorite(user_id, policy_id: int):
+    try:
+        async with connection() as conn:
+            async with conn.transaction():
+                deleted = await conn.execute(
+                    "DELETE FROM favorites WHERE user_id = $1 AND policy_id = $2", user_id, policy_id
+                )
+                if deleted != "DELETE 0":
+                    return {"status": "removed", "isFavorite": False, "message": "즐겨찾기 해제"}
+
+                await conn.execute("INSERT INTO favorites (user_id, policy_id) VALUES ($1, $2)", user_id, policy_id)
+                return {"status": "added", "isFavorite": True, "message": "즐겨찾기 등록"}
+    except Exception as e:
+        print(f"즐겨찾기 토글 에러: {e}")
+        return None
+
+
+# --- 지역 ---
+async def get_region_code(sido, sigungu):
+    row = await fetchrow("SELECT code FROM region_code WHERE sido = $1 AND sigungu = $2", sido, sigungu)
+    return row['code']
+
+
+async def get_sido():
+    return await fetch("SELECT sido FROM region_code")
+
+
+async def get_sigungu(sido_name):
+    return await fetch("SELECT sigungu FROM region_code WHERE sido = $1", sido_name)
+
+
+# --- 아파트 실거래 (apt_trades / apt_price_stats) ---
+async def is_region_ingested(lawd_cd):
+    async with connection() as conn:
+        return await conn.fetchval("SELECT 1 FROM apt_trade_months WHERE lawd_cd = $1 LIMIT 1", lawd_cd) is not None
+
+
+async def get_apt_names(lawd_cd, since_ymd):
+    rows = await fetch("""
+        SELECT DISTINCT apt_name FROM apt_trades
+        WHERE lawd_cd = $1 AND deal_ymd >= $2
+        ORDER BY apt_name
+    """, lawd_cd, since_ymd)
+    return [row['apt_name'] for row in rows]
+
+
+async def get_apt_trades(lawd_cd, apt_name, since_ymd):
+    return await fetch("""
+        SELECT apt_dong, deal_amount, deal_ymd, deal_day, exclu_use_ar, floor
+        FROM apt_trades
+        WHERE lawd_cd = $1 AND apt_name = $2 AND deal_ymd >= $3
+          AND COALESCE(cdeal_type, '') <> 'O'
+    """, lawd_cd, apt_name, since_ymd)
+
+
+async def get_apt_price_stats(lawd_cd, apt_name, window_months):
+    return await fetchrow("""
+        SELECT as_of_ymd, reference_price, trade_count AS count, mean_amount AS mean, min_amount AS min,
+               p25_amount AS p25, median_amount AS median, p75_amount AS p75, max_amount AS max, dongs
+        FROM apt_price_stats
+        WHERE lawd_cd = $1 AND apt_name = $2 AND window_months = $3
+    """, lawd_cd, apt_name, window_months)
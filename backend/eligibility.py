@@ -0,0 +1,421 @@
+import numpy as np
+
+# 261018 정책 자격 판정 엔진
+# - policies 테이블 행들을 컬럼별 NumPy 배열로 들고 있다가, 사용자 1명에 대해 불리언 마스크 한 번으로 판정
+# - 판정 규칙은 예전 get_recommended_policies의 if ... continue 7개와 똑같음
+#   (0/NULL인 제한은 검사 안 함, house_owner_allowed가 NULL이면 무주택자만, income > 1000이면 절대 금액(만) 아니면 중위소득 %)
+
+INCOME_ABSOLUTE_THRESHOLD = 1000 # 이 값보다 크면 연 소득 상한(만), 이하이면 기준 중위소득 대비 %
+
+# 261018 income_rules 대상 유형 조건 (예전 main.py의 match policy_id 분기를 데이터로 옮긴 것)
+# - 규칙마다 req_newlywed / req_dual_income / req_no_house / min_children 컬럼으로 조건을 적어 둠 (기본값은 조건 없음)
+#   예: 100 '생애최초/2자녀' = req_no_house + min_children 2, 204 '신혼I형(매입)(맞벌이)' = req_dual_income
+# - 해당되는 규칙 중 priority가 가장 큰 것의 상한을 씀 (예: 100은 신혼부부 2 > 생애최초/2자녀 1 > 기본 0)
+#   priority가 같은 규칙이 여러 개 해당되면 그중 높은 상한
+# - target_type은 화면/관리용 이름이고 판정에는 쓰지 않음
+
+
+def _int_column(rows, key):
+    # 예전 코드에서 0과 NULL은 둘 다 '제한 없음'(falsy)이라서 NULL은 0으로 채움
+    return np.array([row[key] or 0 for row in rows], dtype=np.int64)
+
+
+def _bool_column(rows, key):
+    # NULL은 False (house_owner_allowed가 NULL이면 예전 코드처럼 무주택자만 허용)
+    return np.array([bool(row[key]) for row in rows], dtype=bool)
+
+
+def _resolve_limits(limits, income_standard):
+    """소득 상한 값 배열 → 연 소득 상한(만) 배열 (1000 이하는 기준 중위소득 대비 %로 보고 환산)"""
+    return np.where(limits > INCOME_ABSOLUTE_THRESHOLD, limits, limits * 12 * income_standard / 100)
+
+
+def profile_columns(user_infos, ages, income_standards):
+    """사용자 정보 dict 목록 → 판정에 쓰는 열 배열 dict (PolicyMatrix.eligible_matrix_columns 입력)"""
+    def column(key, dtype):
+        return np.array([user_info[key] or 0 for user_info in user_infos], dtype=dtype)
+
+    return {
+        "age": np.array(ages, dtype=np.int64),
+        "asset": column('asset', np.int64),
+        "child_count": column('child_count', np.int64),
+        "income": column('income', np.int64),
+        "is_newlywed": column('is_newlywed', bool),
+        "has_newborn": column('has_newborn', bool),
+        "is_house_owner": column('is_house_owner', bool),
+        "dual_income": np.array([bool(user_info.get('dual_income')) for user_info in user_infos], dtype=bool),
+        "income_standard": np.array(income_standards, dtype=np.int64),
+    }
+
+
+class IncomeRuleTable:
+    """
+    income_rules 테이블을 배열로 보관 (행 = 규칙 1개)
+    사용자 1명에 대해 해당되는 규칙 중 우선순위가 가장 높은 것의 상한을 정책별로 한 번에 계산
+    (예전 주석 처리된 match policy_id 분기 / 규칙 1개짜리 정책 처리와 같은 결과, tests/test_income_rules.py)
+    """
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.policy_ids, self.rule_policy = np.unique(
+            np.array([row['policy_id'] for row in rows], dtype=np.int64), return_inverse=True,
+        )
+        self.limit = _int_column(rows, 'income_limit')
+        self.req_newlywed = _bool_column(rows, 'req_newlywed')
+        self.req_dual_income = _bool_column(rows, 'req_dual_income')
+        self.req_no_house = _bool_column(rows, 'req_no_house')
+        self.min_children = _int_column(rows, 'min_children')
+        self.priority = _int_column(rows, 'priority')
+        # 여러 사용자를 한 번에 계산할 때(resolve_limits_columns) 정책별 구간 최댓값(reduceat)용 정렬 순서
+        self._order = np.argsort(self.rule_policy, kind='stable')
+        self._starts = np.searchsorted(self.rule_policy[self._order], np.arange(len(self.policy_ids)))
+
+    def __len__(self):
+        return len(self.limit)
+
+    def policy_index(self, policy_ids):
+        """정책 id 배열 → policy_ids 안의 위치 (규칙이 없는 정책은 -1)"""
+        policy_ids = np.asarray(policy_ids, dtype=np.int64)
+        index = np.searchsorted(self.policy_ids, policy_ids)
+        index = np.minimum(index, max(len(self.policy_ids) - 1, 0))
+        found = (self.policy_ids[index] == policy_ids) if len(self.policy_ids) else np.zeros(len(policy_ids), dtype=bool)
+        return np.where(found, index, -1)
+
+    def _applicable(self, is_newlywed, dual_income, is_house_owner, child_count):
+        """규칙별로 사용자에게 해당되는지 (값이 (사용자 수, 1) 열 배열이면 사용자 × 규칙)"""
+        return (
+            (~self.req_newlywed | is_newlywed)
+            & (~self.req_dual_income | dual_income)
+            & (~self.req_no_house | ~is_house_owner)
+            & (self.min_children <= child_count)
+        )
+
+    def resolve_limits(self, user_info: dict, income_standard):
+        """정책(self.policy_ids 순서)별 연 소득 상한(만). 해당되는 규칙이 하나도 없으면 -inf (자격 없음)"""
+        applicable = self._applicable(
+            np.bool_(bool(user_info['is_newlywed'])), np.bool_(bool(user_info.get('dual_income'))),
+            np.bool_(bool(user_info['is_house_owner'])), user_info['child_count'] or 0,
+        )
+
+        # 정책별로 해당되는 규칙의 가장 높은 우선순위 → 그 우선순위 규칙들의 상한 중 최댓값
+        top_priority = np.full(len(self.policy_ids), np.iinfo(np.int64).min)
+        np.maximum.at(top_priority, self.rule_policy[applicable], self.priority[applicable])
+        chosen = applicable & (self.priority == top_priority[self.rule_policy])
+
+        limits = np.full(len(self.policy_ids), -np.inf)
+        np.maximum.at(limits, self.rule_policy[chosen], _resolve_limits(self.limit[chosen], income_standard))
+        return limits
+
+    def resolve_limits_columns(self, columns):
+        """resolve_limits를 사용자 여러 명(profile_columns 열 배열)에 대해 한 번에 (사용자 × 정책 행렬)"""
+        order, starts = self._order, self._starts
+        applicable = self._applicable(
+            columns['is_newlywed'][:, None], columns['dual_income'][:, None],
+            columns['is_house_owner'][:, None], columns['child_count'][:, None],
+        )[:, order]
+        priority = self.priority[order]
+
+        top_priority = np.maximum.reduceat(np.where(applicable, priority, np.iinfo(np.int64).min), starts, axis=1)
+        chosen = applicable & (priority == top_priority[:, self.rule_policy[order]])
+        values = np.where(
+            chosen,
+            _resolve_limits(self.limit[order], columns['income_standard'][:, None]),
+            -np.inf,
+        )
+        return np.maximum.reduceat(values, starts, axis=1)
+
+
+class PolicyMatrix:
+    """policies 테이블을 열 단위 배열로 보관 (행 = 정책 조건 1줄, 같은 policy_id가 여러 줄일 수 있음)"""
+
+    _COLUMNS = (
+        "policy_id", "min_age", "max_age", "asset_limit", "req_newlywed", "req_newborn",
+        "house_owner_allowed", "min_children", "income",
+    )
+
+    def __init__(self, rows, income_rules=None):
+        self.policy_id = np.array([row['policy_id'] for row in rows], dtype=np.int64)
+        self.min_age = _int_column(rows, 'min_age')
+        self.max_age = _int_column(rows, 'max_age')
+        self.asset_limit = _int_column(rows, 'asset_limit')
+        self.req_newlywed = _bool_column(rows, 'req_newlywed')
+        self.req_newborn = _bool_column(rows, 'req_newborn')
+        self.house_owner_allowed = _bool_column(rows, 'house_owner_allowed')
+        self.min_children = _int_column(rows, 'min_children')
+        self.income = _int_column(rows, 'income')
+        # income_rules에 규칙이 있는 정책은 조건 7을 policies.income 대신 규칙으로 판정
+        self.income_rules = income_rules if income_rules is not None and len(income_rules) else None
+        self.rule_index = self.income_rules.policy_index(self.policy_id) if self.income_rules else None
+
+    def __len__(self):
+        return len(self.policy_id)
+
+    def take(self, mask):
+        """마스크에 해당하는 정책 조건 줄만 남긴 새 PolicyMatrix (예: 정책 1개만)"""
+        matrix = object.__new__(PolicyMatrix)
+        for name in self._COLUMNS:
+            setattr(matrix, name, getattr(self, name)[mask])
+        matrix.income_rules = self.income_rules
+        matrix.rule_index = self.rule_index[mask] if self.rule_index is not None else None
+        return matrix
+
+    def income_limits(self, income_standard, user_info: dict = None):
+        """
+        정책 행별 연 소득 상한(만). income_standard: 우리 가구 수 기준 중위소득 100% 월 소득
+        user_info를 주면 income_rules 규칙이 있는 정책은 사용자에게 해당되는 대상 유형의 상한으로 바꿈
+        """
+        limits = _resolve_limits(self.income, income_standard)
+        if user_info is None or self.income_rules is None:
+            return limits
+
+        rule_limits = self.income_rules.resolve_limits(user_info, income_standard)
+        has_rule = self.rule_index >= 0
+        return np.where(has_rule, rule_limits[np.maximum(self.rule_index, 0)], limits)
+
+    def _eligible(self, profile, income_limits):
+        """
+        조건 7개를 한 번에 판정. profile의 값이 스칼라면 사용자 1명(정책 행 마스크),
+        (사용자 수, 1) 열 배열이면 사용자 × 정책 행 마스크 (브로드캐스팅)
+        """
+        age, asset, child_count, income = profile['age'], profile['asset'], profile['child_count'], profile['income']
+
+        return (
+            # 조건 1: 나이 (0이면 제한 없음)
+            ((self.min_age == 0) | (age >= self.min_age))
+            & ((self.max_age == 0) | (age <= self.max_age))
+            # 조건 2: 자산
+            & ((self.asset_limit == 0) | (asset <= self.asset_limit))
+            # 조건 3, 4: 신혼부부 / 신생아 요구
+            & (~self.req_newlywed | profile['is_newlywed'])
+            & (~self.req_newborn | profile['has_newborn'])
+            # 조건 5: 무주택자 전용
+            & (self.house_owner_allowed | ~profile['is_house_owner'])
+            # 조건 6: 자녀 수
+            & ((self.min_children == 0) | (child_count >= self.min_children))
+            # 조건 7: 소득
+            & (income_limits >= income)
+        )
+
+    @staticmethod
+    def _profile(user_info: dict, age: int):
+        return {
+            "age": age,
+            "asset": user_info['asset'] or 0,
+            "child_count": user_info['child_count'] or 0,
+            "income": user_info['income'] or 0,
+            "is_newlywed": np.bool_(bool(user_info['is_newlywed'])),
+            "has_newborn": np.bool_(bool(user_info['has_newborn'])),
+            "is_house_owner": np.bool_(bool(user_info['is_house_owner'])),
+        }
+
+    def eligible_mask(self, user_info: dict, age: int, income_standard):
+        """사용자 1명에 대해 자격이 되는 정책 행의 마스크"""
+        return self._eligible(self._profile(user_info, age), self.income_limits(income_standard, user_info))
+
+    def income_asset_bounds(self, user_info: dict, age: int, income_standard):
+        """
+        소득/자산만 바꿔 볼 때의 판정 경계 (나머지 조건은 사용자 정보 그대로)
+        → (소득·자산 외 조건을 통과하는 정책 행 마스크, 행별 연 소득 상한(만), 행별 자산 상한(만, 제한 없으면 inf))
+        행 i는 소득 <= 소득 상한[i], 자산 <= 자산 상한[i]이면 통과 (소득 × 자산 평면의 직사각형)
+        """
+        profile = {**self._profile(user_info, age), "asset": -np.inf, "income": -np.inf}
+        income_limits = self.income_limits(income_standard, user_info)
+        # 해당 대상 유형 규칙이 없으면 상한이 -inf (어떤 소득이어도 탈락)
+        mask = self._eligible(profile, income_limits) & (income_limits > -np.inf)
+        asset_limits = np.where(self.asset_limit == 0, np.inf, self.asset_limit)
+        return mask, income_limits, asset_limits
+
+    def income_asset_sweep(self, user_info: dict, age: int, income_standard):
+        """
+        정책별로 소득/자산을 바꿨을 때 자격이 켜지고 꺼지는 경계
+        - max_income: 지금 자산 그대로일 때 자격이 유지되는 최대 연 소득 (없으면 -inf)
+        - max_asset: 지금 소득 그대로일 때 자격이 유지되는 최대 자산 (제한 없으면 inf, 없으면 -inf)
+        - regions: 자격이 되는 (최대 소득, 최대 자산) 직사각형 목록 (다른 줄에 포함되는 줄은 뺌)
+        """
+        mask, income_limits, asset_limits = self.income_asset_bounds(user_info, age, income_standard)
+        if not mask.any():
+            return []
+
+        asset, income = user_info['asset'] or 0, user_info['income'] or 0
+        # 정책 id 순으로 줄을 세워서 정책마다 조건 줄 중 최댓값 (eligible_policy_ids_many와 같은 방식)
+        order = np.argsort(self.policy_id[mask], kind='stable')
+        policy_ids = self.policy_id[mask][order]
+        income_limits, asset_limits = income_limits[mask][order], asset_limits[mask][order]
+        unique_ids, starts = np.unique(policy_ids, return_index=True)
+
+        max_income = np.maximum.reduceat(np.where(asset <= asset_limits, income_limits, -np.inf), starts)
+        max_asset = np.maximum.reduceat(np.where(income <= income_limits, asset_limits, -np.inf), starts)
+
+        sweep = []
+        for i, policy_id in enumerate(unique_ids.tolist()):
+            end = starts[i + 1] if i + 1 < len(starts) else len(policy_ids)
+            regions = []
+            # 소득 상한이 큰 줄부터 보면서 자산 상한이 앞의 줄보다 커야 새 영역
+            for row in sorted(range(starts[i], end), key=lambda row: (-income_limits[row], -asset_limits[row])):
+                if not regions or asset_limits[row] > regions[-1][1]:
+                    regions.append((float(income_limits[row]), float(asset_limits[row])))
+            sweep.append({
+                "policy_id": policy_id,
+                "max_income": float(max_income[i]),
+                "max_asset": float(max_asset[i]),
+                "regions": regions,
+            })
+        return sweep
+
+    def eligible_matrix(self, user_infos, ages, income_standards):
+        """사용자 여러 명 × 정책 행 마스크를 한 번에 (행 = 사용자, 열 = 정책 조건 줄)"""
+        return self.eligible_matrix_columns(profile_columns(user_infos, ages, income_standards))
+
+    def eligible_matrix_columns(self, columns):
+        """eligible_matrix와 같은데 사용자 정보를 열 배열 dict(profile_columns)로 받음 (대량 판정용)"""
+        profile = {key: values[:, None] for key, values in columns.items()}
+
+        income_limits = _resolve_limits(self.income, profile['income_standard'])
+        if self.income_rules is not None:
+            rule_limits = self.income_rules.resolve_limits_columns(columns)
+            income_limits = np.where(self.rule_index >= 0, rule_limits[:, np.maximum(self.rule_index, 0)], income_limits)
+
+        return self._eligible(profile, income_limits)
+
+    def eligible_policy_ids(self, user_info: dict, age: int, income_standard):
+        """자격이 되는 정책 id 목록 (중복 제거, 오름차순)"""
+        return np.unique(self.policy_id[self.eligible_mask(user_info, age, income_standard)]).tolist()
+
+    def eligible_policy_ids_many(self, user_infos, ages, income_standards):
+        """사용자별 자격이 되는 정책 id 목록 (eligible_matrix 한 번으로)"""
+        masks = self.eligible_matrix(user_infos, ages, income_standards)
+        if not len(self.policy_id):
+            return [[] for _ in user_infos]
+
+        # 정책 id 순으로 줄을 세워서, 조건 줄 중 하나라도 통과한 정책을 (사용자 × 정책) 행렬로
+        order = np.argsort(self.policy_id, kind='stable')
+        unique_ids, starts = np.unique(self.policy_id[order], return_index=True)
+        eligible = np.logical_or.reduceat(masks[:, order], starts, axis=1)
+        return [unique_ids[row].tolist() for row in eligible]
+
+
+# 261018 비트셋 역색인 (RECOMMEND_ENGINE=index)
+# - PolicyMatrix.eligible_mask는 조건 배열 전체를 훑음 (정책 수에 비례). 정책이 수만~수십만 줄이면 이쪽
+# - 정책 행 하나 = 비트 하나 (uint64 워드 배열)
+# - 불리언 조건(신혼부부/신생아/무주택/생애최초): 미리 만든 비트셋을 골라서 AND
+# - 범위 조건(나이/자산/자녀 수/소득): 값으로 정렬해둔 행 순서에서 이진 탐색 → '앞에서 k개'가 통과
+#   앞에서 k개의 비트셋은 STEP개마다 미리 누적해둔 비트셋 + 나머지(STEP개 미만)만 비트를 켬
+# - income_rules 규칙이 있는 정책 행은 사용자마다 상한이 달라서 따로 계산해서 OR
+# 결과는 PolicyMatrix.eligible_mask와 같음 (bench_policy_index.py에서 확인)
+
+INDEX_CHECKPOINTS = 256 # 범위 조건마다 미리 누적해둘 비트셋 수 (메모리: 조건당 약 INDEX_CHECKPOINTS * 행 수 / 8 바이트)
+
+
+def _set_bits(words, rows):
+    np.bitwise_or.at(words, rows >> 6, np.left_shift(np.uint64(1), (rows & 63).astype(np.uint64)))
+    return words
+
+
+class _PrefixBitsets:
+    """값으로 정렬된 행 순서에서 '앞에서 k개' 행의 비트셋을 빠르게 만듦"""
+
+    def __init__(self, values, n_words, descending=False, rows=None):
+        """values: 행별 값 / rows: values가 일부 행의 값이면 그 행 번호 (없으면 0..n-1)"""
+        order = np.argsort(-values if descending else values, kind='stable')
+        self.sorted_values = values[order]
+        self.order = (order if rows is None else rows[order]).astype(np.int64)
+        self.descending = descending
+        self.step = max(1, -(-len(values) // INDEX_CHECKPOINTS))
+
+        checkpoints = np.zeros((len(values) // self.step + 1, n_words), dtype=np.uint64)
+        for k in range(1, len(checkpoints)):
+            checkpoints[k] = checkpoints[k - 1]
+            _set_bits(checkpoints[k], self.order[(k - 1) * self.step:k * self.step])
+        self.checkpoints = checkpoints
+
+    def count_at_most(self, value):
+        """오름차순: 값 <= value인 행 수 / 내림차순: 값 >= value인 행 수"""
+        if self.descending:
+            return len(self.sorted_values) - np.searchsorted(self.sorted_values[::-1], value, side='left')
+        return np.searchsorted(self.sorted_values, value, side='right')
+
+    def prefix(self, count):
+        k = count // self.step
+        words = self.checkpoints[k].copy()
+        return _set_bits(words, self.order[k * self.step:count])
+
+
+class PolicyBitsetIndex:
+    """PolicyMatrix(같은 카탈로그 스냅샷)로 만드는 비트셋 색인. 만든 뒤에는 고치지 않음"""
+
+    def __init__(self, matrix: PolicyMatrix):
+        self.matrix = matrix
+        n = len(matrix)
+        self.n_words = -(-n // 64)
+        all_rows = np.arange(n, dtype=np.int64)
+
+        def bits(mask):
+            return _set_bits(np.zeros(self.n_words, dtype=np.uint64), all_rows[mask])
+
+        self.all = bits(np.ones(n, dtype=bool))
+        self.no_newlywed_required = bits(~matrix.req_newlywed)
+        self.no_newborn_required = bits(~matrix.req_newborn)
+        self.house_owner_allowed = bits(matrix.house_owner_allowed)
+
+        # 0은 제한 없음 → 하한은 0 그대로(누구나 통과), 상한은 무한대로 보고 정렬
+        no_limit = np.iinfo(np.int64).max
+        self.min_age = _PrefixBitsets(matrix.min_age, self.n_words)
+        self.max_age = _PrefixBitsets(np.where(matrix.max_age == 0, no_limit, matrix.max_age), self.n_words, descending=True)
+        self.asset = _PrefixBitsets(np.where(matrix.asset_limit == 0, no_limit, matrix.asset_limit), self.n_words, descending=True)
+        self.children = _PrefixBitsets(matrix.min_children, self.n_words)
+
+        # 소득: 규칙이 없는 행만 색인 (절대 금액 행 / 중위소득 % 행을 따로 정렬)
+        has_rule = matrix.rule_index >= 0 if matrix.income_rules is not None else np.zeros(n, dtype=bool)
+        self.rule_rows = all_rows[has_rule]
+        absolute = ~has_rule & (matrix.income > INCOME_ABSOLUTE_THRESHOLD)
+        percent = ~has_rule & ~absolute
+        self.income_absolute = _PrefixBitsets(matrix.income[absolute], self.n_words, descending=True, rows=all_rows[absolute])
+        self.income_percent = _PrefixBitsets(matrix.income[percent], self.n_words, descending=True, rows=all_rows[percent])
+
+    def _income_bits(self, user_info: dict, income_standard, income):
+        words = self.income_absolute.prefix(self.income_absolute.count_at_most(income))
+
+        # % 행: income * 12 * 기준 / 100 >= 사용자 소득 ⇔ income >= 사용자 소득 * 100 / (12 * 기준)
+        # 나눗셈 오차로 경계가 한 칸 어긋날 수 있어서 PolicyMatrix와 같은 식으로 경계만 다시 확인
+        percent = self.income_percent
+        values = percent.sorted_values # 내림차순
+        count = percent.count_at_most(income * 100 / (12 * income_standard)) if income_standard else (
+            len(values) if income <= 0 else 0)
+        while count < len(values) and values[count] * 12 * income_standard / 100 >= income:
+            count += 1
+        while count > 0 and values[count - 1] * 12 * income_standard / 100 < income:
+            count -= 1
+        words |= percent.prefix(count)
+
+        if len(self.rule_rows):
+            rule_limits = self.matrix.income_rules.resolve_limits(user_info, income_standard)
+            limits = rule_limits[self.matrix.rule_index[self.rule_rows]]
+            _set_bits(words, self.rule_rows[limits >= income])
+        return words
+
+    def eligible_bits(self, user_info: dict, age: int, income_standard):
+        asset = user_info['asset'] or 0
+        child_count = user_info['child_count'] or 0
+        income = user_info['income'] or 0
+        is_house_owner = bool(user_info['is_house_owner'])
+
+        words = self.min_age.prefix(self.min_age.count_at_most(age))
+        words &= self.max_age.prefix(self.max_age.count_at_most(age))
+        words &= self.asset.prefix(self.asset.count_at_most(asset))
+        words &= self.children.prefix(self.children.count_at_most(child_count))
+        if not user_info['is_newlywed']:
+            words &= self.no_newlywed_required
+        if not user_info['has_newborn']:
+            words &= self.no_newborn_required
+        if is_house_owner:
+            words &= self.house_owner_allowed
+        words &= self._income_bits(user_info, income_standard, income)
+        return words
+
+    def eligible_mask(self, user_info: dict, age: int, income_standard):
+        words = self.eligible_bits(user_info, age, income_standard)
+        return np.unpackbits(words.view(np.uint8), bitorder='little')[:len(self.matrix)].astype(bool)
+
+    def eligible_policy_ids(self, user_info: dict, age: int, income_standard):
+        """자격이 되는 정책 id 목록 (중복 제거, 오름차순) - PolicyMatrix.eligible_policy_ids와 같음"""
+        return np.unique(self.matrix.policy_id[self.eligible_mask(user_info, age, income_standard)]).tolist()
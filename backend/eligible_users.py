@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+import time
+from datetime import date
+import numpy as np
+import database as db
+import catalog
+
+# 261018 정책 → 자격 있는 사용자 역조회 (GET /api/admin/policies/{policy_id}/eligible-users, 아래 CLI)
+# 실행 예: python eligible_users.py 12 --output users_12.txt
+# - 사용자마다 추천 판정을 돌리는 대신, 정책 1개의 조건 줄(PolicyMatrix.take)에
+#   user_info를 USER_SCAN_CHUNK줄씩 열 배열로 읽어 한 번에 판정 (eligible_matrix_columns)
+# - 판정 규칙은 추천과 같은 PolicyMatrix를 쓰므로 /policies/recommended 결과와 일치함
+
+USER_SCAN_CHUNK = int(os.getenv("USER_SCAN_CHUNK", "50000"))
+
+
+def _ages(birth_year, birth_month, birth_day, today: date):
+    """calculate_age의 배열 버전 (생년월일이 없으면 0)"""
+    ages = today.year - birth_year - ((today.month * 100 + today.day) < (birth_month * 100 + birth_day))
+    return np.where(birth_year > 0, ages, 0)
+
+
+def profile_columns_from_rows(rows, today: date):
+    """db.iter_user_profile_rows의 튜플 목록 → (user_id 배열, profile_columns 형식의 열 배열 dict)"""
+    (user_ids, birth_year, birth_month, birth_day, asset, child_count, income,
+     is_newlywed, has_newborn, is_house_owner, dual_income, income_standard) = zip(*rows)
+
+    def column(values, dtype):
+        return np.array(values, dtype=dtype)
+
+    return np.array(user_ids, dtype=object), {
+        "age": _ages(column(birth_year, np.int64), column(birth_month, np.int64), column(birth_day, np.int64), today),
+        "asset": column(asset, np.int64),
+        "child_count": column(child_count, np.int64),
+        "income": column(income, np.int64),
+        "is_newlywed": column(is_newlywed, bool),
+        "has_newborn": column(has_newborn, bool),
+        "is_house_owner": column(is_house_owner, bool),
+        "dual_income": column(dual_income, bool),
+        "income_standard": column(income_standard, np.int64),
+    }
+
+
+def iter_eligible_user_ids(matrix, policy_id: int, chunk_size=USER_SCAN_CHUNK):
+    """정책 policy_id의 자격이 되는 user_id(문자열)를 user_info를 훑으면서 차례로 내보냄"""
+    policy = matrix.take(matrix.policy_id == policy_id)
+    if len(policy) == 0:
+        return
+
+    today = date.today()
+    for rows in db.iter_user_profile_rows(chunk_size):
+        user_ids, columns = profile_columns_from_rows(rows, today)
+        # 조건 줄이 여러 개면 하나라도 맞으면 자격 있음 (추천과 동일)
+        yield from user_ids[policy.eligible_matrix_columns(columns).any(axis=1)].tolist()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="정책 하나에 자격이 되는 사용자 id 목록 뽑기")
+    parser.add_argument("policy_id", type=int, help="정책 id")
+    parser.add_argument("--output", help="결과 파일 (없으면 표준 출력)")
+    parser.add_argument("--chunk-size", type=int, default=USER_SCAN_CHUNK, help="한 번에 읽어서 판정할 사용자 수")
+    args = parser.parse_args()
+
+    policy_catalog = catalog.get()
+    if args.policy_id not in policy_catalog.outputs_by_id:
+        sys.exit(f"⚠️ 정책 {args.policy_id}이(가) 카탈로그에 없습니다.")
+
+    started = time.time()
+    count = 0
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for user_id in iter_eligible_user_ids(policy_catalog.matrix, args.policy_id, args.chunk_size):
+            out.write(user_id + "\n")
+            count += 1
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"✅ 정책 {args.policy_id}: 자격 있는 사용자 {count}명 ({time.time() - started:.1f}초)", file=sys.stderr)
@@ -0,0 +1,129 @@
+import os
+import sys
+import threading
+import time
+import database as db
+import openapi as oa
+from trade_batch import parse_float, parse_int
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 261018 국토부 실거래 → apt_trades 증분 적재 작업
+# 실행: python ingest_trades.py [개월 수]
+# (서버에서 주기적으로 돌리려면 .env에 TRADE_INGEST_INTERVAL(초)을 넣으면 main.py가 백그라운드로 실행함)
+
+INGEST_MONTHS = int(os.getenv("TRADE_INGEST_MONTHS", "12"))
+# 열린 달(이번 달/지난달)은 이 시간(초)이 지나야 다시 받음. API 일일 호출 한도 보호용
+OPEN_MONTH_REFRESH = int(os.getenv("TRADE_INGEST_OPEN_REFRESH", "21600"))
+# 아파트별 거래가 통계(apt_price_stats)를 미리 계산해둘 기간(개월). main.py의 TRADE_WINDOW_MONTHS가 들어 있어야 상세 추천이 키 조회로 끝남
+PRICE_STATS_WINDOWS = [int(w) for w in os.getenv("PRICE_STATS_WINDOWS", "3,6,12").split(",") if w.strip()]
+
+
+def _to_str(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def to_trade_row(item: dict):
+    """국토부 응답 item(dict) 하나를 apt_trades 행으로 변환. 이름/금액이 없으면 None."""
+    apt_name = _to_str(item.get('aptNm'))
+    deal_amount = parse_int(item.get('dealAmount'))
+    if not apt_name or deal_amount is None:
+        return None
+
+    return {
+        'apt_name': apt_name,
+        'apt_dong': _to_str(item.get('aptDong')),
+        'umd_nm': _to_str(item.get('umdNm')),
+        'deal_amount': deal_amount, # 단위(만)
+        'deal_day': parse_int(item.get('dealDay')),
+        'exclu_use_ar': parse_float(item.get('excluUseAr')),
+        'floor': parse_int(item.get('floor')),
+        'build_year': parse_int(item.get('buildYear')),
+        'cdeal_type': _to_str(item.get('cdealType')),
+    }
+
+
+def months_to_fetch(lawd_cd, months=INGEST_MONTHS):
+    """아직 안 받은 달 + 다시 받을 때가 된 열린 달만 골라냄"""
+    ingested = db.get_ingested_months(lawd_cd)
+    targets = []
+
+    for deal_ymd in oa.recent_deal_ymds(months):
+        if deal_ymd not in ingested:
+            targets.append(deal_ymd)
+        elif oa.is_open_month(deal_ymd) and ingested[deal_ymd] >= OPEN_MONTH_REFRESH:
+            targets.append(deal_ymd)
+
+    return targets
+
+
+def ingest_region(lawd_cd, months=INGEST_MONTHS):
+    """한 지역의 필요한 달만 받아서 적재. 적재한 달 수를 반환."""
+    ingested_count = 0
+
+    for deal_ymd in months_to_fetch(lawd_cd, months):
+        # 페이지가 도착하는 대로 행으로 바꿔서 바로 INSERT (한 달치를 리스트로 모으지 않음)
+        # 중간에 API가 실패하면 replace_apt_trades가 롤백하고 이력도 안 남김 → 다음 실행 때 다시 시도
+        rows = (row for row in map(to_trade_row, oa.iter_month_apt_trades(lawd_cd, deal_ymd)) if row is not None)
+        if db.replace_apt_trades(lawd_cd, deal_ymd, rows):
+            ingested_count += 1
+
+    # 새 달이 들어왔거나, 달이 바뀌어서 통계 기간이 밀렸으면 이 지역 통계만 다시 계산
+    if ingested_count or db.get_price_stats_as_of(lawd_cd) != oa.recent_deal_ymds(1)[0]:
+        rebuild_price_stats(lawd_cd)
+
+    return ingested_count
+
+
+def rebuild_price_stats(lawd_cd):
+    """한 지역의 apt_price_stats를 PRICE_STATS_WINDOWS 기간별로 다시 계산"""
+    deal_ymds = oa.recent_deal_ymds(max(PRICE_STATS_WINDOWS))
+    windows = [(window, deal_ymds[window - 1]) for window in PRICE_STATS_WINDOWS]
+    return db.rebuild_apt_price_stats(lawd_cd, windows, deal_ymds[0])
+
+
+def ingest_all(months=INGEST_MONTHS):
+    """region_code의 모든 시/군/구를 돌면서 증분 적재"""
+    started = time.time()
+    codes = db.get_all_region_codes()
+    print(f"--- [실거래 적재 시작] 지역 {len(codes)}곳, 최근 {months}개월 ---")
+
+    total = 0
+    for lawd_cd in codes:
+        try:
+            total += ingest_region(lawd_cd, months)
+        except Exception as e:
+            print(f"⚠️ 지역 {lawd_cd} 적재 중 에러: {e}")
+
+    print(f"✅ 실거래 적재 완료: {total}개월분 갱신 ({time.time() - started:.1f}초)")
+    return total
+
+
+_scheduler_lock = threading.Lock()
+_scheduler_thread = None
+
+
+def start_scheduler(interval_sec, months=INGEST_MONTHS):
+    """interval_sec마다 ingest_all을 도는 데몬 스레드 시작 (프로세스당 1개)"""
+    global _scheduler_thread
+
+    def run():
+        while True:
+            try:
+                ingest_all(months)
+            except Exception as e:
+                print(f"❌ 실거래 적재 작업 에러: {e}")
+            time.sleep(interval_sec)
+
+    with _scheduler_lock:
+        if _scheduler_thread is None:
+            _scheduler_thread = threading.Thread(target=run, name="trade-ingest", daemon=True)
+            _scheduler_thread.start()
+
+
+if __name__ == "__main__":
+    ingest_all(int(sys.argv[1]) if len(sys.argv) > 1 else INGEST_MONTHS)
@@ -2,6 +2,23 @@ import pandas as pd
 from database import get_db_connection
 import os
 
+INCOME_RULE_CONDITION_COLUMNS = (
+    "req_newlywed BOOLEAN NOT NULL DEFAULT FALSE",
+    "req_dual_income BOOLEAN NOT NULL DEFAULT FALSE",
+    "req_no_house BOOLEAN NOT NULL DEFAULT FALSE",
+    "min_children INT NOT NULL DEFAULT 0",
+    "priority INT NOT NULL DEFAULT 0",
+)
+
+# 예전 main.py의 match policy_id 분기 (database/seed.sql의 UPDATE와 같음)
+INCOME_RULE_CONDITIONS = (
+    (100, '신혼부부', {"req_newlywed": True, "priority": 2}),
+    (100, '생애최초/2자녀', {"req_no_house": True, "min_children": 2, "priority": 1}),
+    (101, '맞벌이(예정)', {"req_dual_income": True, "priority": 1}),
+    (204, '신혼I형(매입)(맞벌이)', {"req_dual_income": True, "priority": 1}),
+    (401, '신혼II형(매입)(맞벌이)', {"req_dual_income": True, "priority": 1}),
+)
+
 def init_db():
     """서버 시작 시 CSV 파일의 컬럼명과 일치하게 테이블을 생성하고 데이터를 입력함"""
     conn = get_db_connection()
@@ -113,6 +130,10 @@ def init_db():
                 is_first BOOLEAN
             );
         """)
+        # 261018 SQL 자격 판정(database.ELIGIBLE_POLICIES_SQL)용 인덱스 (policy_id는 schema.sql의 PK 인덱스를 씀)
+        cursor.execute("CREATE INDEX IF NOT EXISTS policies_age_idx ON policies (min_age, max_age);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS policies_asset_limit_idx ON policies (asset_limit);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS policies_income_idx ON policies (income);")
 
         # 지역 코드 테이블 (지역코드.csv 기준)
         cursor.execute("""
@@ -132,6 +153,95 @@ def init_db():
             );
         """)
 
+        # 정책별 대상 유형(target_type) 소득 제한 규칙 (eligibility.IncomeRuleTable)
+        # 규칙이 있는 정책은 policies.income 대신 이 규칙으로 소득 조건을 판정함
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS income_rules (
+                rule_id SERIAL PRIMARY KEY,
+                policy_id INT NOT NULL REFERENCES policies_output(policy_id) ON DELETE CASCADE,
+                target_type VARCHAR(100),
+                income_limit BIGINT
+            );
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS income_rules_policy_idx ON income_rules (policy_id);")
+
+        # 261018 대상 유형 조건 컬럼 (예전 main.py의 match policy_id 분기를 데이터로). 기본값은 조건 없음 / 우선순위 0
+        # 컬럼이 없던 DB는 추가하면서 예전 분기에 있던 규칙만 한 번 채움 (새 DB는 database/seed.sql이 채움)
+        cursor.execute("""
+            SELECT 1 FROM information_schema.columns WHERE table_name = 'income_rules' AND column_name = 'priority'
+        """)
+        needs_rule_conditions = cursor.fetchone() is None
+        for column in INCOME_RULE_CONDITION_COLUMNS:
+            cursor.execute(f"ALTER TABLE income_rules ADD COLUMN IF NOT EXISTS {column};")
+        if needs_rule_conditions:
+            for policy_id, target_type, conditions in INCOME_RULE_CONDITIONS:
+                cursor.execute(
+                    "UPDATE income_rules SET " + ", ".join(f"{name} = %s" for name in conditions)
+                    + " WHERE policy_id = %s AND target_type = %s",
+                    (*conditions.values(), policy_id, target_type),
+                )
+
+        # 아파트 실거래 적재 테이블 (ingest_trades.py가 채움)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS apt_trades (
+                trade_id BIGSERIAL PRIMARY KEY,
+                lawd_cd CHAR(5) NOT NULL,
+                deal_ymd CHAR(6) NOT NULL,
+                deal_day SMALLINT,
+                apt_name VARCHAR(100) NOT NULL,
+                apt_dong VARCHAR(50),
+                umd_nm VARCHAR(50),
+                deal_amount BIGINT NOT NULL,
+                exclu_use_ar NUMERIC(8, 2),
+                floor SMALLINT,
+                build_year SMALLINT,
+                cdeal_type VARCHAR(5)
+            );
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS apt_trades_lookup_idx ON apt_trades (lawd_cd, apt_name, deal_ymd);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS apt_trades_month_idx ON apt_trades (lawd_cd, deal_ymd);")
+
+        # 지역/계약월별 적재 이력 (증분 적재 기준)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS apt_trade_months (
+                lawd_cd CHAR(5) NOT NULL,
+                deal_ymd CHAR(6) NOT NULL,
+                trade_count INT NOT NULL,
+                fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (lawd_cd, deal_ymd)
+            );
+        """)
+
+        # 아파트별 거래가 통계 (적재 후 ingest_trades.py가 지역 단위로 다시 계산, 상세 추천은 키 조회만)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS apt_price_stats (
+                lawd_cd CHAR(5) NOT NULL,
+                apt_name VARCHAR(100) NOT NULL,
+                window_months SMALLINT NOT NULL,
+                as_of_ymd CHAR(6) NOT NULL,
+                trade_count INT NOT NULL,
+                mean_amount DOUBLE PRECISION NOT NULL,
+                min_amount BIGINT NOT NULL,
+                p25_amount DOUBLE PRECISION NOT NULL,
+                median_amount DOUBLE PRECISION NOT NULL,
+                p75_amount DOUBLE PRECISION NOT NULL,
+                max_amount BIGINT NOT NULL,
+                reference_price DOUBLE PRECISION NOT NULL,
+                dongs JSONB NOT NULL,
+                built_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (lawd_cd, apt_name, window_months)
+            );
+        """)
+
+        # 지역별 통계 계산 기준월 (거래가 없어 apt_price_stats 행이 없는 지역도 계산했다는 기록)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS apt_price_stats_regions (
+                lawd_cd CHAR(5) PRIMARY KEY,
+                as_of_ymd CHAR(6) NOT NULL,
+                built_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+
         conn.commit()
         print("✅ 모든 테이블 구조 생성 및 확인 완료 (CSV 컬럼명 동기화)")
 
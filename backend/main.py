@@ -1,21 +1,32 @@
 from fastapi import APIRouter, FastAPI, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse, RedirectResponse
-from requests import Session
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from starlette.middleware.sessions import SessionMiddleware # 세션 관리 도구
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import database as db
+import database_async as adb
 from database import init_db
 from pydantic import BaseModel, Field
 from datetime import date
 import openapi as oa
+import ingest_trades
+from trade_batch import TradeBatch
+import catalog
+import recommend_cache
+import regions
+import ranking
+import eligible_users
 from collections import OrderedDict, defaultdict # 상단에 import 필요
+from contextlib import asynccontextmanager
 import numpy as np
 import secrets # 파이썬 내장 라이브러리 (랜덤 문자열 생성용)
 import httpx
 import os
+import json
+import hashlib
 from dotenv import load_dotenv
 import sys
 
@@ -32,6 +43,12 @@ async def csrf_verifier(request: Request):
     # GET, HEAD, OPTIONS, TRACE 요청은 상태를 변경하지 않으므로 CSRF 검증을 건너뜁니다.
     if request.method in ["GET", "HEAD", "OPTIONS", "TRACE"]:
         return
+    # 관리자 API는 쿠키가 아니라 X-Admin-Key 헤더로 인증하므로 CSRF 대상이 아님 (require_admin에서 확인)
+    if request.url.path.startswith("/api/admin/"):
+        return
+    # 제휴 기관 일괄 추천도 X-Partner-Key 헤더로 인증 (require_partner)
+    if request.url.path == "/api/policies/recommend/batch":
+        return
 
     csrf_token_cookie = request.cookies.get("csrf_token")
     csrf_token_header = request.headers.get("x-csrf-token")
@@ -40,7 +57,83 @@ async def csrf_verifier(request: Request):
         raise HTTPException(status_code=403, detail="CSRF token verification failed")
 # --- CSRF Protection End ---
 
-app = FastAPI(dependencies=[Depends(csrf_verifier)])
+# --- Admin API Key ---
+# 관리자용 API(/api/admin/...)는 세션 대신 X-Admin-Key 헤더로 확인합니다. (.env의 ADMIN_API_KEY)
+def require_admin(request: Request):
+    admin_key = os.getenv("ADMIN_API_KEY")
+    request_key = request.headers.get("x-admin-key")
+
+    if not admin_key or not request_key or not secrets.compare_digest(admin_key, request_key):
+        raise HTTPException(status_code=403, detail="관리자 권한이 필요합니다.")
+# --- Admin API Key End ---
+
+# --- Partner API Key ---
+# 상담 기관(제휴사)용 API는 X-Partner-Key 헤더로 확인합니다. (.env의 PARTNER_API_KEYS, 콤마로 여러 개)
+def require_partner(request: Request):
+    partner_keys = [key.strip() for key in os.getenv("PARTNER_API_KEYS", "").split(",") if key.strip()]
+    request_key = request.headers.get("x-partner-key")
+
+    if not request_key or not any(secrets.compare_digest(key, request_key) for key in partner_keys):
+        raise HTTPException(status_code=403, detail="제휴 기관 인증이 필요합니다.")
+# --- Partner API Key End ---
+
+# --- ETag / Cache-Control ---
+# 261018 거의 안 바뀌는 목록(정책 카탈로그, 시/도·시/군/구)은 데이터 버전으로 ETag를 만들어서
+# If-None-Match가 같으면 DB 조회/직렬화 없이 304로 끝냄. Cache-Control로 CDN에서도 캐시
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, max-age=60, s-maxage=300")
+REGION_CACHE_CONTROL = os.getenv("REGION_CACHE_CONTROL", "public, max-age=86400")
+
+def make_etag(*parts):
+    """응답 내용을 결정하는 값들(데이터 버전, 경로 파라미터, fields 등) → strong ETag"""
+    return '"' + hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest() + '"'
+
+def cached_response(request: Request, etag, cache_control):
+    """If-None-Match에 etag가 있으면 304 응답, 없으면 None (본문을 만들어서 etag_response로 돌려주면 됨)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+def etag_response(content, etag, cache_control):
+    return JSONResponse(jsonable_encoder(content), headers={"ETag": etag, "Cache-Control": cache_control})
+# --- ETag / Cache-Control End ---
+
+# 아파트 시세 계산에 쓰는 최근 거래 기간 (apt_trades 적재 테이블 기준)
+TRADE_WINDOW_MONTHS = int(os.getenv("TRADE_WINDOW_MONTHS", "3"))
+
+# 추천 자격 판정 엔진: python(기본, 카탈로그 스냅샷의 PolicyMatrix) / sql(database.ELIGIBLE_POLICIES_SQL로 DB에서 거름)
+# / index(스냅샷의 PolicyBitsetIndex, 정책이 아주 많을 때)
+# 엔진 비교는 bench_recommend_engine.py(python vs sql), bench_policy_index.py(정책 수별 python vs index)
+RECOMMEND_ENGINE = os.getenv("RECOMMEND_ENGINE", "python")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 정책 카탈로그를 미리 읽어둠 (실패해도 첫 요청 때 다시 시도)
+    try:
+        catalog.load()
+    except Exception as e:
+        print(f"⚠️ 정책 카탈로그 로드 실패: {e}")
+
+    # async 라우트용 asyncpg 풀은 앱 이벤트 루프에서 만들어야 함 (실패해도 첫 요청 때 다시 시도)
+    try:
+        await adb.get_pool()
+    except Exception as e:
+        print(f"⚠️ async DB 풀 생성 실패: {e}")
+
+    # .env에 TRADE_INGEST_INTERVAL(초)이 있으면 실거래 적재를 백그라운드로 주기 실행
+    # (워커를 여러 개 띄우는 경우 한 곳에서만 켜거나, cron으로 ingest_trades.py를 돌리세요)
+    interval = os.getenv("TRADE_INGEST_INTERVAL")
+    if interval:
+        ingest_trades.start_scheduler(int(interval))
+
+    yield
+
+    # 국토부 API 공유 커넥션 풀, DB 커넥션 풀 정리
+    oa.close()
+    db.close_pool()
+    await adb.close_pool()
+
+app = FastAPI(dependencies=[Depends(csrf_verifier)], lifespan=lifespan)
 limiter = Limiter(key_func=get_remote_address)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
@@ -87,136 +180,93 @@ def calculate_age(birth_date: date):
         
     return age
 
-def get_recommended_policies(request: Request):
+def _recommend_user_id(request: Request):
     # 1. 로그인 여부 확인
     user_id = request.session.get('user_id')
     if not user_id:
         raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
+    return user_id
+
+def _recommend_steps(user_id, policy_catalog):
+    """
+    261018 추천 판정 순서 (sync/async 공통). DB가 필요한 곳에서는 (함수 이름, 인자...)를 yield하고 결과를 돌려받음
+    database.py와 database_async.py는 함수 이름/반환 모양이 같아서, 실제 조회는 _run_sync / _run_async가 함
+    반환: (정책 id 목록, sql 엔진이면 그 출력 행 목록 아니면 None)
+    """
+    # 261018 같은 카탈로그 버전으로 이미 계산한 추천이 있으면 그대로 (recommend_cache.py, 내 정보 저장 시 지워짐)
+    # 캐시에는 정책 id 목록만 (출력 행은 스냅샷에 있으니 사용자마다 복사해 두지 않음)
+    cached = recommend_cache.get(user_id, policy_catalog.version)
+    if cached is not None:
+        return cached, None
 
     # 2. 사용자 상세 정보 가져오기 (DB 조회 1)
-    user_info = db.get_user_info(user_id)
+    user_info = yield ("get_user_info", user_id)
     if not user_info:
         raise HTTPException(status_code=400, detail="사용자 정보를 먼저 입력해주세요.")
 
-    # 3. 전체 정책 목록 가져오기 (DB 조회 2)
+    # 3. 전체 정책 목록 가져오기 (261018 DB 대신 메모리의 카탈로그 스냅샷, catalog.py)
     # (나중에는 DB 쿼리 단계에서 지역(region) 등으로 1차 필터링을 하면 더 좋습니다)
-    all_policies = db.get_all_policies()
+    # (261018 RECOMMEND_ENGINE=sql이면 스냅샷 대신 DB 쿼리 한 번으로 자격이 되는 정책만 가져옴)
     # all_policies_output = db.get_all_policies_output() # list[dict]
     # all_policies = OrderedDict()
     # 4. 진짜 나이(만) 가져오기
     real_age = calculate_age(user_info['birth_date'])
     # print(real_age)
     
-    recommended_list = []
-    my_household_income_standard = db.get_household_income_standard(user_info['household_size'])['monthly_income'] # 우리 가구 수에 대한 월 평균 소득의 100%
-
-    # 4. 필터링 로직 (파이썬으로 한 땀 한 땀 비교)
-    for policy in all_policies:
-        # --- 조건 1: 나이 (min_age ~ max_age) ---
-        # 정책에 나이 제한이 없거나(0 or null), 내 나이가 범위 안에 있어야 통과
-        # (DB에 값이 없으면 보통 0이나 아주 큰 수로 처리되어 있을 수 있으니 데이터 확인 필요)
-        if policy['min_age'] and real_age < policy['min_age']: continue
-        if policy['max_age'] and real_age > policy['max_age']: continue
-
-        # --- 조건 2: 자산 (asset_limit) ---
-        # 내 자산이 정책 제한보다 많으면 탈락
-        if policy['asset_limit'] and user_info['asset'] > policy['asset_limit']: continue
-
-        # --- 조건 3: 결혼 여부 (req_newlywed) ---
-        # 정책이 신혼부부를 요구(True)하는데, 내가 미혼(False)이면 탈락
-        # (기혼자만 가능한 정책을 미혼자가 못 보게)
-        # 만약 정책이 'req_newlywed'가 False라면 누구나 가능하므로 통과
-        if policy['req_newlywed'] and not user_info['is_newlywed']: continue 
-
-        # --- 조건 4: 신생아 여부 (req_newborn) ---
-        # 정책이 신생아 부모를 요구하는데 내가 아니면 탈락
-        if policy['req_newborn'] and not user_info['has_newborn']: continue
-
-        # --- 조건 5: 무주택자 전용 확인 (house_owner_allowed) ---
-        # house_owner_allowed가 False(무주택자만 가능)인데, 내가 집이 있으면(True) 탈락
-        if not policy['house_owner_allowed'] and user_info['is_house_owner']: continue
-
-        # --- 조건 6: 자녀 수 (min_children) ---
-        # 내 자녀 수가 정책 요구보다 적으면 탈락
-        if policy['min_children'] and user_info['child_count'] < policy['min_children']: continue
-
-        # --- 조건 7: income (income) ---
-        # 내 수입이 정책 상한선보다 크면 탈락
-        income_limit = policy['income'] if policy['income'] > 1000 else policy['income'] * 12 * my_household_income_standard / 100
-        if income_limit < user_info['income']: continue
-            
-        # (참고) 소득 조건(Income)은 income_rules 테이블과 조인해야 해서 로직이 조금 복잡합니다.
-        # 일단 위 조건들을 다 통과하면 리스트에 넣습니다.
-        recommended_list.append(policy)
-
-    policy_ids = set([policy['policy_id'] for policy in recommended_list])
-    recommended_list2 = []
-
-    for id in policy_ids :
-        output = db.get_policy_output_by_id(id)
-        recommended_list2.append(output)
-
-
-    # for policy in recommended_list :
-    #     policy_income = db.get_income_rule(policy['policy_id'])
-
-    #     income_limit = 0.0
-
-    #     # --- income_limit 정하기 ---
-    #     if len(policy_income) == 1 :
-    #         if policy_income[0]['income_limit'] < 1000 :
-    #             income_limit = my_household_income_standard * 12 / 100 * policy_income[0]['income_limit'] 
-
-    #         else :
-    #             income_limit = policy_income[0]['income_limit']
-        
-    #     else :
-    #         match policy['policy_id'] :
-    #             case 100 :
-    #                 if user_info['is_newlywed'] :
-    #                     income_limit = policy_income['신혼부부']
-                    
-    #                 elif not user_info['is_house_owner'] and user_info['child_count'] >= 2 :
-    #                     income_limit = policy_income['생애최초/2자녀']
-                    
-    #                 else :
-    #                     income_limit = policy_income['기본(디딤돌)']
-                
-    #             case 101 :
-    #                 if user_info['dual_income']  :
-    #                     income_limit = policy_income['맞벌이(예정)']
-                    
-    #                 else :
-    #                     income_limit = policy_income['기본(신생아구입)']
-                
-    #             case 204 :
-    #                 if user_info['dual_income'] :
-    #                     income_limit = my_household_income_standard * 12 / 100 * policy_income['신혼I형(매입)(맞벌이)']
-                    
-    #                 else :
-    #                     income_limit = my_household_income_standard * 12 / 100 * policy_income['신혼I형(매입)(기본)']
-
-    #             case 401 :
-    #                 if user_info['dual_income'] :
-    #                     income_limit = my_household_income_standard * 12 / 100 * policy_income['신혼II형(매입)(맞벌이)']
-                    
-    #                 else :
-    #                     income_limit = my_household_income_standard * 12 / 100 * policy_income['신혼II형(매입)(기본)']
-    #     # --- income_limit 정하기 ---
-
-    #     # print(policy['policy_name'])
-    #     # print(income_limit, ' > ', user_info['income'])
-        
-    #     # 사용자의 연 수입이 연 소득 제한보다 높으면 탈락
-    #     if user_info['income'] > income_limit : continue
-
-    #     recommended_list2.append(policy)
+    my_household_income_standard = (yield ("get_household_income_standard", user_info['household_size']))['monthly_income'] # 우리 가구 수에 대한 월 평균 소득의 100%
+
+    # 4. 필터링 로직 (261018 eligibility.PolicyMatrix: 정책 조건을 컬럼 배열로 두고 마스크 한 번으로 판정)
+    # 조건 1 나이 / 2 자산 / 3 신혼부부 / 4 신생아 / 5 무주택자 전용 / 6 자녀 수 / 7 소득 (income > 1000이면 절대 금액, 아니면 중위소득 %)
+    # 규칙은 예전 for 루프의 if ... continue 7개와 같음 (0/NULL 제한은 검사 안 함)
+    # 조건 7은 income_rules에 규칙이 있는 정책이면 규칙의 대상 조건 컬럼(신혼부부/맞벌이/무주택/자녀 수)과 우선순위로 고른 상한으로 판정
+    # (eligibility.IncomeRuleTable, 예전 db.get_income_rule + match policy_id 분기 대신)
+    # (sql 엔진은 출력 행까지 같이 받으므로 그것도 돌려줌)
+    recommended_list2 = None
+    if RECOMMEND_ENGINE == "sql":
+        recommended_list2 = yield ("get_eligible_policy_outputs", user_info, real_age, my_household_income_standard)
+        policy_ids = [policy['policy_id'] for policy in recommended_list2]
+    else:
+        engine = policy_catalog.index if RECOMMEND_ENGINE == "index" else policy_catalog.matrix
+        policy_ids = engine.eligible_policy_ids(user_info, real_age, my_household_income_standard)
+
+    recommend_cache.put(user_id, policy_catalog.version, policy_ids)
+    return policy_ids, recommended_list2
+
+def _run_sync(steps):
+    try:
+        name, *args = next(steps)
+        while True:
+            name, *args = steps.send(getattr(db, name)(*args))
+    except StopIteration as done:
+        return done.value
+
+async def _run_async(steps):
+    try:
+        name, *args = next(steps)
+        while True:
+            name, *args = steps.send(await getattr(adb, name)(*args))
+    except StopIteration as done:
+        return done.value
+
+def get_recommended_policy_ids(request: Request):
+    # 261018 추천 판정은 정책 id 목록까지만 (출력 정보는 카탈로그 스냅샷에서 꺼냄, get_recommended_policies)
+    user_id = _recommend_user_id(request)
+    return _run_sync(_recommend_steps(user_id, catalog.get()))
 
+def get_recommended_policies(request: Request):
+    policy_ids, recommended_list2 = get_recommended_policy_ids(request)
+    if recommended_list2 is None:
+        recommended_list2 = catalog.get_policy_outputs(policy_ids)
     return {
         "count": len(recommended_list2),
         "policies": recommended_list2
     }
 
+async def get_recommended_policy_ids_async(request: Request):
+    # 261018 get_recommended_policy_ids의 async 버전 (판정 순서는 같은 _recommend_steps, 조회만 database_async)
+    user_id = _recommend_user_id(request)
+    return await _run_async(_recommend_steps(user_id, await catalog.get_async()))
+
 @router.get("/test")
 def test(request: Request):
     user_info = db.get_user_info(request.session.get('user_id'))
@@ -439,6 +489,9 @@ def update_my_info(info: UserInfoRequest, request: Request):
     success = db.save_user_info(user_id, info_data)
 
     if success:
+        # 261018 정보가 바뀌었으니 캐시된 추천 결과는 버림
+        recommend_cache.invalidate(user_id)
+
         # 4. 세션 정보 업데이트 
         # (정보를 저장했으므로, 세션의 has_info 상태도 True로 변경해줘야 프론트에서 바로 반영됨)
         request.session['has_info'] = True
@@ -458,64 +511,215 @@ def update_my_info(info: UserInfoRequest, request: Request):
 # (database.py에 get_user_info가 추가되었다고 가정)
 
 # 사용 중 260109
-@router.get("/policies/recommended")
-def get_recommended_policies_user_info(request: Request):
-    return get_recommended_policies(request)
-
-# 사용 중 260109
-@router.get("/policies/recommended/detail")
-def get_recommended_policies_with_detail(request: Request, apart_info: ApartInfo = Depends()) :
-    basic_recommended_list = get_recommended_policies(request)['policies']
+# 261018 추천 결과는 순위(ranking.py) 순으로. limit을 주면 상위 limit개만 + 다음 페이지 커서 (스크롤할 때 cursor로 이어서)
+RECOMMEND_PAGE_MAX = 100
 
-    # 0. 지역 코드와 아파트 이름을 동시에 받음.
-    stripped_apart_name = apart_info.apart_name.replace(" ", "")
+def _parse_fields(fields, policy_catalog):
+    # 261018 목록 API의 ?fields= (기본은 요약 필드 catalog.SUMMARY_FIELDS, fields=all이면 전체 컬럼)
+    try:
+        return catalog.parse_fields(fields, policy_catalog)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # 1. 지역 코드로 아파트를 필터링 (국토부 API 호출)
-    region_code = db.get_region_code(apart_info.sido_name, apart_info.sigungu_name)
-    apart_list = oa.get_recent_3months_apt_trades(region_code)
-    # print(apart_list)
-    print(region_code)
+@router.get("/policies/recommended")
+async def get_recommended_policies_user_info(
+    request: Request, limit: int | None = None, cursor: str | None = None, fields: str | None = None,
+):
+    if limit is not None and not 1 <= limit <= RECOMMEND_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit은 1~{RECOMMEND_PAGE_MAX} 사이여야 합니다.")
+    try:
+        after = ranking.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+
+    # 순위는 id만으로 매기고, 이번 페이지 id들의 출력 행만 스냅샷의 fields 투영(snapshot.projection)에서 꺼냄
+    eligible_ids, _ = await get_recommended_policy_ids_async(request)
+    policy_catalog = await catalog.get_async()
+    fields = _parse_fields(fields, policy_catalog)
+
+    policy_ids, scores, has_more = policy_catalog.ranker.top_k(
+        eligible_ids, *catalog.popularity(), k=limit, after=after,
+    )
+    return {
+        "count": len(eligible_ids), # 자격 되는 정책 전체 수 (이번 페이지 수가 아님)
+        "policies": await catalog.get_policy_outputs_async(policy_ids, fields),
+        "next_cursor": ranking.encode_cursor(scores[-1], policy_ids[-1]) if has_more else None,
+    }
 
-    # 2. 아파트 이름으로 아파트를 필터링.
-    apart_list2 = defaultdict(list)
+# 261018 소득/자산 what-if (GET /policies/recommended/sweep)
+# - 내 정보 화면에서 소득/자산을 바꿔 볼 때마다 PUT + 추천 전체를 다시 돌리던 것을 요청 한 번으로
+# - 저장된 정보에서 소득/자산만 바뀐다고 보고, 정책마다 자격이 켜지고 꺼지는 경계를 조건 배열에서 바로 계산
+#   (격자점마다 판정을 다시 돌리지 않음, PolicyMatrix.income_asset_sweep)
+# - 범위(income_min~income_max, asset_min~asset_max, 단위 만 원) 안에서 한 번도 자격이 안 되는 정책은 뺌
+# - 경계 값이 null이면 제한 없음
+def _sweep_bound(limit, high):
+    """상한 값을 요청 범위로 자름 (소득은 만 원 단위 정수로 비교하므로 내림)"""
+    if high is not None:
+        limit = min(limit, high)
+    return None if np.isinf(limit) else int(np.floor(limit))
+
+def _sweep_range(limit, low, high):
+    """경계 limit 이하에서 자격이 되는 구간을 [low, high] 안으로 자른 것 (구간이 없으면 None)"""
+    if limit < low:
+        return None
+    return [low, _sweep_bound(limit, high)]
+
+def _sweep_regions(regions, income_min, income_max, asset_min, asset_max):
+    clipped = []
+    for region_income, region_asset in regions: # 소득 상한 내림차순
+        if region_income < income_min or region_asset < asset_min:
+            continue
+        region = {"max_income": _sweep_bound(region_income, income_max), "max_asset": _sweep_bound(region_asset, asset_max)}
+        # 범위로 자르면서 앞의 영역에 포함되게 된 영역은 뺌
+        if clipped and region['max_income'] == clipped[-1]['max_income']:
+            clipped[-1] = region
+        elif clipped and region['max_asset'] == clipped[-1]['max_asset']:
+            continue
+        else:
+            clipped.append(region)
+    return clipped
+
+@router.get("/policies/recommended/sweep")
+async def sweep_recommended_policies(
+    request: Request,
+    income_min: int = 0,
+    income_max: int | None = None,
+    asset_min: int = 0,
+    asset_max: int | None = None,
+):
+    user_id = request.session.get('user_id')
+    if not user_id:
+        raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
+    if (income_max is not None and income_max < income_min) or (asset_max is not None and asset_max < asset_min):
+        raise HTTPException(status_code=400, detail="범위의 최솟값이 최댓값보다 큽니다.")
 
-    for apart in apart_list :
-        apart_name = apart.get('aptNm')
-        apart_cdealtype = apart.get('cdealType')
+    policy_catalog = await catalog.get_async()
+    user_info = await adb.get_user_info(user_id)
+    if not user_info:
+        raise HTTPException(status_code=400, detail="사용자 정보를 먼저 입력해주세요.")
 
-        if stripped_apart_name == apart_name and apart_cdealtype != "O":
-            apart_list2[apart_name].append(apart)
+    real_age = calculate_age(user_info['birth_date'])
+    my_household_income_standard = (await adb.get_household_income_standard(user_info['household_size']))['monthly_income']
+    sweep = policy_catalog.matrix.income_asset_sweep(user_info, real_age, my_household_income_standard)
+
+    income = user_info['income'] or 0
+    policies = []
+    for entry in sweep:
+        regions = _sweep_regions(entry['regions'], income_min, income_max, asset_min, asset_max)
+        if not regions:
+            continue
+        output = policy_catalog.outputs_by_id.get(entry['policy_id'], {})
+        policies.append({
+            "policy_id": entry['policy_id'],
+            "policy_name": output.get('policy_name'),
+            "eligible_now": income <= entry['max_income'],
+            "income_range": _sweep_range(entry['max_income'], income_min, income_max), # 지금 자산 그대로일 때
+            "asset_range": _sweep_range(entry['max_asset'], asset_min, asset_max),     # 지금 소득 그대로일 때
+            "regions": regions,
+        })
 
-    # print(apart_list2)
-    if len(apart_list2) == 0 :
-        raise HTTPException(status_code=404, detail="해당 아파트를 찾을 수 없습니다.")
-    
-    selected_name = list(apart_list2.keys())[0] # 아파트 이름 입력 (래미안) 시 관련 아파트 중 선택 (래미안장전) 로직 수정 예정
-        
-    apart_list3 = apart_list2[selected_name]
-    # print(apart_list3)
+    return {
+        "catalog_version": policy_catalog.version,
+        "income": income,
+        "asset": user_info['asset'] or 0,
+        "count": len(policies),
+        "policies": policies,
+    }
 
-    # for apart in apart_list2 :
-    #     print(apart['cdealType'], apart['aptNm'], apart['aptDong'], apart['dealAmount'])
+# 261018 상담 기관용 일괄 추천
+# - 익명 가구 정보(UserInfoRequest 필드) 여러 개를 받아서 카탈로그 스냅샷에 (가구 수 × 정책) 행렬 한 번으로 판정
+# - 결과는 가구별 정책 id 목록만 (입력 순서대로, 가구 수 기준 소득이 없는 household_size면 null + errors)
+# - RECOMMEND_BATCH_STREAM_THRESHOLD개보다 많거나 Accept: application/x-ndjson이면 한 줄에 한 가구씩 스트리밍
+RECOMMEND_BATCH_MAX = int(os.getenv("RECOMMEND_BATCH_MAX", "1000"))
+RECOMMEND_BATCH_STREAM_THRESHOLD = int(os.getenv("RECOMMEND_BATCH_STREAM_THRESHOLD", "200"))
+RECOMMEND_BATCH_CHUNK = 256 # 한 번에 행렬로 판정할 가구 수 (메모리: 가구 수 × 정책 조건 줄)
+
+class BatchRecommendRequest(BaseModel):
+    # 개수 제한은 모델에서 (넘으면 가구 정보를 하나씩 검증하기 전에 422)
+    profiles: list[UserInfoRequest] = Field(max_length=RECOMMEND_BATCH_MAX)
+
+def _evaluate_batch(policy_catalog, profiles, income_standards):
+    """(index, 정책 id 목록 또는 None, 에러 메시지)를 RECOMMEND_BATCH_CHUNK개씩 판정하면서 차례로 내보냄"""
+    for start in range(0, len(profiles), RECOMMEND_BATCH_CHUNK):
+        user_infos = [profile.model_dump() for profile in profiles[start:start + RECOMMEND_BATCH_CHUNK]]
+        valid = [i for i, user_info in enumerate(user_infos) if user_info['household_size'] in income_standards]
+        policy_ids = dict(zip(valid, policy_catalog.matrix.eligible_policy_ids_many(
+            [user_infos[i] for i in valid],
+            [calculate_age(user_infos[i]['birth_date']) for i in valid],
+            [income_standards[user_infos[i]['household_size']] for i in valid],
+        )))
+
+        for i, user_info in enumerate(user_infos):
+            if i in policy_ids:
+                yield start + i, policy_ids[i], None
+            else:
+                yield start + i, None, f"household_size {user_info['household_size']}의 기준 소득 정보가 없습니다."
+
+@router.post("/policies/recommend/batch", dependencies=[Depends(require_partner)])
+@limiter.limit("30/minute")
+def recommend_policies_batch(batch: BatchRecommendRequest, request: Request):
+    profiles = batch.profiles
+    policy_catalog = catalog.get()
+    income_standards = db.get_household_income_standards()
+    results = _evaluate_batch(policy_catalog, profiles, income_standards)
+
+    if len(profiles) > RECOMMEND_BATCH_STREAM_THRESHOLD or "application/x-ndjson" in request.headers.get("accept", ""):
+        def lines():
+            for index, policy_ids, error in results:
+                line = {"index": index, "policy_ids": policy_ids}
+                if error:
+                    line["error"] = error
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(
+            lines(), media_type="application/x-ndjson", headers={"X-Catalog-Version": policy_catalog.version},
+        )
 
-    # 3. 거래(평균)가 및 최솟값 계산
-    # 3-2. 오늘의 연월 기준 3개월 안의 모든 정보 검색 후 계산
-    # 3-3. 3개월 내 정보가 없으면 직접 가격 입력하게 하기.
-    apart_list4 = defaultdict(list)
+    response = {"catalog_version": policy_catalog.version, "count": len(profiles), "results": [], "errors": []}
+    for index, policy_ids, error in results:
+        response["results"].append(policy_ids)
+        if error:
+            response["errors"].append({"index": index, "detail": error})
+    return response
 
-    for apart in apart_list3 :
-        apart_dong = apart.get('aptDong')
-        
-        clean_amount = int(apart.get('dealAmount').replace(',', '').strip())
+# 사용 중 260109
+@router.get("/policies/recommended/detail")
+def get_recommended_policies_with_detail(request: Request, apart_info: ApartInfo = Depends()) :
+    _recommend_user_id(request) # 로그인 확인만 (정책 비교는 프론트에서 reference_price로 함)
 
-        apart_list4[apart_dong].append(clean_amount)
+    # 0. 지역 코드와 아파트 이름을 동시에 받음.
+    stripped_apart_name = apart_info.apart_name.replace(" ", "")
 
-    # print(apart_list4)
+    # 1. 지역 코드 + 아파트 이름으로 최근 거래 조회 (apt_trades 적재 테이블, 인덱스 조회)
+    region_code = db.get_region_code(apart_info.sido_name, apart_info.sigungu_name)
+    deal_ymds = oa.recent_deal_ymds(TRADE_WINDOW_MONTHS)
+
+    # 적재 후 미리 계산해둔 통계가 이번 달 기준이면 키 조회로 끝 (apt_price_stats)
+    apart_summary = db.get_apt_price_stats(region_code, stripped_apart_name, TRADE_WINDOW_MONTHS)
+    if apart_summary is not None and apart_summary.pop('as_of_ymd') == deal_ymds[0]:
+        return apart_summary
+
+    # 통계가 없거나 지난달 기준이면 적재 테이블에서 바로 집계
+    since_ymd = deal_ymds[-1]
+    apart_trades = TradeBatch.from_rows(db.get_apt_trades(region_code, stripped_apart_name, since_ymd))
+    apart_summary = apart_trades.summarize_by_dong() # 적재 테이블 조회는 이미 이름/해제 여부로 걸러져 있음
+
+    if apart_summary is None and not db.is_region_ingested(region_code):
+        # 아직 적재되지 않은 지역은 기존처럼 국토부 API에서 바로 가져와서 이름/해제 여부로 거름 (캐시된 TradeBatch에서 바로 집계)
+        try:
+            region_trades = oa.get_recent_apt_trades(region_code, TRADE_WINDOW_MONTHS)
+            apart_summary = region_trades.summarize_by_dong(stripped_apart_name)
+        except oa.MolitAPIError:
+            raise HTTPException(status_code=503, detail="실거래가 정보를 불러오지 못했습니다. 잠시 후 다시 시도해주세요.")
+
+    if apart_summary is None :
+        raise HTTPException(status_code=404, detail="해당 아파트를 찾을 수 없습니다.")
 
-    apart_amounts_mean = [np.mean(amounts) for amounts in apart_list4.values()]
-    apart_amounts_min = min(apart_amounts_mean) # 단위(만)
-    # print(apart_amounts_mean)
-    # print(apart_amounts_min)
+    # 2. 거래(평균)가 및 최솟값 계산
+    # 2-2. 오늘의 연월 기준 최근 TRADE_WINDOW_MONTHS개월 안의 모든 정보 검색 후 계산
+    # 2-3. 기간 내 정보가 없으면 직접 가격 입력하게 하기.
+    # 261018 동별 건수/평균/최솟값/중앙값/최댓값을 한 번의 group-by로 계산 (TradeBatch.summarize_by_dong)
+    # 정책 비교 기준값은 예전과 같은 '동별 평균 중 최솟값' → reference_price (단위(만))
     
 
     # 4. 지역이랑 거래가 기준으로 정책을 필터링
@@ -537,53 +741,68 @@ def get_recommended_policies_with_detail(request: Request, apart_info: ApartInfo
     #     "count": len(final_policies_list),
     #     "policies": final_policies_list
     # }
-    return apart_amounts_min
+    return apart_summary
 
 # 사용 중 260109
 @router.get("/regions/sido")
-def get_sido_list():
-    sido_list = db.get_sido()
-    simple_sido_list = sorted(set([dic['sido'] for dic in sido_list]))
+async def get_sido_list(request: Request):
+    # 261018 region_code 스냅샷(regions.py)에서 바로 (DB 조회 없음)
+    region_snapshot = await regions.get_async()
+    etag = make_etag("sido", region_snapshot.version)
+    not_modified = cached_response(request, etag, REGION_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
 
-    return simple_sido_list
+    return etag_response(list(region_snapshot.sido), etag, REGION_CACHE_CONTROL)
 
 # 사용 중 260109
 @router.get("/regions/sigungu/{sido_name}")
-def get_sigungu_list(sido_name):
-    sigungu_list = db.get_sigungu(sido_name)
-    simple_sigungu_list = sorted(set([dic['sigungu'] for dic in sigungu_list if dic['sigungu'] is not None]))
+async def get_sigungu_list(sido_name, request: Request):
+    region_snapshot = await regions.get_async()
+    simple_sigungu_list = region_snapshot.sigungu.get(sido_name)
 
-    if len(simple_sigungu_list) == 0 :
+    if not simple_sigungu_list:
         raise HTTPException(status_code=404, detail="해당 지역(시/도)을 찾을 수 없습니다.")
-    
-    return simple_sigungu_list
+
+    etag = make_etag("sigungu", sido_name, region_snapshot.version)
+    not_modified = cached_response(request, etag, REGION_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    return etag_response(list(simple_sigungu_list), etag, REGION_CACHE_CONTROL)
 
 # 사용 중 260109
 # 이렇게 하면 근데 parameter로 sigungu가 안넘어왔을 때 예외처리를 안해도 되나?
 @router.get("/regions/apart")
-def get_apart_list(sido_name, sigungu_name) :
-    region_code = db.get_region_code(sido_name, sigungu_name)
-    apart_list = oa.get_recent_3months_apt_trades(region_code)
-    apart_name_list = sorted(set([apart.get('aptNm') for apart in apart_list]))
-    # print(apart_name_list)
+async def get_apart_list(sido_name, sigungu_name) :
+    region_code = await adb.get_region_code(sido_name, sigungu_name)
+    since_ymd = oa.recent_deal_ymds(TRADE_WINDOW_MONTHS)[-1]
+    apart_name_list = await adb.get_apt_names(region_code, since_ymd)
+
+    if not apart_name_list and not await adb.is_region_ingested(region_code):
+        # 아직 적재되지 않은 지역은 국토부 API에서 바로 조회
+        try:
+            apart_name_list = (await oa.get_recent_apt_trades_async(region_code, TRADE_WINDOW_MONTHS)).apt_names()
+        except oa.MolitAPIError:
+            raise HTTPException(status_code=503, detail="실거래가 정보를 불러오지 못했습니다. 잠시 후 다시 시도해주세요.")
 
     return apart_name_list
 
 
 # 사용 중 260109
 @router.post("/favorites/{policy_id}")
-def toggle_favorite(policy_id: str, request: Request):
+async def toggle_favorite(policy_id: int, request: Request):
     user_id = request.session.get("user_id")
     if not user_id:
         raise HTTPException(status_code=401, detail="로그인 필요")
 
-    return db.toggle_favorite(user_id, policy_id)
+    return await adb.toggle_favorite(user_id, policy_id)
 
 
 # 사용 중 260109
 @router.get("/favorites/me")
-def get_favorite_policies_list(request: Request):
-    return db.get_my_favorite_ids(request.session.get('user_id'))
+async def get_favorite_policies_list(request: Request):
+    return await adb.get_my_favorite_ids(request.session.get('user_id'))
 
 
 # 1. 기본 접속 테스트
@@ -593,16 +812,37 @@ def read_root():
 
 # 2. 전체 정책 조회 API
 @router.get("/policies")
-def read_policies():
-    return db.get_all_policies_output()
-
-# 3. 특정 정책 상세 조회 API
+async def read_policies(request: Request, fields: str | None = None):
+    policy_catalog = await catalog.get_async()
+    fields = _parse_fields(fields, policy_catalog)
+    # 목록에 visit_count가 들어가면 조회수가 바뀔 때도 ETag가 바뀌어야 함
+    visits_version = catalog.visit_counts_version() if fields is None or "visit_count" in fields else None
+    etag = make_etag("policies", policy_catalog.version, visits_version, fields)
+    not_modified = cached_response(request, etag, CATALOG_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    return etag_response(await catalog.get_policy_outputs_async(fields=fields), etag, CATALOG_CACHE_CONTROL)
+
+# 3. 특정 정책 상세 조회 API (기본은 전체 컬럼, 목록에서 빠진 긴 글은 여기서)
 @router.get("/policies/{policy_id}")
-def read_policy_detail(policy_id: int):
-    policy = db.get_policy_output_by_id(policy_id)
+async def read_policy_detail(policy_id: int, request: Request, fields: str | None = None):
+    policy_catalog = await catalog.get_async()
+    fields = _parse_fields(fields, policy_catalog) if fields else None
+
+    # 스냅샷에 있는 정책만 ETag (스냅샷 이후에 추가된 정책은 DB에서 바로 읽어서 그대로 응답)
+    etag = None
+    if policy_id in policy_catalog.outputs_by_id:
+        visit_count = catalog.visit_count(policy_id) if fields is None or "visit_count" in fields else None
+        etag = make_etag("policy", policy_id, policy_catalog.version, visit_count, fields)
+        not_modified = cached_response(request, etag, CATALOG_CACHE_CONTROL)
+        if not_modified:
+            return not_modified
+
+    policy = await catalog.get_policy_output_async(policy_id, fields)
     if policy is None:
         raise HTTPException(status_code=404, detail="해당 정책을 찾을 수 없습니다.")
-    return policy
+    return etag_response(policy, etag, CATALOG_CACHE_CONTROL) if etag else policy
 
 @router.post("/policies/{policy_id}/visit")
 @limiter.limit("30/minute")
@@ -612,6 +852,7 @@ def record_policy_visit(policy_id: int, request: Request):
     if not success:
         # 실제 운영에서는 policy_id가 없는 경우 등 에러를 좀 더 세분화할 수 있습니다.
         raise HTTPException(status_code=500, detail="조회수 업데이트 중 오류가 발생했습니다.")
+    catalog.record_visit(policy_id)
     return {"message": "조회수가 업데이트되었습니다."}
 
 
@@ -795,6 +1036,39 @@ async def naver_callback(code: str, state: str, request: Request):
         # [추가] 예상치 못한 에러가 나도 로그인 페이지로 반송
         return RedirectResponse("https://jipsalddae.co.kr/login?error=server_error")
 
+@router.get("/admin/stats", dependencies=[Depends(require_admin)])
+def get_admin_stats():
+    """캐시 적중률 등 서버 내부 통계"""
+    return {
+        "trade_cache": oa.get_cache_stats(),
+        "molit_client": oa.get_client_stats(),
+        "policy_catalog": catalog.stats(),
+        "recommend_cache": recommend_cache.stats(),
+        "regions": regions.stats(),
+        "database": db.get_query_stats(),
+        "database_async": adb.get_pool_stats(),
+    }
+
+@router.post("/admin/catalog/reload", dependencies=[Depends(require_admin)])
+def reload_policy_catalog():
+    """정책 데이터를 고친 뒤 체크 주기를 기다리지 않고 바로 카탈로그 다시 읽기"""
+    catalog.reload()
+    return catalog.stats()
+
+@router.get("/admin/policies/{policy_id}/eligible-users", dependencies=[Depends(require_admin)])
+def stream_eligible_users(policy_id: int):
+    """정책 하나에 자격이 되는 사용자 id를 한 줄에 하나씩 (user_info 전체를 묶음 단위로 훑으면서 바로 내보냄)"""
+    policy_catalog = catalog.get()
+    if policy_id not in policy_catalog.outputs_by_id:
+        raise HTTPException(status_code=404, detail="정책을 찾을 수 없습니다.")
+
+    user_ids = eligible_users.iter_eligible_user_ids(policy_catalog.matrix, policy_id)
+    return StreamingResponse(
+        (user_id + "\n" for user_id in user_ids),
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Catalog-Version": policy_catalog.version},
+    )
+
 @app.get("/health", status_code=200)                                                                                
 def health_check():                                                                                                    
     """                                                                                                                
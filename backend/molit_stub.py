@@ -0,0 +1,66 @@
+import os
+from fastapi import FastAPI, Response
+
+# 261018 국토부 실거래 API 로컬 스텁 서버 (MolitClient 재시도/서킷 브레이커 확인용)
+# 실행: STUB_MODE=ok uvicorn molit_stub:app --port 9000
+# 서버 쪽 .env: MOLIT_BASE_URL=http://localhost:9000/getRTMSDataSvcAptTrade
+# STUB_MODE
+# - ok: 정상 응답 (STUB_TOTAL건을 페이지로 나눠서)
+# - flaky: 요청 3번 중 2번은 500
+# - slow: STUB_DELAY초 뒤 응답 (타임아웃 확인용)
+# - quota: 호출 한도 초과 XML 오류 본문
+# - key_error: 등록되지 않은 인증키 XML 오류 본문
+
+app = FastAPI()
+_request_count = 0
+
+QUOTA_XML = """<OpenAPI_ServiceResponse><cmmMsgHeader><errMsg>SERVICE ERROR</errMsg>
+<returnAuthMsg>LIMITED_NUMBER_OF_SERVICE_REQUESTS_EXCEEDS_ERROR</returnAuthMsg>
+<returnReasonCode>22</returnReasonCode></cmmMsgHeader></OpenAPI_ServiceResponse>"""
+
+KEY_ERROR_XML = """<OpenAPI_ServiceResponse><cmmMsgHeader><errMsg>SERVICE ERROR</errMsg>
+<returnAuthMsg>SERVICE_KEY_IS_NOT_REGISTERED_ERROR</returnAuthMsg>
+<returnReasonCode>30</returnReasonCode></cmmMsgHeader></OpenAPI_ServiceResponse>"""
+
+
+@app.get("/getRTMSDataSvcAptTrade")
+async def get_trades(LAWD_CD: str, DEAL_YMD: str, pageNo: int = 1, numOfRows: int = 1000):
+    global _request_count
+    _request_count += 1
+    mode = os.getenv("STUB_MODE", "ok")
+
+    if mode == "flaky" and _request_count % 3 != 0:
+        return Response(status_code=500)
+    if mode == "slow":
+        import asyncio
+        await asyncio.sleep(float(os.getenv("STUB_DELAY", "10")))
+    if mode == "quota":
+        return Response(content=QUOTA_XML, media_type="text/xml")
+    if mode == "key_error":
+        return Response(content=KEY_ERROR_XML, media_type="text/xml")
+
+    total = int(os.getenv("STUB_TOTAL", "2500"))
+    start = (pageNo - 1) * numOfRows
+    items = [
+        {
+            "aptNm": f"스텁아파트{i % 20}",
+            "aptDong": f"{100 + i % 5}",
+            "dealAmount": f"{50000 + (i % 100) * 100:,}",
+            "excluUseAr": "84.97",
+            "floor": str(i % 25 + 1),
+            "dealYear": DEAL_YMD[:4],
+            "dealMonth": str(int(DEAL_YMD[4:])),
+            "dealDay": str(i % 28 + 1),
+            "cdealType": "O" if i % 50 == 0 else " ",
+            "umdNm": "스텁동",
+            "buildYear": "2010",
+        }
+        for i in range(start, min(start + numOfRows, total))
+    ]
+
+    return {
+        "response": {
+            "header": {"resultCode": "000", "resultMsg": "OK"},
+            "body": {"items": {"item": items} if items else "", "numOfRows": numOfRows, "pageNo": pageNo, "totalCount": total},
+        }
+    }
@@ -1,82 +1,582 @@
-import requests
+import asyncio
+import concurrent.futures
+import queue
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+import httpx
 import os
 from datetime import date
 from dateutil.relativedelta import relativedelta # 월 단위 계산용
 from dotenv import load_dotenv
+from cache import LRUCache, SqliteStore
+from trade_batch import TradeBatch
 
 # 환경변수 로드 (.env 파일에 SERVICE_KEY가 있어야 함)
 load_dotenv()
 
-def get_recent_3months_apt_trades(region_code: str):
-    """
-    region_code(예: 11110)를 받아서
-    최근 3개월(이번 달 포함)의 아파트 실거래가 데이터를 모두 가져와 리스트로 반환
-    """
-    
-    # 1. 공공데이터포털 API 기본 설정
-    # (반드시 'Decoding' 키를 사용하세요. .env에 저장된 키를 가져옵니다)
-    service_key = os.getenv("PUBLIC_DATA_DECODING_KEY") 
-    base_url = "http://apis.data.go.kr/1613000/RTMSDataSvcAptTrade/getRTMSDataSvcAptTrade"
-    
-    all_apt_list = [] # 결과를 모두 담을 리스트
-    
-    # 2. 오늘 날짜 기준 최근 3개월 계산 (0: 이번 달, 1: 지난달, 2: 지지난달)
+# 로컬 스텁 서버(molit_stub.py)로 테스트할 때는 MOLIT_BASE_URL만 바꾸면 됨
+BASE_URL = os.getenv("MOLIT_BASE_URL", "http://apis.data.go.kr/1613000/RTMSDataSvcAptTrade/getRTMSDataSvcAptTrade")
+
+# 요청 1건당 타임아웃(초). 한 달 요청이 늦어도 나머지 달 응답은 기다리지 않도록 요청별로 건다.
+REQUEST_TIMEOUT = float(os.getenv("MOLIT_TIMEOUT", "5"))
+CONNECT_TIMEOUT = float(os.getenv("MOLIT_CONNECT_TIMEOUT", "3"))
+MAX_CONNECTIONS = int(os.getenv("MOLIT_MAX_CONNECTIONS", "20"))
+PAGE_SIZE = int(os.getenv("MOLIT_PAGE_SIZE", "1000")) # numOfRows (totalCount가 이보다 크면 나머지 페이지를 추가로 요청)
+# 최근 n개월 조회 한 번을 기다리는 최대 시간(초). 요청별 타임아웃과 별개로, molit-io 루프가 멈춰도 호출한 쪽은 여기서 풀려남
+FETCH_TIMEOUT = float(os.getenv("MOLIT_FETCH_TIMEOUT", "30"))
+
+# 261018 (LAWD_CD, DEAL_YMD) 단위 거래 캐시
+# - 1차: 프로세스 메모리 LRU / 2차: TRADE_CACHE_PATH가 있으면 SQLite 파일
+# - 값은 응답 dict 리스트가 아니라 열 단위 TradeBatch (trade_batch.py)
+# - 실거래 신고 기한이 계약 후 30일이라 지난달 거래도 이번 달 중에 계속 추가됨
+#   → 이번 달/지난달은 '열린 달'로 보고 짧은 TTL, 그 이전 달은 '닫힌 달'로 보고 긴 TTL
+OPEN_MONTH_TTL = int(os.getenv("TRADE_CACHE_OPEN_TTL", "3600"))          # 1시간
+CLOSED_MONTH_TTL = int(os.getenv("TRADE_CACHE_CLOSED_TTL", "604800"))    # 7일
+
+_trade_cache = LRUCache(maxsize=int(os.getenv("TRADE_CACHE_SIZE", "1024")), name="trade_memory")
+_trade_store = SqliteStore(
+    os.getenv("TRADE_CACHE_PATH"), name="trade_disk", dumps=TradeBatch.to_bytes, loads=TradeBatch.from_bytes,
+) if os.getenv("TRADE_CACHE_PATH") else None
+
+
+def _store_key(region_code: str, deal_ymd: str):
+    # 예전 JSON 항목과 섞이지 않도록 접두어를 붙임
+    return f"batch:{region_code}:{deal_ymd}"
+
+# 261018 국토부 API 전용 이벤트 루프
+# - httpx.AsyncClient의 커넥션 풀은 자신을 만든 이벤트 루프에 묶여 있어서,
+#   스레드풀에서 도는 sync 엔드포인트와 async 엔드포인트가 같은 풀을 쓰려면 루프를 하나로 고정해야 함
+# - 그래서 데몬 스레드에 루프를 하나 띄우고, 모든 요청을 그 루프에 넘겨서 실행함
+_loop = None
+_loop_lock = threading.Lock()
+
+# 261018 single-flight: (region_code, deal_ymd) -> 진행 중인 asyncio.Task
+_inflight = {}
+_coalesced_count = 0 # 다른 요청에 얹혀서 API 호출을 아낀 횟수
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="molit-io", daemon=True).start()
+    return _loop
+
+
+def _submit(coro):
+    """코루틴을 molit-io 루프에 넘기고 concurrent.futures.Future를 돌려받음"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def recent_deal_ymds(months: int = 3):
+    """오늘 날짜 기준 최근 n개월의 계약월(YYYYMM) 리스트 (0: 이번 달, 1: 지난달, ...)"""
     today = date.today()
-    
-    for i in range(3):
-        # i개월 전 날짜 계산
-        target_date = today - relativedelta(months=i)
-        deal_ymd = target_date.strftime("%Y%m") # 예: 202407
-        
-        print(f"📡 API 요청 중... 지역: {region_code}, 기간: {deal_ymd}")
-        
+    return [(today - relativedelta(months=i)).strftime("%Y%m") for i in range(months)]
+
+
+def is_open_month(deal_ymd: str):
+    """이번 달/지난달처럼 아직 신고가 더 들어올 수 있는 계약월인지"""
+    return deal_ymd >= recent_deal_ymds(2)[-1]
+
+
+def month_ttl(deal_ymd: str):
+    """계약월이 아직 열려 있으면(이번 달/지난달) 짧은 TTL, 닫혔으면 긴 TTL"""
+    return OPEN_MONTH_TTL if is_open_month(deal_ymd) else CLOSED_MONTH_TTL
+
+
+# --- 국토부 API 에러 ---
+class MolitAPIError(Exception):
+    """국토부 API 호출 실패 (다시 시도해도 소용없는 오류: 인증키 오류, 잘못된 요청 등)"""
+    retryable = False
+
+
+class MolitTransientError(MolitAPIError):
+    """일시적인 실패 (타임아웃, 5xx, 포털 내부 오류 등) → 백오프 후 재시도"""
+    retryable = True
+
+
+class MolitQuotaExceeded(MolitAPIError):
+    """일일 호출 한도 초과 (포털이 XML 오류 본문으로 알려줌)"""
+
+
+class MolitCircuitOpen(MolitAPIError):
+    """국토부 API가 불안정해서 서킷 브레이커가 열린 상태 (요청을 보내지 않고 바로 실패)"""
+
+
+# 공공데이터포털 XML 오류 본문의 returnReasonCode
+# (https://www.data.go.kr 오픈API 에러 코드 정리)
+_QUOTA_REASON_CODES = {"22"}                     # LIMITED_NUMBER_OF_SERVICE_REQUESTS_EXCEEDS_ERROR
+_TRANSIENT_REASON_CODES = {"1", "01", "04", "4", "05", "5", "99"} # APPLICATION/HTTP/SERVICE_TIMEOUT/UNKNOWN 오류
+_NO_DATA_RESULT_CODES = {"03", "3"}             # NODATA_ERROR (거래 없는 달)
+
+
+def parse_error_body(text: str):
+    """
+    JSON 대신 XML로 온 오류 본문에서 (코드, 메시지)를 꺼냄. 오류 본문이 아니면 None.
+    - 게이트웨이 오류: <OpenAPI_ServiceResponse><cmmMsgHeader><returnReasonCode>22</returnReasonCode>...
+    - 서비스 오류: <response><header><resultCode>03</resultCode><resultMsg>NO_DATA</resultMsg>...
+    """
+    try:
+        root = ET.fromstring(text.strip())
+    except ET.ParseError:
+        return None
+
+    code = root.findtext(".//returnReasonCode") or root.findtext(".//resultCode")
+    message = root.findtext(".//returnAuthMsg") or root.findtext(".//errMsg") or root.findtext(".//resultMsg")
+    if code is None:
+        return None
+    return code.strip(), (message or "").strip()
+
+
+def _raise_for_result_code(code: str, message: str):
+    """결과 코드로 에러 종류를 나눠서 던짐 (정상/데이터 없음이면 그냥 돌아감)"""
+    if code in ("00", "000") or code in _NO_DATA_RESULT_CODES:
+        return
+    if code in _QUOTA_REASON_CODES:
+        raise MolitQuotaExceeded(f"호출 한도 초과 ({code} {message})")
+    if code in _TRANSIENT_REASON_CODES:
+        raise MolitTransientError(f"포털 일시 오류 ({code} {message})")
+    raise MolitAPIError(f"포털 오류 ({code} {message})")
+
+
+class TokenBucket:
+    """
+    초당 rate개 요청을 허용하는 토큰 버킷 (molit-io 루프 안에서만 사용)
+    capacity만큼은 한 번에 몰아서 보낼 수 있고, 그 이후로는 rate 속도로 토큰이 채워짐
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 failure_threshold번 쌓이면 열림(open) → reset_timeout 동안 요청을 막고 바로 실패
+    시간이 지나면 반쯤 열림(half_open) → 시험 요청 1건이 성공하면 닫힘(closed), 실패하면 다시 열림
+    (molit-io 루프 안에서만 쓰므로 락 없음)
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_until = 0.0
+        self.open_count = 0
+        self._trial_in_flight = False
+
+    def allow(self):
+        if self.state == "open":
+            if time.monotonic() < self.opened_until:
+                return False
+            self.state = "half_open"
+            self._trial_in_flight = False
+
+        if self.state == "half_open":
+            # 반쯤 열린 동안에는 시험 요청 1건만 통과
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self, cooldown: float = None):
+        """cooldown을 주면 연속 실패 횟수와 상관없이 바로 그 시간만큼 엶 (호출 한도 초과 등)"""
+        self.failures += 1
+        if cooldown is not None or self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_until = time.monotonic() + (cooldown if cooldown is not None else self.reset_timeout)
+            self.open_count += 1
+            self._trial_in_flight = False
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "open_count": self.open_count,
+            "retry_in": max(0.0, round(self.opened_until - time.monotonic(), 1)) if self.state == "open" else 0.0,
+        }
+
+
+class MolitClient:
+    """
+    261018 국토부 아파트 매매 실거래 API 클라이언트
+    - 공유 httpx.AsyncClient (커넥션 풀) + 요청별 타임아웃
+    - 토큰 버킷으로 초당 요청 수 제한
+    - 일시적인 오류(타임아웃, 5xx, 포털 내부 오류)는 지수 백오프로 재시도
+    - JSON 대신 XML 오류 본문이 오면 코드로 구분 (호출 한도 초과 등)
+    - 서킷 브레이커: 계속 실패하면 요청을 보내지 않고 바로 MolitCircuitOpen
+    async 메서드는 모두 molit-io 루프 안에서 실행해야 함 (모듈 함수들이 알아서 넘겨줌)
+    """
+
+    def __init__(self, base_url=BASE_URL, service_key=None, page_size=PAGE_SIZE,
+                 timeout=REQUEST_TIMEOUT, connect_timeout=CONNECT_TIMEOUT, max_connections=MAX_CONNECTIONS,
+                 rps=None, max_retries=2, backoff_base=0.5, backoff_max=8.0,
+                 failure_threshold=5, reset_timeout=30.0, quota_cooldown=3600.0, transport=None):
+        self.base_url = base_url
+        self.service_key = service_key
+        self.page_size = page_size
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.transport = transport
+        self.rate_limiter = TokenBucket(rps) if rps else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.quota_cooldown = quota_cooldown
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._http = None
+        self.request_count = 0
+        self.retry_count = 0
+
+    def set_rate_limit(self, rps: float = None):
+        self.rate_limiter = TokenBucket(rps) if rps else None
+
+    def _get_http(self):
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, transport=self.transport)
+        return self._http
+
+    async def _request_page(self, region_code: str, deal_ymd: str, page_no: int):
+        """한 번 요청해서 (거래 리스트, totalCount)를 반환. 실패하면 종류에 맞는 MolitAPIError."""
+        # (반드시 'Decoding' 키를 사용하세요. .env에 저장된 키를 가져옵니다)
         params = {
-            "serviceKey": service_key,
+            "serviceKey": self.service_key or os.getenv("PUBLIC_DATA_DECODING_KEY"),
             "LAWD_CD": region_code, # 지역코드 5자리
             "DEAL_YMD": deal_ymd,   # 계약월 (YYYYMM)
-            "pageNo": "1",
-            "numOfRows": "1000",    # 한 번에 많이 가져오기 (보통 구 단위 한 달 거래량은 1000건 안 넘음)
+            "pageNo": str(page_no),
+            "numOfRows": str(self.page_size),
             "_type": "json"         # 결과 형식을 JSON으로 요청
         }
-        
+
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+
+        self.request_count += 1
+        try:
+            response = await self._get_http().get(self.base_url, params=params)
+        except httpx.TransportError as e:
+            # 타임아웃, 연결 실패 등
+            raise MolitTransientError(f"{type(e).__name__}: {e}") from e
+
+        # 응답 상태 확인
+        if response.status_code == 429 or response.status_code >= 500:
+            raise MolitTransientError(f"HTTP {response.status_code}")
+        if response.status_code != 200:
+            raise MolitAPIError(f"HTTP {response.status_code}")
+
         try:
-            # [디버깅 코드] 요청 직전에 URL을 출력해서 클릭해보기
-            # print(f"👉 실제 요청 URL: {base_url}?serviceKey={service_key}&LAWD_CD={region_code}&DEAL_YMD={deal_ymd}&_type=json")
-            response = requests.get(base_url, params=params)
-            # print(response.text)
-            
-            # 응답 상태 확인
-            if response.status_code != 200:
-                print(f"❌ API 오류 발생: {response.status_code}")
-                continue
-                
             data = response.json()
-            # print(data)
-            
-            # 3. 데이터 파싱 및 예외 처리
-            # 데이터 구조: response -> body -> items -> item
-            items = data.get('response', {}).get('body', {}).get('items')
-            # print(items)
-            
-            if items:
-                item_list = items.get('item')
-                
-                # 거래 내역이 1개일 경우 dict로 오고, 여러 개일 경우 list로 옴 -> list로 통일
-                if isinstance(item_list, dict):
-                    all_apt_list.append(item_list)
-                elif isinstance(item_list, list):
-                    all_apt_list.extend(item_list) # 리스트 합치기
-                    
+        except ValueError:
+            # 인증키 오류, 호출 한도 초과 등은 200이어도 JSON이 아니라 XML로 옴
+            error = parse_error_body(response.text)
+            if error is None:
+                raise MolitTransientError("JSON도 XML 오류 본문도 아닌 응답")
+            _raise_for_result_code(*error)
+            return [], 0
+
+        # 데이터 구조: response -> header(resultCode) / body -> items -> item
+        header = data.get('response', {}).get('header', {})
+        if header.get('resultCode') is not None:
+            _raise_for_result_code(str(header.get('resultCode')), header.get('resultMsg', ''))
+
+        body = data.get('response', {}).get('body', {})
+        total_count = int(body.get('totalCount') or 0)
+        items = body.get('items')
+
+        if not items:
+            return [], total_count # 거래가 없는 달
+
+        item_list = items.get('item')
+
+        # 거래 내역이 1개일 경우 dict로 오고, 여러 개일 경우 list로 옴 -> list로 통일
+        if isinstance(item_list, dict):
+            return [item_list], total_count
+        elif isinstance(item_list, list):
+            return item_list, total_count
+        return [], total_count
+
+    async def fetch_page(self, region_code: str, deal_ymd: str, page_no: int):
+        """서킷 브레이커 + 재시도를 거쳐 한 페이지를 가져옴"""
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise MolitCircuitOpen("국토부 API 서킷 브레이커 열림")
+
+            try:
+                result = await self._request_page(region_code, deal_ymd, page_no)
+            except MolitQuotaExceeded:
+                # 한도는 재시도해도 안 풀리므로 길게 막아둠
+                self.breaker.record_failure(cooldown=self.quota_cooldown)
+                raise
+            except MolitAPIError as e:
+                if not e.retryable:
+                    # 요청 자체가 잘못된 경우(인증키, 파라미터 등) → 업스트림은 응답했으므로 정상으로 봄
+                    self.breaker.record_success()
+                    raise
+
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+
+                # 지수 백오프 + 지터 (0.5초, 1초, 2초 ... 최대 backoff_max)
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                attempt += 1
+                self.retry_count += 1
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    async def iter_month_pages(self, region_code: str, deal_ymd: str):
+        """
+        한 달치 거래를 페이지 단위로 yield (async 제너레이터)
+        - 1페이지의 totalCount로 전체 페이지 수를 계산하고, 나머지 페이지는 동시에 요청
+        - 나머지 페이지는 도착하는 순서대로 yield (페이지 순서는 보장하지 않음)
+        """
+        items, total_count = await self.fetch_page(region_code, deal_ymd, 1)
+        yield items
+
+        page_count = -(-total_count // self.page_size) # 올림 나눗셈
+        if page_count <= 1:
+            return
+
+        tasks = [asyncio.ensure_future(self.fetch_page(region_code, deal_ymd, page_no)) for page_no in range(2, page_count + 1)]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                items, _ = await next_page
+                yield items
+        finally:
+            # 중간에 실패하거나 소비를 멈추면 남은 요청은 취소
+            for task in tasks:
+                task.cancel()
+
+    async def fetch_month(self, region_code: str, deal_ymd: str):
+        """한 달치 거래 내역 전체(모든 페이지)를 리스트로 반환. 일부 페이지라도 실패하면 MolitAPIError."""
+        month_items = []
+        async for items in self.iter_month_pages(region_code, deal_ymd):
+            month_items.extend(items)
+        return month_items
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def stats(self):
+        return {
+            "requests": self.request_count,
+            "retries": self.retry_count,
+            "rate_limit_rps": self.rate_limiter.rate if self.rate_limiter else None,
+            "circuit_breaker": self.breaker.stats(),
+        }
+
+
+_molit = MolitClient(
+    rps=float(os.getenv("MOLIT_RPS")) if os.getenv("MOLIT_RPS") else None,
+    max_retries=int(os.getenv("MOLIT_MAX_RETRIES", "2")),
+    failure_threshold=int(os.getenv("MOLIT_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("MOLIT_BREAKER_RESET", "30")),
+    quota_cooldown=float(os.getenv("MOLIT_QUOTA_COOLDOWN", "3600")),
+)
+
+
+def set_rate_limit(rps: float = None):
+    """국토부 API 초당 요청 수 제한을 바꿈 (None이면 제한 해제). 일괄 선적재(prefetch_trades.py)에서 사용"""
+    _molit.set_rate_limit(rps)
+
+
+def _get_stale_month(region_code: str, deal_ymd: str):
+    """만료됐어도 남아 있는 캐시 (업스트림이 죽었을 때 빈 결과 대신 내려줌)"""
+    batch = _trade_cache.get((region_code, deal_ymd), allow_stale=True)
+    if batch is None and _trade_store is not None:
+        batch = _trade_store.get(_store_key(region_code, deal_ymd), allow_stale=True)
+    return batch
+
+
+async def _load_month_apt_trades(region_code: str, deal_ymd: str):
+    """디스크 캐시 → 국토부 API 순서로 한 달치 거래 내역을 가져와 TradeBatch로 캐시에 채움"""
+    key = (region_code, deal_ymd)
+
+    if _trade_store is not None:
+        batch = _trade_store.get(_store_key(region_code, deal_ymd))
+        if batch is not None:
+            # 디스크에서 찾았으면 메모리에도 올려둠 (남은 TTL 대신 달 기준 TTL을 다시 적용)
+            _trade_cache.set(key, batch, ttl=month_ttl(deal_ymd))
+            return batch
+
+    print(f"📡 API 요청 중... 지역: {region_code}, 기간: {deal_ymd}")
+    try:
+        items = await _molit.fetch_month(region_code, deal_ymd)
+    except MolitAPIError as e:
+        # 실패한 달은 캐시하지 않고, 예전 캐시가 남아 있으면 그걸 대신 씀
+        stale = _get_stale_month(region_code, deal_ymd)
+        if stale is not None:
+            print(f"⚠️ 국토부 API 실패 ({deal_ymd}): {e} → 만료된 캐시로 응답")
+            return stale
+
+        print(f"❌ 국토부 API 실패 ({deal_ymd}): {e}")
+        raise
+
+    # 응답 dict는 여기서 버리고 필요한 열만 남김
+    batch = TradeBatch.from_items(items)
+    ttl = month_ttl(deal_ymd)
+    _trade_cache.set(key, batch, ttl=ttl)
+    if _trade_store is not None:
+        _trade_store.set(_store_key(region_code, deal_ymd), batch, ttl=ttl)
+    return batch
+
+
+async def _get_month_apt_trades(region_code: str, deal_ymd: str):
+    """
+    메모리 캐시에 있으면 바로 반환, 없으면 single-flight로 가져옴
+    - 같은 (지역, 계약월)을 동시에 요청한 호출자들은 진행 중인 요청 1개를 같이 기다림
+    - sync/async 호출 모두 molit-io 루프에서 실행되므로 _inflight는 락 없이 이 루프에서만 만짐
+    """
+    global _coalesced_count
+    key = (region_code, deal_ymd)
+
+    batch = _trade_cache.get(key)
+    if batch is not None:
+        return batch
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_load_month_apt_trades(region_code, deal_ymd))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        _coalesced_count += 1
+
+    # 기다리던 호출자 하나가 취소돼도 공유 중인 요청은 계속 진행되도록 shield
+    return await asyncio.shield(task)
+
+
+async def _fetch_recent_apt_trades(region_code: str, months: int = 3):
+    # 모든 달을 동시에 요청하고, 결과는 (이번 달, 지난달, ...) 순서대로 합침
+    # 한 달이라도 (만료된 캐시조차 없이) 실패하면 MolitAPIError → 잘린 데이터를 조용히 내려주지 않음
+    results = await asyncio.gather(
+        *[_get_month_apt_trades(region_code, deal_ymd) for deal_ymd in recent_deal_ymds(months)]
+    )
+
+    batch = TradeBatch.concat(results)
+    print(f"✅ 총 {len(batch)}건의 거래 정보를 가져왔습니다.")
+    return batch
+
+
+async def get_recent_apt_trades_async(region_code: str, months: int = 3):
+    """
+    get_recent_apt_trades의 async 버전 (async 엔드포인트용)
+    요청은 molit-io 루프에서 실행되고, 호출한 쪽 루프는 결과만 기다림
+    """
+    future = _submit(_fetch_recent_apt_trades(region_code, months))
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), FETCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise MolitAPIError(f"국토부 API 응답 대기 시간 초과 ({region_code}, {FETCH_TIMEOUT}초)")
+
+
+def get_recent_apt_trades(region_code: str, months: int = 3):
+    """
+    region_code(예: 11110)를 받아서
+    최근 months개월(이번 달 포함)의 아파트 실거래가 데이터를 모두 가져와 TradeBatch 하나로 반환
+    (sync 호출부용 래퍼. 달별 요청은 동시에 나감. 실패하거나 FETCH_TIMEOUT초 안에 안 끝나면 MolitAPIError)
+    """
+    future = _submit(_fetch_recent_apt_trades(region_code, months))
+    try:
+        return future.result(timeout=FETCH_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise MolitAPIError(f"국토부 API 응답 대기 시간 초과 ({region_code}, {FETCH_TIMEOUT}초)")
+
+
+_PAGES_DONE = object()
+
+
+def iter_month_apt_trades(region_code: str, deal_ymd: str):
+    """
+    한 달치 거래를 페이지가 도착하는 대로 한 건씩 yield (캐시를 거치지 않는 sync 제너레이터, 적재 작업용)
+    중간에 실패하면 MolitAPIError를 던지므로, 받은 데이터를 확정하기 전에 끝까지 소비해야 함
+    """
+    print(f"📡 API 요청 중... 지역: {region_code}, 기간: {deal_ymd} (스트리밍)")
+    pages = queue.Queue()
+
+    async def pump():
+        try:
+            async for items in _molit.iter_month_pages(region_code, deal_ymd):
+                pages.put(items)
+            pages.put(_PAGES_DONE)
         except Exception as e:
-            print(f"⚠️ 데이터 처리 중 에러 발생 ({deal_ymd}): {e}")
-            # JSON 변환 실패 등(XML로 오는 경우) 에러가 나도 다음 달 데이터는 조회해야 하므로 pass
-            pass
+            pages.put(e)
+
+    future = _submit(pump())
+    try:
+        while True:
+            page = pages.get()
+            if page is _PAGES_DONE:
+                return
+            if isinstance(page, MolitAPIError):
+                raise page
+            if isinstance(page, Exception):
+                raise MolitAPIError(str(page)) from page
+            yield from page
+    finally:
+        # 소비하는 쪽이 중간에 멈추면 남은 페이지 요청도 취소
+        future.cancel()
+
+
+def get_cache_stats():
+    """거래 캐시 적중/실패 및 single-flight 통계"""
+    batches = _trade_cache.values()
+    return {
+        "memory": {
+            **_trade_cache.stats(),
+            "trades": sum(len(batch) for batch in batches),
+            "bytes": sum(batch.nbytes for batch in batches),
+        },
+        "disk": _trade_store.stats() if _trade_store is not None else None,
+        "singleflight": {"inflight": len(_inflight), "coalesced": _coalesced_count},
+    }
+
+
+def get_client_stats():
+    """국토부 API 호출 수, 재시도 수, 서킷 브레이커 상태"""
+    return _molit.stats()
+
 
-    print(f"✅ 총 {len(all_apt_list)}건의 거래 정보를 가져왔습니다.")
-    return all_apt_list
+def close():
+    """서버 종료 시 공유 클라이언트 정리"""
+    if _loop is not None:
+        _submit(_molit.aclose()).result(timeout=FETCH_TIMEOUT)
 
 # --- 사용 예시 (테스트용) ---
 # if __name__ == "__main__":
 #     # 종로구(11110) 테스트
-#     result = get_recent_3months_apt_trades("11110")
-#     print(result[0] if result else "데이터 없음")
\ No newline at end of file
+#     result = get_recent_apt_trades("11110")
+#     print(result[0] if result else "데이터 없음")
@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import database as db
+import openapi as oa
+import ingest_trades
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 261018 전국 실거래 일괄 선적재 (트래픽 몰리기 전에 모든 시/군/구를 미리 데워두기)
+# 실행 예: python prefetch_trades.py --months 12 --workers 8 --rps 20
+# - 결과는 서비스가 읽는 apt_trades 적재 테이블에 들어감 (ingest_trades.ingest_region 재사용)
+# - 중간에 끊겨도 체크포인트 파일에 끝난 지역이 기록되어 있어서 다시 실행하면 이어서 진행
+
+DEFAULT_CHECKPOINT = "prefetch_checkpoint.json"
+
+
+def load_checkpoint(path, months):
+    """같은 개월 수로 돌던 체크포인트가 있으면 끝난 지역 목록을 돌려줌"""
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+
+    if checkpoint.get('months') != months:
+        print("⚠️ 체크포인트의 개월 수가 달라서 처음부터 다시 시작합니다.")
+        return set()
+
+    return set(checkpoint.get('done', []))
+
+
+def save_checkpoint(path, months, done):
+    # 임시 파일에 쓰고 교체 (쓰는 도중 끊겨도 체크포인트가 깨지지 않게)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'months': months, 'done': sorted(done)}, f)
+    os.replace(tmp_path, path)
+
+
+def prefetch_region(lawd_cd, months):
+    ingest_trades.ingest_region(lawd_cd, months)
+
+    # 실패한 달이 남아 있으면 끝난 지역으로 기록하지 않음 (다음 실행 때 다시 시도)
+    remaining = ingest_trades.months_to_fetch(lawd_cd, months)
+    if remaining:
+        raise RuntimeError(f"받지 못한 달 {remaining}")
+
+
+def prefetch_all(months, workers, rps, checkpoint_path):
+    oa.set_rate_limit(rps)
+
+    codes = db.get_all_region_codes()
+    done = load_checkpoint(checkpoint_path, months)
+    todo = [code for code in codes if code not in done]
+    print(f"--- [선적재 시작] 전체 {len(codes)}곳 중 {len(todo)}곳 남음 (최근 {months}개월, 워커 {workers}, 초당 {rps or '무제한'}건) ---")
+
+    started = time.time()
+    done_lock = threading.Lock()
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(prefetch_region, code, months): code for code in todo}
+
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️ 지역 {code} 선적재 실패: {e}")
+                failed.append(code)
+                continue
+
+            with done_lock:
+                done.add(code)
+                save_checkpoint(checkpoint_path, months, done)
+            print(f"✅ [{len(done)}/{len(codes)}] {code} 완료")
+
+    print(f"--- [선적재 종료] {time.time() - started:.1f}초, 실패 {len(failed)}곳 ---")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="전국 시/군/구 실거래 일괄 선적재")
+    parser.add_argument("--months", type=int, default=ingest_trades.INGEST_MONTHS, help="최근 몇 개월을 받을지")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 처리할 지역 수")
+    parser.add_argument("--rps", type=float, default=10, help="국토부 API 초당 요청 수 제한 (0이면 무제한)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="진행 상황 저장 파일")
+    parser.add_argument("--reset", action="store_true", help="체크포인트를 지우고 처음부터 시작")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    prefetch_all(args.months, args.workers, args.rps or None, args.checkpoint)
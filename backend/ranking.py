@@ -0,0 +1,90 @@
+import base64
+import numpy as np
+
+# 261018 추천 결과 순위 + 커서 페이지네이션 (/policies/recommended?limit=&cursor=)
+# - 예전에는 자격 되는 정책을 정책 id 순으로 전부 돌려주고, 순서는 화면에서 다시 정렬했음
+# - 점수 = 혜택 금액 + 금리 폭(max_rate - min_rate) + 조회수 + 즐겨찾기 수 (각각 카탈로그 최댓값 대비 0~1로 맞춘 뒤 가중치 합)
+#   금액/조회수/즐겨찾기 수는 몇 개가 값이 아주 커서 log1p로 눌러서 비교
+# - 상위 limit개만 부분 정렬(np.partition으로 limit번째 점수를 구해서 그 이상만 정렬, 전체 정렬 X)
+# - 다음 페이지 커서 = 마지막 항목의 (점수, 정책 id). 그보다 뒤(점수가 낮거나, 같으면 id가 큰) 항목만 다시 top-k
+#   조회수/즐겨찾기 수가 페이지 사이에 바뀌어도 커서 기준으로 이어가므로 같은 정책이 두 번 나오지는 않음 (빠질 수는 있음)
+
+RANK_WEIGHTS = {
+    "benefit": 0.4,     # max_benefit_amount
+    "rate_spread": 0.1, # max_rate - min_rate
+    "visits": 0.3,      # visit_count
+    "favorites": 0.2,   # 즐겨찾기한 사용자 수
+}
+
+
+def _rate(value):
+    """min_rate/max_rate는 문자열('2.35', '60 ', '무관' 등) → 숫자가 아니면 0"""
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _normalize(values):
+    top = values.max() if len(values) else 0
+    return values / top if top > 0 else np.zeros_like(values)
+
+
+def encode_cursor(score, policy_id):
+    return base64.urlsafe_b64encode(f"{score!r}:{policy_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """encode_cursor의 반대. 형식이 틀리면 ValueError"""
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        score, policy_id = text.split(":")
+        return float(score), int(policy_id)
+    except Exception as e:
+        raise ValueError(f"잘못된 커서: {cursor}") from e
+
+
+class PolicyRanker:
+    """카탈로그 스냅샷의 policies_output으로 만드는 순위 계산기 (혜택 금액, 금리 폭은 스냅샷과 같이 고정)"""
+
+    def __init__(self, outputs):
+        policy_ids = [row['policy_id'] for row in outputs]
+        benefit = np.log1p(np.array([max(row.get('max_benefit_amount') or 0, 0) for row in outputs], dtype=float))
+        spread = np.array([max(_rate(row.get('max_rate')) - _rate(row.get('min_rate')), 0) for row in outputs], dtype=float)
+        static = RANK_WEIGHTS['benefit'] * _normalize(benefit) + RANK_WEIGHTS['rate_spread'] * _normalize(spread)
+        self._static = dict(zip(policy_ids, static.tolist()))
+
+    def scores(self, policy_ids, visit_counts, favorite_counts):
+        """정책 id 목록 → 점수 배열 (카탈로그에 없는 id는 조회수/즐겨찾기 수만)"""
+        def column(counts):
+            # 조회수/즐겨찾기 수는 카탈로그 전체 최댓값 기준 (사용자마다, 페이지마다 같은 척도)
+            top = np.log1p(max(counts.values(), default=0))
+            values = np.log1p(np.array([counts.get(policy_id) or 0 for policy_id in policy_ids], dtype=float))
+            return values / top if top > 0 else np.zeros(len(policy_ids))
+
+        static = np.array([self._static.get(policy_id, 0.0) for policy_id in policy_ids], dtype=float)
+        return static + RANK_WEIGHTS['visits'] * column(visit_counts) + RANK_WEIGHTS['favorites'] * column(favorite_counts)
+
+    def top_k(self, policy_ids, visit_counts, favorite_counts, k=None, after=None):
+        """
+        점수 내림차순(같으면 정책 id 오름차순)으로 상위 k개 → (정책 id 목록, 점수 목록, 뒤에 더 있는지)
+        after: 이전 페이지 마지막 항목의 (점수, 정책 id). 그 뒤부터
+        """
+        scores = self.scores(list(policy_ids), visit_counts, favorite_counts)
+        policy_ids = np.asarray(policy_ids, dtype=np.int64)
+
+        if after is not None:
+            after_score, after_id = after
+            rest = (scores < after_score) | ((scores == after_score) & (policy_ids > after_id))
+            policy_ids, scores = policy_ids[rest], scores[rest]
+
+        has_more = k is not None and k < len(policy_ids)
+        if has_more:
+            # k번째로 큰 점수만 구하고(부분 정렬) 그 이상인 항목만 정렬. 경계에 점수가 같은 항목이 있으면 id 순으로 자름
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            candidates = np.flatnonzero(scores >= kth)
+        else:
+            candidates = np.arange(len(policy_ids))
+
+        order = candidates[np.lexsort((policy_ids[candidates], -scores[candidates]))][:k]
+        return policy_ids[order].tolist(), scores[order].tolist(), has_more
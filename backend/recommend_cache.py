@@ -0,0 +1,39 @@
+import os
+from datetime import date
+from cache import LRUCache
+
+# 261018 사용자별 추천 결과 캐시 (/policies/recommended)
+# - 메인 화면, 즐겨찾기 토글 후, 상세에서 돌아올 때마다 같은 추천을 다시 계산하고 있었음
+# - 키: (user_id, 카탈로그 버전, 오늘 날짜), 값: 자격 되는 정책 id 목록 (출력 행은 카탈로그 스냅샷에서 꺼냄)
+#   정책이 바뀌면 버전이 달라져서, 날짜가 바뀌면 만 나이가 달라질 수 있어서 자연히 새로 계산
+# - 내 정보 저장(PUT /user/info/me → save_user_info) 시 그 사용자 항목을 지움
+# - 워커마다 따로 들고 있으므로, 다른 워커에서 정보를 저장한 경우는 RECOMMEND_CACHE_TTL(초) 안에 반영됨
+
+CACHE_TTL = int(os.getenv("RECOMMEND_CACHE_TTL", "300"))
+
+_cache = LRUCache(maxsize=int(os.getenv("RECOMMEND_CACHE_SIZE", "4096")), name="recommendations")
+_invalidations = 0
+
+
+def _key(user_id, catalog_version):
+    return (str(user_id), catalog_version, date.today().isoformat())
+
+
+def get(user_id, catalog_version):
+    return _cache.get(_key(user_id, catalog_version))
+
+
+def put(user_id, catalog_version, result):
+    _cache.set(_key(user_id, catalog_version), result, ttl=CACHE_TTL)
+
+
+def invalidate(user_id):
+    """사용자 정보가 바뀌었을 때 그 사용자의 추천 결과를 모두 지움 (카탈로그 버전과 상관없이)"""
+    global _invalidations
+    user_id = str(user_id)
+    _invalidations += 1
+    return _cache.discard_where(lambda key: key[0] == user_id)
+
+
+def stats():
+    return {**_cache.stats(), "ttl": CACHE_TTL, "invalidations": _invalidations}
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import threading
+import time
+import anyio
+import database as db
+
+# 261018 시/도, 시/군/구 목록 스냅샷 (/regions/sido, /regions/sigungu/{sido_name})
+# - region_code는 법정동 코드라 거의 안 바뀌는데, 화면을 열 때마다 테이블을 읽고 정렬하고 있었음
+# - 처음 한 번 읽어서 정렬된 목록으로 들고 있고, RELOAD_INTERVAL(초)마다 다시 읽음
+# - version = 내용의 해시 → 다시 읽어도 내용이 같으면 그대로 (ETag로 씀)
+
+RELOAD_INTERVAL = float(os.getenv("REGION_RELOAD_INTERVAL", "3600"))
+
+
+class RegionSnapshot:
+    """한 시점의 시/도 → 시/군/구 목록. 만든 뒤에는 고치지 않음"""
+
+    def __init__(self, rows):
+        sigungu = {}
+        for sido, name in rows:
+            names = sigungu.setdefault(sido, set())
+            if name is not None:
+                names.add(name)
+
+        self.sido = tuple(sorted(sigungu))
+        self.sigungu = {sido: tuple(sorted(names)) for sido, names in sigungu.items()}
+        self.loaded_at = time.time()
+        payload = "\n".join(f"{sido}:{','.join(self.sigungu[sido])}" for sido in self.sido)
+        self.version = hashlib.sha1(payload.encode()).hexdigest()
+
+
+_snapshot = None
+_lock = threading.Lock()
+_last_load = 0.0
+
+
+def load():
+    global _snapshot, _last_load
+    snapshot = RegionSnapshot(db.get_region_names())
+    _snapshot = snapshot
+    _last_load = time.monotonic()
+    return snapshot
+
+
+def get():
+    """현재 스냅샷 (처음이거나 RELOAD_INTERVAL이 지났으면 다시 읽음, 실패하면 기존 스냅샷으로)"""
+    global _last_load
+    if _snapshot is None or time.monotonic() - _last_load >= RELOAD_INTERVAL:
+        with _lock:
+            if _snapshot is None:
+                load()
+            elif time.monotonic() - _last_load >= RELOAD_INTERVAL:
+                try:
+                    load()
+                except Exception as e:
+                    print(f"⚠️ 지역 목록 다시 읽기 실패: {e}")
+                    _last_load = time.monotonic()
+    return _snapshot
+
+
+async def get_async():
+    """async 라우트용 get(). DB를 읽어야 할 때만 스레드에서 돌림"""
+    if _snapshot is None or time.monotonic() - _last_load >= RELOAD_INTERVAL:
+        return await anyio.to_thread.run_sync(get)
+    return _snapshot
+
+
+def stats():
+    snapshot = _snapshot
+    return {
+        "version": snapshot.version if snapshot else None,
+        "sido": len(snapshot.sido) if snapshot else 0,
+        "loaded_at": snapshot.loaded_at if snapshot else None,
+        "reload_interval": RELOAD_INTERVAL,
+    }
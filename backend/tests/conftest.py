@@ -0,0 +1,6 @@
+import os
+import sys
+
+# backend/ 모듈을 그대로 import (서버는 backend/에서 uvicorn main:app으로 실행)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MIDDLEWARE_KEY", "test")
@@ -0,0 +1,129 @@
+import itertools
+import re
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from eligibility import IncomeRuleTable, profile_columns
+from init_db import INCOME_RULE_CONDITIONS
+
+SEED_SQL = Path(__file__).resolve().parents[2] / "database" / "seed.sql"
+
+CONDITION_DEFAULTS = {"req_newlywed": False, "req_dual_income": False, "req_no_house": False, "min_children": 0, "priority": 0}
+
+
+def seed_rules():
+    """database/seed.sql의 income_rules INSERT + 대상 유형 조건 UPDATE를 적용한 행 목록"""
+    sql = SEED_SQL.read_text(encoding="utf-8")
+    values = re.search(r"INSERT INTO public\.income_rules \(policy_id, target_type, income_limit\) VALUES(.*?);", sql, re.S)
+    rules = [
+        {"policy_id": int(policy_id), "target_type": target_type, "income_limit": int(income_limit), **CONDITION_DEFAULTS}
+        for policy_id, target_type, income_limit in re.findall(r"\((\d+), '([^']*)', (\d+)\)", values.group(1))
+    ]
+
+    for assignments, policy_id, target_type in re.findall(
+        r"UPDATE public\.income_rules SET (.*?) WHERE policy_id = (\d+) AND target_type = '([^']*)';", sql,
+    ):
+        matched = [rule for rule in rules if rule['policy_id'] == int(policy_id) and rule['target_type'] == target_type]
+        assert len(matched) == 1, (policy_id, target_type)
+        for name, value in re.findall(r"(\w+) = (\w+)", assignments):
+            matched[0][name] = True if value == "true" else int(value)
+    return rules
+
+
+RULES = seed_rules()
+POLICY_IDS = sorted({rule['policy_id'] for rule in RULES})
+
+
+def old_branch_limit(policy_id, user_info, income_standard):
+    """예전 get_recommended_policies(주석 처리된 코드)의 정책별 소득 상한"""
+    rules = {rule['target_type']: rule['income_limit'] for rule in RULES if rule['policy_id'] == policy_id}
+
+    if len(rules) == 1:
+        income_limit = next(iter(rules.values()))
+        return income_limit if income_limit > 1000 else income_standard * 12 / 100 * income_limit
+
+    match policy_id:
+        case 100:
+            if user_info['is_newlywed']:
+                return rules['신혼부부']
+            elif not user_info['is_house_owner'] and user_info['child_count'] >= 2:
+                return rules['생애최초/2자녀']
+            return rules['기본(디딤돌)']
+        case 101:
+            return rules['맞벌이(예정)'] if user_info['dual_income'] else rules['기본(신생아구입)']
+        case 204:
+            key = '신혼I형(매입)(맞벌이)' if user_info['dual_income'] else '신혼I형(매입)(기본)'
+            return income_standard * 12 / 100 * rules[key]
+        case 401:
+            key = '신혼II형(매입)(맞벌이)' if user_info['dual_income'] else '신혼II형(매입)(기본)'
+            return income_standard * 12 / 100 * rules[key]
+    raise AssertionError(f"예전 분기에 없는 규칙 여러 개짜리 정책: {policy_id}")
+
+
+def user_infos():
+    for is_newlywed, dual_income, is_house_owner, child_count in itertools.product(
+        (False, True), (False, True), (False, True), range(4),
+    ):
+        yield {
+            "is_newlywed": is_newlywed, "dual_income": dual_income, "is_house_owner": is_house_owner,
+            "child_count": child_count, "has_newborn": False, "asset": 0, "income": 0,
+        }
+
+
+@pytest.fixture
+def table():
+    return IncomeRuleTable(RULES)
+
+
+def test_every_seeded_policy_is_covered(table):
+    assert table.policy_ids.tolist() == POLICY_IDS
+    assert len(POLICY_IDS) > 30
+
+
+@pytest.mark.parametrize("income_standard", [3000, 6097])
+def test_resolve_limits_matches_old_branch(table, income_standard):
+    for user_info in user_infos():
+        limits = dict(zip(table.policy_ids.tolist(), table.resolve_limits(user_info, income_standard).tolist()))
+        expected = {policy_id: old_branch_limit(policy_id, user_info, income_standard) for policy_id in POLICY_IDS}
+        assert limits == pytest.approx(expected), user_info
+
+
+@pytest.mark.parametrize("income_standard", [3000, 6097])
+def test_resolve_limits_columns_matches_old_branch(table, income_standard):
+    infos = list(user_infos())
+    columns = profile_columns(infos, [30] * len(infos), [income_standard] * len(infos))
+    limits = table.resolve_limits_columns(columns)
+
+    expected = np.array([
+        [old_branch_limit(policy_id, user_info, income_standard) for policy_id in POLICY_IDS]
+        for user_info in infos
+    ])
+    np.testing.assert_allclose(limits, expected)
+
+
+def test_newlywed_rule_wins_by_priority(table):
+    # 신혼부부이면서 무주택 + 자녀 2명이어도 예전 분기처럼 신혼부부 상한 (우선순위)
+    user_info = {"is_newlywed": True, "dual_income": False, "is_house_owner": False, "child_count": 2}
+    limits = dict(zip(table.policy_ids.tolist(), table.resolve_limits(user_info, 3000).tolist()))
+    assert limits[100] == 85000000
+
+    user_info["is_newlywed"] = False
+    limits = dict(zip(table.policy_ids.tolist(), table.resolve_limits(user_info, 3000).tolist()))
+    assert limits[100] == 70000000
+
+    user_info["child_count"] = 0
+    limits = dict(zip(table.policy_ids.tolist(), table.resolve_limits(user_info, 3000).tolist()))
+    assert limits[100] == 60000000
+
+
+def test_init_db_backfill_matches_seed():
+    # 조건 컬럼이 없던 DB에 init_db.py가 채우는 값 = seed.sql의 UPDATE
+    seeded = {
+        (rule['policy_id'], rule['target_type']): {name: rule[name] for name in CONDITION_DEFAULTS if rule[name] != CONDITION_DEFAULTS[name]}
+        for rule in RULES
+    }
+    assert {key: conditions for key, conditions in seeded.items() if conditions} == {
+        (policy_id, target_type): conditions for policy_id, target_type, conditions in INCOME_RULE_CONDITIONS
+    }
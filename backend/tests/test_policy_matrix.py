@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from bench_policy_index import loop_policy_ids, make_income_rules, make_policies, make_profiles
+from eligibility import IncomeRuleTable, PolicyBitsetIndex, PolicyMatrix
+
+
+@pytest.fixture(params=[100, 3000])
+def catalog(request):
+    policies = make_policies(request.param)
+    # is_first는 저장만 하고 판정에는 안 씀 (예전 if ... continue 7개와 같게). 집이 있어도 통과해야 함
+    rng = random.Random(2)
+    for row in policies:
+        row['is_first'] = rng.random() < 0.3
+    income_rules = IncomeRuleTable(make_income_rules(request.param))
+    matrix = PolicyMatrix(policies, income_rules)
+    return policies, income_rules, matrix, PolicyBitsetIndex(matrix)
+
+
+def test_engines_match_old_loop(catalog):
+    policies, income_rules, matrix, index = catalog
+    for user_info, age, income_standard in make_profiles(200):
+        expected = loop_policy_ids(policies, income_rules, user_info, age, income_standard)
+        assert matrix.eligible_policy_ids(user_info, age, income_standard) == expected
+        assert index.eligible_policy_ids(user_info, age, income_standard) == expected
+
+
+def test_is_first_does_not_exclude_house_owners():
+    row = {
+        "policy_id": 1, "min_age": 0, "max_age": 0, "asset_limit": 0, "req_newlywed": False, "req_newborn": False,
+        "house_owner_allowed": True, "min_children": 0, "is_first": True, "income": 0,
+    }
+    matrix = PolicyMatrix([row], IncomeRuleTable([]))
+    user_info = {
+        "asset": 0, "child_count": 0, "income": 0, "is_newlywed": False, "has_newborn": False,
+        "is_house_owner": True, "dual_income": False,
+    }
+    assert matrix.eligible_policy_ids(user_info, 30, 300) == [1]
+    assert PolicyBitsetIndex(matrix).eligible_policy_ids(user_info, 30, 300) == [1]
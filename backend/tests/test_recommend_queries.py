@@ -0,0 +1,182 @@
+import asyncio
+import time
+from datetime import date
+from types import SimpleNamespace
+import pytest
+import catalog
+import database as db
+import database_async as adb
+import main
+import recommend_cache
+
+# 261018 추천 요청 1번의 DB 왕복 횟수 회귀 테스트
+# DB는 가짜 풀로 바꿔서 커넥션 대여(= 쿼리 왕복)만 세고, 카탈로그는 스냅샷을 직접 넣어둠
+# 자격 되는 정책이 1개든 N개든 왕복 횟수가 같아야 함 (정책마다 조회하는 N+1로 돌아가지 않게)
+
+USER_INFO = {
+    "user_id": "u1", "birth_date": date(1995, 5, 5), "income": 3000, "asset": 10000,
+    "is_house_owner": False, "has_newborn": False, "is_newlywed": False, "child_count": 0,
+    "household_size": 2, "dual_income": False,
+}
+
+
+def make_policies(count):
+    """누구나 자격이 되는 정책 count개 (조건 1줄씩)"""
+    return [
+        {
+            "policy_id": policy_id, "min_age": 0, "max_age": 0, "asset_limit": 0, "req_newlywed": False,
+            "req_newborn": False, "house_owner_allowed": True, "min_children": 0, "is_first": False, "income": 9999,
+        }
+        for policy_id in range(1, count + 1)
+    ]
+
+
+def make_outputs(count):
+    return [
+        {"policy_id": policy_id, "visit_count": 0, "policy_name": f"정책 {policy_id}", "max_benefit_amount": 0}
+        for policy_id in range(1, count + 1)
+    ]
+
+
+class FakeCursor:
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.rows = []
+
+    def execute(self, query, params=None):
+        if query is db.ELIGIBLE_POLICIES_SQL:
+            self.rows = list(self.outputs.values())
+        elif "FROM user_info" in query:
+            self.rows = [USER_INFO]
+        elif "household_income_standard100" in query:
+            self.rows = [{"household_size": 2, "monthly_income": 400}]
+        elif "FROM policies_output" in query:
+            self.rows = [self.outputs[policy_id] for policy_id in params[0] if policy_id in self.outputs]
+        else:
+            raise AssertionError(f"예상하지 못한 쿼리: {query}")
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, outputs):
+        self.outputs = outputs
+
+    def getconn(self):
+        return SimpleNamespace(cursor=lambda cursor_factory=None: FakeCursor(self.outputs))
+
+    def putconn(self, conn):
+        pass
+
+
+@pytest.fixture
+def recommend(monkeypatch):
+    """recommend(정책 수, 스냅샷에 출력 정보 포함 여부, 엔진) → (추천 결과, DB 왕복 횟수)"""
+    def run(count, outputs_in_snapshot=True, engine="python"):
+        outputs = make_outputs(count)
+        snapshot = catalog.CatalogSnapshot("test", make_policies(count), outputs if outputs_in_snapshot else [])
+        monkeypatch.setattr(catalog, "_snapshot", snapshot)
+        monkeypatch.setattr(catalog, "_last_check", time.monotonic())
+        monkeypatch.setattr(catalog, "CHECK_INTERVAL", 3600)
+        monkeypatch.setattr(db, "get_pool", lambda: FakePool({row['policy_id']: row for row in outputs}))
+        monkeypatch.setattr(main, "RECOMMEND_ENGINE", engine)
+        recommend_cache._cache.clear()
+
+        with db.track_queries() as counter:
+            result = main.get_recommended_policies(SimpleNamespace(session={"user_id": "u1"}))
+        return result, counter['count']
+
+    return run
+
+
+@pytest.mark.parametrize("engine", ["python", "index"])
+@pytest.mark.parametrize("count", [1, 50])
+def test_snapshot_engines_use_two_round_trips(recommend, engine, count):
+    # user_info + 가구 수 기준 소득. 정책 출력 정보는 스냅샷에서
+    result, queries = recommend(count, engine=engine)
+    assert result['count'] == count
+    assert queries == 2
+
+
+@pytest.mark.parametrize("count", [1, 50])
+def test_outputs_missing_from_snapshot_are_fetched_in_one_query(recommend, count):
+    result, queries = recommend(count, outputs_in_snapshot=False)
+    assert [policy['policy_id'] for policy in result['policies']] == list(range(1, count + 1))
+    assert queries == 3
+
+
+@pytest.mark.parametrize("count", [1, 50])
+def test_sql_engine_uses_three_round_trips(recommend, count):
+    result, queries = recommend(count, engine="sql")
+    assert result['count'] == count
+    assert queries == 3
+
+
+def test_cached_recommendation_skips_db(recommend):
+    recommend(50)
+    with db.track_queries() as counter:
+        result = main.get_recommended_policies(SimpleNamespace(session={"user_id": "u1"}))
+    assert result['count'] == 50
+    assert counter['count'] == 0
+
+
+@pytest.mark.parametrize("engine", ["python", "sql"])
+def test_cache_keeps_policy_ids_only(recommend, engine):
+    # 캐시에는 출력 행 대신 정책 id 목록만 (행은 카탈로그 스냅샷에서)
+    recommend(3, engine=engine)
+    assert recommend_cache.get("u1", "test") == [1, 2, 3]
+
+
+@pytest.fixture
+def recommend_async(monkeypatch):
+    """recommend와 같지만 async 경로(get_recommended_policy_ids_async) → (정책 id 목록, database_async 왕복 횟수)"""
+    def run(count, engine="python"):
+        outputs = {row['policy_id']: row for row in make_outputs(count)}
+        monkeypatch.setattr(catalog, "_snapshot", catalog.CatalogSnapshot("test", make_policies(count), list(outputs.values())))
+        monkeypatch.setattr(catalog, "_last_check", time.monotonic())
+        monkeypatch.setattr(catalog, "CHECK_INTERVAL", 3600)
+        monkeypatch.setattr(main, "RECOMMEND_ENGINE", engine)
+        recommend_cache._cache.clear()
+
+        queries = []
+
+        async def fetch(query, *args):
+            queries.append(query)
+            assert "FROM policies p" in query, query
+            return list(outputs.values())
+
+        async def fetchrow(query, *args):
+            queries.append(query)
+            if "FROM user_info" in query:
+                return USER_INFO
+            assert "household_income_standard100" in query, query
+            return {"household_size": 2, "monthly_income": 400}
+
+        monkeypatch.setattr(adb, "fetch", fetch)
+        monkeypatch.setattr(adb, "fetchrow", fetchrow)
+        policy_ids, _ = asyncio.run(main.get_recommended_policy_ids_async(SimpleNamespace(session={"user_id": "u1"})))
+        return policy_ids, len(queries)
+
+    return run
+
+
+@pytest.mark.parametrize("engine, expected", [("python", 2), ("index", 2), ("sql", 3)])
+@pytest.mark.parametrize("count", [1, 50])
+def test_async_path_uses_same_round_trips(recommend_async, engine, expected, count):
+    policy_ids, queries = recommend_async(count, engine=engine)
+    assert policy_ids == list(range(1, count + 1))
+    assert queries == expected
+
+
+def test_sync_and_async_paths_share_cache(recommend, monkeypatch):
+    recommend(5)
+    monkeypatch.setattr(adb, "fetchrow", None) # 캐시에 있으면 조회하지 않음
+    policy_ids, _ = asyncio.run(main.get_recommended_policy_ids_async(SimpleNamespace(session={"user_id": "u1"})))
+    assert policy_ids == [1, 2, 3, 4, 5]
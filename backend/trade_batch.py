@@ -0,0 +1,278 @@
+import io
+from decimal import Decimal, ROUND_HALF_UP
+import numpy as np
+
+# 261018 실거래 묶음(TradeBatch): 거래 리스트를 열(column) 단위 NumPy 배열로 보관
+# - 국토부 item dict는 문자열 필드가 30개 가까이 되는데, 서비스에서 쓰는 건 이름/동/금액/해제 여부 정도
+# - 필요한 필드만 배열로 바꿔두면 캐시 메모리가 크게 줄고, 필터/집계를 벡터 연산으로 할 수 있음
+# - 아파트 이름과 동은 범주형(categorical): 고유 문자열 목록 + 행마다 int32 코드
+
+NO_FLOOR = np.iinfo(np.int16).min # 층 정보가 없을 때
+
+
+# 국토부 응답 숫자 필드('82,500', ' 84.97 ', '') 파싱. ingest_trades.py(적재)도 이 함수를 써서 두 경로가 금액을 같게 읽음
+def parse_int(value):
+    if value is None:
+        return None
+    value = str(value).replace(',', '').strip()
+    return int(float(value)) if value else None
+
+
+def parse_float(value):
+    if value is None:
+        return None
+    value = str(value).replace(',', '').strip()
+    return float(value) if value else None
+
+
+def _strip(value):
+    return str(value).strip() if value is not None else ""
+
+
+def _round1(value):
+    """소수 첫째 자리 반올림 (사사오입, SQL round(numeric, 1)과 같은 결과)"""
+    return float(Decimal(repr(float(value))).quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
+
+
+def _encode(labels):
+    """문자열 리스트 → (고유 문자열 배열, 행별 코드 배열)"""
+    if not labels:
+        return np.array([], dtype=str), np.array([], dtype=np.int32)
+    categories, codes = np.unique(np.array(labels, dtype=str), return_inverse=True)
+    return categories, codes.astype(np.int32)
+
+
+def _to_dates(years, months, days):
+    """연/월/일 int 배열 → datetime64[D] 배열 (일이 없으면 1일로)"""
+    month_index = (np.asarray(years, dtype=np.int64) - 1970) * 12 + (np.asarray(months, dtype=np.int64) - 1)
+    first_days = month_index.astype('datetime64[M]').astype('datetime64[D]')
+    return first_days + (np.asarray(days, dtype=np.int64) - 1).astype('timedelta64[D]')
+
+
+def _run_quantile(sorted_values, starts, counts, q):
+    """구간별로 정렬된 배열에서 구간마다 q 분위수 (선형 보간, SQL percentile_cont와 같은 방식)"""
+    position = (counts - 1) * q
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    low_values = sorted_values[starts + lower]
+    high_values = sorted_values[starts + upper]
+    return low_values + (high_values - low_values) * (position - lower)
+
+
+class TradeBatch:
+    """
+    한 지역(여러 달 가능)의 거래를 열 단위로 담는 묶음. 만든 뒤에는 고치지 않음(필터하면 새 묶음).
+    - amount: 거래 금액 int32 (단위 만)
+    - area: 전용면적 float32 (㎡, 없으면 NaN)
+    - floor: 층 int16 (없으면 NO_FLOOR)
+    - deal_date: 계약일 datetime64[D]
+    - cancelled: 해제된 거래(cdealType == "O") 여부
+    - name_codes / dong_codes: names / dongs 범주 목록의 인덱스
+    """
+
+    __slots__ = ("amount", "area", "floor", "deal_date", "cancelled", "names", "name_codes", "dongs", "dong_codes")
+
+    def __init__(self, amount, area, floor, deal_date, cancelled, names, name_codes, dongs, dong_codes):
+        self.amount = amount
+        self.area = area
+        self.floor = floor
+        self.deal_date = deal_date
+        self.cancelled = cancelled
+        self.names = names
+        self.name_codes = name_codes
+        self.dongs = dongs
+        self.dong_codes = dong_codes
+
+    @classmethod
+    def empty(cls):
+        return cls._build([], [], [], [], [], [], [], [], [])
+
+    @classmethod
+    def _build(cls, names, dongs, amounts, areas, floors, years, months, days, cancelled):
+        name_categories, name_codes = _encode(names)
+        dong_categories, dong_codes = _encode(dongs)
+        return cls(
+            amount=np.array(amounts, dtype=np.int32),
+            area=np.array([np.nan if a is None else a for a in areas], dtype=np.float32),
+            floor=np.array([NO_FLOOR if f is None else f for f in floors], dtype=np.int16),
+            deal_date=_to_dates(years, months, days) if amounts else np.array([], dtype='datetime64[D]'),
+            cancelled=np.array(cancelled, dtype=bool),
+            names=name_categories,
+            name_codes=name_codes,
+            dongs=dong_categories,
+            dong_codes=dong_codes,
+        )
+
+    @classmethod
+    def from_items(cls, items):
+        """국토부 응답 item(dict) 목록으로 만듦. 이름이나 금액이 없는 거래는 버림."""
+        names, dongs, amounts, areas, floors, years, months, days, cancelled = ([] for _ in range(9))
+
+        for item in items:
+            name = _strip(item.get('aptNm'))
+            amount = parse_int(item.get('dealAmount'))
+            if not name or amount is None:
+                continue
+
+            names.append(name)
+            dongs.append(_strip(item.get('aptDong')))
+            amounts.append(amount)
+            areas.append(parse_float(item.get('excluUseAr')))
+            floors.append(parse_int(item.get('floor')))
+            years.append(parse_int(item.get('dealYear')) or 1970)
+            months.append(parse_int(item.get('dealMonth')) or 1)
+            days.append(parse_int(item.get('dealDay')) or 1)
+            cancelled.append(_strip(item.get('cdealType')) == "O")
+
+        return cls._build(names, dongs, amounts, areas, floors, years, months, days, cancelled)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """apt_trades 조회 결과(dict 행)로 만듦. apt_name/cdeal_type 컬럼은 없어도 됨."""
+        names, dongs, amounts, areas, floors, years, months, days, cancelled = ([] for _ in range(9))
+
+        for row in rows:
+            deal_ymd = row['deal_ymd']
+            names.append(row.get('apt_name') or "")
+            dongs.append(row.get('apt_dong') or "")
+            amounts.append(row['deal_amount'])
+            areas.append(row.get('exclu_use_ar'))
+            floors.append(row.get('floor'))
+            years.append(int(deal_ymd[:4]))
+            months.append(int(deal_ymd[4:6]))
+            days.append(row.get('deal_day') or 1)
+            cancelled.append(row.get('cdeal_type') == "O")
+
+        return cls._build(names, dongs, amounts, areas, floors, years, months, days, cancelled)
+
+    @classmethod
+    def concat(cls, batches):
+        """여러 묶음(예: 달별 묶음)을 하나로 합침. 범주 목록도 다시 합쳐서 코드를 맞춤."""
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        def merge(categories_list, codes_list):
+            categories = np.unique(np.concatenate(categories_list))
+            codes = [np.searchsorted(categories, cats)[codes] for cats, codes in zip(categories_list, codes_list)]
+            return categories, np.concatenate(codes).astype(np.int32)
+
+        names, name_codes = merge([b.names for b in batches], [b.name_codes for b in batches])
+        dongs, dong_codes = merge([b.dongs for b in batches], [b.dong_codes for b in batches])
+        return cls(
+            amount=np.concatenate([b.amount for b in batches]),
+            area=np.concatenate([b.area for b in batches]),
+            floor=np.concatenate([b.floor for b in batches]),
+            deal_date=np.concatenate([b.deal_date for b in batches]),
+            cancelled=np.concatenate([b.cancelled for b in batches]),
+            names=names,
+            name_codes=name_codes,
+            dongs=dongs,
+            dong_codes=dong_codes,
+        )
+
+    def __len__(self):
+        return len(self.amount)
+
+    def filter(self, mask):
+        """bool 마스크에 해당하는 행만 남긴 새 묶음 (범주 목록은 그대로 공유)"""
+        return TradeBatch(
+            amount=self.amount[mask],
+            area=self.area[mask],
+            floor=self.floor[mask],
+            deal_date=self.deal_date[mask],
+            cancelled=self.cancelled[mask],
+            names=self.names,
+            name_codes=self.name_codes[mask],
+            dongs=self.dongs,
+            dong_codes=self.dong_codes[mask],
+        )
+
+    def name_mask(self, apt_name: str):
+        """이름이 정확히 같은 거래의 마스크 (이름 비교는 범주 목록에서 한 번만 함)"""
+        index = np.searchsorted(self.names, apt_name)
+        if index >= len(self.names) or self.names[index] != apt_name:
+            return np.zeros(len(self), dtype=bool)
+        return self.name_codes == index
+
+    def apt_names(self):
+        """거래가 있는 아파트 이름 목록 (정렬됨)"""
+        return [str(name) for name in self.names[np.unique(self.name_codes)]]
+
+    def select(self, apt_name: str = None, include_cancelled: bool = False):
+        """이름(주면) + 해제 거래 제외 조건을 한 번에 적용한 마스크"""
+        mask = np.ones(len(self), dtype=bool) if apt_name is None else self.name_mask(apt_name)
+        if not include_cancelled:
+            mask &= ~self.cancelled
+        return mask
+
+    def summarize_by_dong(self, apt_name: str = None):
+        """
+        동별/전체 거래가 통계 (건수/평균/최솟값/사분위수/중앙값/최댓값, 단위 만)를 벡터 연산으로 계산
+        - apt_name을 주면 그 아파트만, 해제된 거래는 항상 제외
+        - reference_price: 동별 평균 중 가장 낮은 값 (정책의 최대 주택가격과 비교하는 기준)
+        거래가 없으면 None
+        """
+        mask = self.select(apt_name)
+        amount = self.amount[mask].astype(np.int64)
+        dong_codes = self.dong_codes[mask]
+        if len(amount) == 0:
+            return None
+
+        # (동, 금액) 순으로 정렬하면 동마다 금액이 오름차순인 연속 구간이 됨
+        order = np.lexsort((amount, dong_codes))
+        amount = amount[order]
+        dong_codes = dong_codes[order]
+
+        starts = np.flatnonzero(np.r_[True, dong_codes[1:] != dong_codes[:-1]])
+        counts = np.diff(np.r_[starts, len(amount)])
+        sums = np.add.reduceat(amount, starts)
+        means = sums / counts
+        mins = amount[starts]
+        maxs = amount[starts + counts - 1]
+        p25s, medians, p75s = (_run_quantile(amount, starts, counts, q) for q in (0.25, 0.5, 0.75))
+
+        dongs = [
+            {
+                "apt_dong": str(self.dongs[code]) or None,
+                "count": int(count),
+                "mean": _round1(mean),
+                "min": int(low),
+                "p25": float(p25),
+                "median": float(median),
+                "p75": float(p75),
+                "max": int(high),
+            }
+            for code, count, mean, low, p25, median, p75, high
+            in zip(dong_codes[starts], counts, means, mins, p25s, medians, p75s, maxs)
+        ]
+        p25, median, p75 = np.percentile(amount, [25, 50, 75])
+
+        return {
+            "reference_price": _round1(means.min()),
+            "count": int(len(amount)),
+            "mean": _round1(amount.mean()),
+            "min": int(amount.min()),
+            "p25": float(p25),
+            "median": float(median),
+            "p75": float(p75),
+            "max": int(maxs.max()),
+            "dongs": dongs,
+        }
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, field).nbytes for field in self.__slots__)
+
+    # --- 디스크 캐시(SqliteStore) 직렬화 ---
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez(buffer, **{field: getattr(self, field) for field in self.__slots__})
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(**{field: arrays[field] for field in cls.__slots__})
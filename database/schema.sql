@@ -6,6 +6,10 @@
 -- 5. user_info (Ref: users)
 -- 6. income_rules (Ref: policies)
 -- 7. favorites (Ref: users, policies)
+-- 8. apt_trades
+-- 9. apt_trade_months
+-- 10. apt_price_stats
+-- 11. apt_price_stats_regions
 
 -- UUID 생성 확장 기능 활성화
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
@@ -43,6 +47,9 @@ CREATE TABLE public.policies (
 	"desc" text NULL,
 	CONSTRAINT policies_pkey PRIMARY KEY (policy_id)
 );
+-- SQL 자격 판정(RECOMMEND_ENGINE=sql)용 인덱스
+CREATE INDEX policies_age_idx ON public.policies USING btree (min_age, max_age);
+CREATE INDEX policies_asset_limit_idx ON public.policies USING btree (asset_limit);
 
 -- 3. Region Code (법정동 코드)
 CREATE TABLE public.region_code (
@@ -84,11 +91,18 @@ CREATE TABLE public.user_info (
 );
 
 -- 6. Income Rules (정책별 소득 제한 규칙)
+-- req_newlywed / req_dual_income / req_no_house / min_children: 이 규칙이 적용되는 대상 조건 (기본값은 조건 없음)
+-- priority: 한 정책에서 여러 규칙이 해당되면 큰 것의 상한을 씀
 CREATE TABLE public.income_rules (
 	rule_id serial4 NOT NULL,
 	policy_id int4 NOT NULL,
 	target_type varchar(100) NULL,
 	income_limit int8 NULL,
+	req_newlywed bool DEFAULT false NOT NULL,
+	req_dual_income bool DEFAULT false NOT NULL,
+	req_no_house bool DEFAULT false NOT NULL,
+	min_children int4 DEFAULT 0 NOT NULL,
+	priority int4 DEFAULT 0 NOT NULL,
 	CONSTRAINT income_rules_pkey PRIMARY KEY (rule_id),
 	CONSTRAINT fk_policy FOREIGN KEY (policy_id) REFERENCES public.policies(policy_id) ON DELETE CASCADE
 );
@@ -103,4 +117,65 @@ CREATE TABLE public.favorites (
 	CONSTRAINT user_policy UNIQUE (user_id, policy_id),
 	CONSTRAINT fk_policy FOREIGN KEY (policy_id) REFERENCES public.policies(policy_id) ON DELETE CASCADE,
 	CONSTRAINT fk_user FOREIGN KEY (user_id) REFERENCES public.users(user_id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+
+-- 8. Apt Trades (국토부 아파트 매매 실거래 적재 테이블)
+-- 사용자 요청 중에 국토부 API를 부르지 않도록 ingest_trades.py가 미리 채워둠
+CREATE TABLE public.apt_trades (
+	trade_id bigserial NOT NULL,
+	lawd_cd bpchar(5) NOT NULL,
+	deal_ymd bpchar(6) NOT NULL,
+	deal_day int2 NULL,
+	apt_name varchar(100) NOT NULL,
+	apt_dong varchar(50) NULL,
+	umd_nm varchar(50) NULL,
+	deal_amount int8 NOT NULL,
+	exclu_use_ar numeric(8, 2) NULL,
+	floor int2 NULL,
+	build_year int2 NULL,
+	cdeal_type varchar(5) NULL,
+	CONSTRAINT apt_trades_pkey PRIMARY KEY (trade_id)
+);
+CREATE INDEX apt_trades_lookup_idx ON public.apt_trades USING btree (lawd_cd, apt_name, deal_ymd);
+CREATE INDEX apt_trades_month_idx ON public.apt_trades USING btree (lawd_cd, deal_ymd);
+
+-- 9. Apt Trade Months (지역/계약월별 적재 이력)
+-- 이미 받은 달은 다시 받지 않기 위한 증분 적재 기준
+CREATE TABLE public.apt_trade_months (
+	lawd_cd bpchar(5) NOT NULL,
+	deal_ymd bpchar(6) NOT NULL,
+	trade_count int4 NOT NULL,
+	fetched_at timestamp DEFAULT CURRENT_TIMESTAMP NOT NULL,
+	CONSTRAINT apt_trade_months_pkey PRIMARY KEY (lawd_cd, deal_ymd)
+);
+
+-- 10. Apt Price Stats (아파트별 거래가 통계)
+-- 적재 후 지역 단위로 다시 계산해두고, 상세 추천(/policies/recommended/detail)은 키로 조회만 함
+-- dongs: 동별 통계 JSON 배열 [{apt_dong, count, mean, min, p25, median, p75, max}, ...]
+-- reference_price: 동별 평균 중 최솟값 (정책의 최대 주택가격과 비교하는 기준)
+CREATE TABLE public.apt_price_stats (
+	lawd_cd bpchar(5) NOT NULL,
+	apt_name varchar(100) NOT NULL,
+	window_months int2 NOT NULL,
+	as_of_ymd bpchar(6) NOT NULL,
+	trade_count int4 NOT NULL,
+	mean_amount float8 NOT NULL,
+	min_amount int8 NOT NULL,
+	p25_amount float8 NOT NULL,
+	median_amount float8 NOT NULL,
+	p75_amount float8 NOT NULL,
+	max_amount int8 NOT NULL,
+	reference_price float8 NOT NULL,
+	dongs jsonb NOT NULL,
+	built_at timestamp DEFAULT CURRENT_TIMESTAMP NOT NULL,
+	CONSTRAINT apt_price_stats_pkey PRIMARY KEY (lawd_cd, apt_name, window_months)
+);
+
+-- 11. Apt Price Stats Regions (지역별 통계 계산 기준월)
+-- 거래가 없어 apt_price_stats 행이 없는 지역도 이번 달 기준으로 계산했으면 다시 계산하지 않도록 남김
+CREATE TABLE public.apt_price_stats_regions (
+	lawd_cd bpchar(5) NOT NULL,
+	as_of_ymd bpchar(6) NOT NULL,
+	built_at timestamp DEFAULT CURRENT_TIMESTAMP NOT NULL,
+	CONSTRAINT apt_price_stats_regions_pkey PRIMARY KEY (lawd_cd)
+);
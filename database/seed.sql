@@ -71,6 +71,14 @@ INSERT INTO public.income_rules (policy_id, target_type, income_limit) VALUES
 (309, '생애최초감면', 9999999999), (401, '신혼II형(매입)(맞벌이)', 140),
 (401, '신혼II형(매입)(기본)', 120);
 
+-- 대상 유형 조건 (예전 main.py의 match policy_id 분기. 해당되는 규칙 중 priority가 큰 것의 상한을 씀)
+-- 여기 없는 규칙은 기본값: 조건 없음, priority 0
+UPDATE public.income_rules SET req_newlywed = true, priority = 2 WHERE policy_id = 100 AND target_type = '신혼부부';
+UPDATE public.income_rules SET req_no_house = true, min_children = 2, priority = 1 WHERE policy_id = 100 AND target_type = '생애최초/2자녀';
+UPDATE public.income_rules SET req_dual_income = true, priority = 1 WHERE policy_id = 101 AND target_type = '맞벌이(예정)';
+UPDATE public.income_rules SET req_dual_income = true, priority = 1 WHERE policy_id = 204 AND target_type = '신혼I형(매입)(맞벌이)';
+UPDATE public.income_rules SET req_dual_income = true, priority = 1 WHERE policy_id = 401 AND target_type = '신혼II형(매입)(맞벌이)';
+
 
 /* =========================================
    3. Region Code (법정동 코드)
@@ -23,6 +23,8 @@ import logoImg from "@/assets/logo.png";
 
 // ★ 한 페이지에 보여줄 아이템 개수 상수 선언
 const ITEMS_PER_PAGE = 6;
+// 맞춤 정책은 서버 추천 순서 그대로, 한 번에 이만큼씩 받고 next_cursor로 이어 받음
+const RECOMMEND_PAGE_SIZE = ITEMS_PER_PAGE * 5;
 
 // [추가] 카테고리별 정책 유형 매핑 객체
 const POLICY_TYPE_MAP = {
@@ -56,6 +58,8 @@ const MainPage = () => {
   const [pageAll, setPageAll] = useState(1);
   const [pageCustom, setPageCustom] = useState(1);
   const [pageFav, setPageFav] = useState(1);
+  const [recommendCursor, setRecommendCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // [추가] 필터링 및 정렬 상태
   const [sortType, setSortType] = useState("popular"); // 'popular' or 'alpha'
@@ -115,15 +119,9 @@ const MainPage = () => {
         setAllSido(allSidoRes.data);
 
         if (userInfoRes.data.has_info === true) {
-          const allUserRes = await api.get("/policies/recommended");
-          const processedFilteredPolicies = allUserRes.data.policies.map((item) => ({
-            ...item,
-            isFavorite: myFavoriteIds.includes(item.policy_id),
-            visit_count: item.visit_count || 0,
-          }));
-          const sortedFilteredPolicies = processedFilteredPolicies.sort((a, b) => (b.visit_count || 0) - (a.visit_count || 0));
-          setRawFilteredPolicies(sortedFilteredPolicies);
-          setFilteredPolicies(sortedFilteredPolicies);
+          const recommendedPolicies = await fetchRecommendedPage(null, myFavoriteIds);
+          setRawFilteredPolicies(recommendedPolicies);
+          setFilteredPolicies(recommendedPolicies);
         }
   
       } catch (error) {
@@ -215,6 +213,38 @@ const MainPage = () => {
     }
   };
   
+  // [추가] 맞춤 정책 한 페이지 (서버가 순위대로 줌, 다시 정렬하지 않음)
+  const fetchRecommendedPage = async (cursor, favoriteIds) => {
+    const response = await api.get("/policies/recommended", {
+      params: { limit: RECOMMEND_PAGE_SIZE, cursor },
+    });
+    setRecommendCursor(response.data.next_cursor);
+    return response.data.policies.map((item) => ({
+      ...item,
+      isFavorite: favoriteIds.includes(item.policy_id),
+      visit_count: item.visit_count || 0,
+    }));
+  };
+
+  const handleLoadMoreRecommended = async () => {
+    try {
+      setLoadingMore(true);
+      const favoriteIds = rawAllPolicies.filter(p => p.isFavorite).map(p => p.policy_id);
+      const nextPolicies = await fetchRecommendedPage(recommendCursor, favoriteIds);
+      const nextFiltered = filterPolicies(nextPolicies);
+      setRawFilteredPolicies(prev => [...prev, ...nextPolicies]);
+      setFilteredPolicies(prev => [...prev, ...nextFiltered]);
+      // 새로 받은 정책이 시작되는 페이지로 이동
+      if (nextFiltered.length > 0) {
+        setPageCustom(Math.floor(filteredPolicies.length / ITEMS_PER_PAGE) + 1);
+      }
+    } catch (error) {
+      console.error("맞춤 정책 더 불러오기 실패:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleLogout = async () => {
     const response = await api.post("/logout", {});
     alert(response.data.message);
@@ -267,10 +297,11 @@ const MainPage = () => {
           apart_name: aptSearchTerm
         }
       });
+      // 동별 평균 중 최솟값(reference_price)을 정책의 최대 주택가격과 비교
       const aptData = response.data;
       const checkIsActive = (policy) => {
         const isRegionMatch = policy.region === "전국" || policy.region.includes(selectedSido);
-        const isPriceMatch = !policy.max_house_price || aptData <= policy.max_house_price;
+        const isPriceMatch = !policy.max_house_price || aptData.reference_price <= policy.max_house_price;
         return isRegionMatch && isPriceMatch;
       };
 
@@ -302,24 +333,40 @@ const MainPage = () => {
       console.error("조회수 업데이트 실패:", error);
     }
     setSelectedPolicy(policy);
+
+    // 목록 API는 요약 필드만 주므로 상세 설명(desc, benefit_detail, caution 등)은 상세 API에서 받아서 채움
+    api.get(`/policies/${policy.policy_id}`)
+      .then((response) => {
+        setSelectedPolicy((prev) =>
+          prev && prev.policy_id === policy.policy_id
+            ? { ...response.data, isFavorite: prev.isFavorite, visit_count: prev.visit_count }
+            : prev
+        );
+      })
+      .catch((error) => console.error("정책 상세 불러오기 실패:", error));
   };
 
   const handleCloseDetail = () => {
     setSelectedPolicy(null);
   };
 
+  // [추가] 카테고리/정책 유형 필터
+  const filterPolicies = (source) => {
+    let result = [...source];
+    if (selectedCategory !== "모두") {
+      result = result.filter(p => p.category === selectedCategory);
+    }
+    if (selectedPolicyType !== "모두") {
+      result = result.filter(p => p.policy_type === selectedPolicyType);
+    }
+    return result;
+  };
+
   // [추가] 검색 버튼 핸들러
   const handleSearch = () => {
     const process = (source) => {
-      let result = [...source];
-
       // 1. 필터링
-      if (selectedCategory !== "모두") {
-        result = result.filter(p => p.category === selectedCategory);
-      }
-      if (selectedPolicyType !== "모두") {
-        result = result.filter(p => p.policy_type === selectedPolicyType);
-      }
+      const result = filterPolicies(source);
 
       // 2. 정렬
       result.sort((a, b) => {
@@ -336,7 +383,8 @@ const MainPage = () => {
     };
 
     setAllPolicies(process(rawAllPolicies));
-    setFilteredPolicies(process(rawFilteredPolicies));
+    // 맞춤 정책은 서버 추천 순서 그대로 두고 필터만 적용
+    setFilteredPolicies(filterPolicies(rawFilteredPolicies));
 
     // 검색 후 첫 페이지로 이동
     setPageAll(1);
@@ -481,7 +529,7 @@ const MainPage = () => {
                                 {/* [수정] 필터링 및 정렬 컨트롤 (탭 리스트 오른쪽으로 이동) */}
                                             <div className="flex flex-col sm:flex-row items-center gap-3 w-full md:w-auto">
                                               <div className="flex items-center gap-2 w-full sm:w-auto">
-                                                <Select value={sortType} onValueChange={setSortType}>
+                                                <Select value={sortType} onValueChange={setSortType} disabled={activeTab === 'custom'}>
                                                   <SelectTrigger className="w-full sm:w-[120px] bg-white">
                                                     <SelectValue />
                                                   </SelectTrigger>
@@ -494,6 +542,7 @@ const MainPage = () => {
                                                   variant="outline" 
                                                   size="icon" 
                                                   className="border-theme-venus/30 bg-white"
+                                                  disabled={activeTab === 'custom'}
                                                   onClick={() => setSortOrder(prev => prev === 'asc' ? 'desc' : 'asc')}
                                                 >
                                                   {sortOrder === 'asc' ? <ArrowUp className="w-5 h-5" /> : <ArrowDown className="w-5 h-5" />}
@@ -580,6 +629,18 @@ const MainPage = () => {
                               currentPage={pageCustom} 
                               onPageChange={setPageCustom} 
                             />
+                            {recommendCursor && (
+                              <div className="flex justify-center">
+                                <Button
+                                  variant="outline"
+                                  className="border-theme-venus/30 bg-white text-theme-livid"
+                                  onClick={handleLoadMoreRecommended}
+                                  disabled={loadingMore}
+                                >
+                                  {loadingMore ? "불러오는 중..." : "맞춤 정책 더 보기"}
+                                </Button>
+                              </div>
+                            )}
                           </>
                         ) : (
                           <div className="flex flex-col items-center justify-center py-20 bg-white rounded-2xl border border-dashed border-theme-venus min-h-[400px]">